@@ -0,0 +1,176 @@
+"""
+Компактный формат callback_data и диспетчеризация по коду действия.
+
+Формат: <роль>|<код>[|<значение>...], например `s|w|5` (неделя 5 в меню студента).
+- код действия — 1–2 символа вместо полного имени (`week_menu` → `w`);
+- int-поля пакуются в base36, даты — в base36 числа дней от 1970-01-01;
+- символ `|` не встречается в старых форматах, поэтому префиксы ролей не пересекаются
+  с `week:...`, `slot:...` и т.п. из других роутеров.
+
+Старый формат `r=s;a=week_menu;w=5` по-прежнему декодируется: клавиатуры, уже
+отправленные пользователям, продолжают работать.
+
+CallbackDispatcher регистрирует в роутере один хендлер: фильтр декодирует данные
+и ищет хендлер действия в словаре (O(1)) вместо перебора цепочки regexp-фильтров.
+"""
+
+from __future__ import annotations
+import logging
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.types import CallbackQuery
+
+log = logging.getLogger(__name__)
+
+SEP = "|"
+MAX_CALLBACK_BYTES = 64
+_EPOCH = date(1970, 1, 1)
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _b36(n: int) -> str:
+    if n < 0:
+        return "-" + _b36(-n)
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = _DIGITS[r] + out
+        if not n:
+            return out
+
+
+# ── типы полей: (упаковать, распаковать, распаковать из старого формата) ─────
+_FIELD_TYPES: Dict[type, Tuple[Callable[[Any], str], Callable[[str], Any], Callable[[str], Any]]] = {
+    int: (lambda v: _b36(int(v)), lambda s: int(s, 36), int),
+    str: (str, str, str),
+    date: (
+        lambda v: _b36((v - _EPOCH).days),
+        lambda s: _EPOCH + timedelta(days=int(s, 36)),
+        lambda s: date(int(s[:4]), int(s[4:6]), int(s[6:8])),  # YYYYMMDD
+    ),
+}
+
+
+@dataclass(frozen=True)
+class CallbackAction:
+    name: str
+    code: str
+    fields: Tuple[Tuple[str, type], ...] = ()
+
+
+@dataclass(frozen=True)
+class CallbackData:
+    role: str
+    action: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.params.get(key, default)
+
+
+class CallbackCodec:
+    """Реестр действий одной роли: имя ↔ короткий код и типизированные поля."""
+
+    def __init__(self, role: str):
+        self.role = role
+        self._by_name: Dict[str, CallbackAction] = {}
+        self._by_code: Dict[str, CallbackAction] = {}
+
+    def action(self, name: str, code: str, **fields: type) -> CallbackAction:
+        if name in self._by_name or code in self._by_code:
+            raise ValueError(f"Callback action {name!r}/{code!r} already registered for role {self.role!r}")
+        if SEP in code:
+            raise ValueError(f"Callback code must not contain {SEP!r}: {code!r}")
+        for key, tp in fields.items():
+            if tp not in _FIELD_TYPES:
+                raise ValueError(f"Unsupported callback field type for {key!r}: {tp!r}")
+        act = CallbackAction(name, code, tuple(fields.items()))
+        self._by_name[name] = act
+        self._by_code[code] = act
+        return act
+
+    def actions(self) -> Tuple[str, ...]:
+        return tuple(self._by_name)
+
+    # ── encode ───────────────────────────────────────────────────────────────
+    def pack(self, name: str, **params: Any) -> str:
+        act = self._by_name[name]
+        parts = [self.role, act.code]
+        for key, tp in act.fields:
+            value = params.get(key)
+            if value is None:
+                raise ValueError(f"Callback {name!r}: missing field {key!r}")
+            packed = _FIELD_TYPES[tp][0](value)
+            if SEP in packed:
+                raise ValueError(f"Callback {name!r}: field {key!r} must not contain {SEP!r}")
+            parts.append(packed)
+        result = SEP.join(parts)
+        if len(result.encode("utf-8")) > MAX_CALLBACK_BYTES:
+            log.warning(f"Callback data too long ({len(result)}): {result}")
+        return result
+
+    # ── decode ───────────────────────────────────────────────────────────────
+    def unpack(self, data: Optional[str]) -> Optional[CallbackData]:
+        """Декодировать новый или старый формат; None — чужие/некорректные данные."""
+        if not data:
+            return None
+        try:
+            if data.startswith(self.role + SEP):
+                return self._unpack_compact(data)
+            if data.startswith(f"r={self.role};"):
+                return self._unpack_legacy(data)
+        except (ValueError, IndexError) as e:
+            log.warning(f"Bad callback data {data!r}: {e}")
+        return None
+
+    def _unpack_compact(self, data: str) -> Optional[CallbackData]:
+        _, code, *values = data.split(SEP)
+        act = self._by_code.get(code)
+        if act is None or len(values) != len(act.fields):
+            return None
+        params = {key: _FIELD_TYPES[tp][1](raw) for (key, tp), raw in zip(act.fields, values)}
+        return CallbackData(self.role, act.name, params)
+
+    def _unpack_legacy(self, data: str) -> Optional[CallbackData]:
+        raw = dict(part.split("=", 1) for part in data.split(";") if "=" in part)
+        act = self._by_name.get(raw.get("a", ""))
+        if act is None:
+            return None
+        params = {key: _FIELD_TYPES[tp][2](raw[key]) for key, tp in act.fields}
+        return CallbackData(self.role, act.name, params)
+
+
+class CallbackDispatcher:
+    """
+    Один callback-хендлер на роутер с таблицей {действие: хендлер}.
+
+    Хендлеры получают те же DI-аргументы, что и обычные aiogram-хендлеры
+    (лишние отфильтровываются по сигнатуре), плюс `cbd: CallbackData`.
+    """
+
+    def __init__(self, router: Router, codec: CallbackCodec):
+        self.codec = codec
+        self._handlers: Dict[str, CallableObject] = {}
+        router.callback_query(self._match)(self._dispatch)
+
+    def on(self, *names: str) -> Callable:
+        def decorator(func: Callable) -> Callable:
+            for name in names:
+                if name not in self.codec.actions():
+                    raise ValueError(f"Unknown callback action {name!r} for role {self.codec.role!r}")
+                self._handlers[name] = CallableObject(func)
+            return func
+        return decorator
+
+    async def _match(self, cb: CallbackQuery) -> Any:
+        cbd = self.codec.unpack(cb.data)
+        if cbd is None or cbd.action not in self._handlers:
+            return False
+        return {"cbd": cbd}
+
+    async def _dispatch(self, cb: CallbackQuery, cbd: CallbackData, **data: Any) -> Any:
+        return await self._handlers[cbd.action].call(cb, cbd=cbd, **data)
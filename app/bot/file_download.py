@@ -0,0 +1,31 @@
+"""
+Потоковое скачивание файлов из Telegram.
+
+bot.download() без destination собирает файл в BytesIO целиком; здесь файл отдаётся
+кусками, а куда их писать, решает потребитель (SubmissionService.save_upload —
+во временный файл с хэшированием на лету). Пик памяти — один кусок на загрузку,
+независимо от размера файла и числа одновременных загрузок.
+"""
+
+from __future__ import annotations
+from typing import AsyncIterator
+
+import aiofiles
+from aiogram import Bot
+
+CHUNK_SIZE = 256 * 1024
+
+
+async def telegram_file_chunks(bot: Bot, file_path: str, chunk_size: int = CHUNK_SIZE,
+                               timeout: int = 120) -> AsyncIterator[bytes]:
+    """Куски файла по file_path из getFile (поддерживается и локальный Bot API сервер)."""
+    api = bot.session.api
+    if api.is_local:
+        async with aiofiles.open(str(api.wrap_local_file.to_local(file_path)), "rb") as f:
+            while chunk := await f.read(chunk_size):
+                yield chunk
+        return
+    url = api.file_url(bot.token, file_path)
+    async for chunk in bot.session.stream_content(url=url, timeout=timeout, chunk_size=chunk_size,
+                                                  raise_for_status=True):
+        yield chunk
@@ -0,0 +1,124 @@
+"""
+Кэш Telegram file_id для повторно рассылаемых документов (материалы недель, шаблоны).
+
+Один и тот же файл уходит сотням студентов: байты загружаются в Telegram один раз,
+дальше документ отправляется по file_id из первого ответа.
+
+- ключ — sha256 содержимого (переименование или копия файла не вызывают новой загрузки);
+  хэш файла запоминается по (путь, размер, mtime) и не пересчитывается на каждую отправку;
+- кэш хранится в data/file_ids.csv и переживает рестарт;
+- одновременные первые отправки одного файла ждут одну загрузку, а не грузят его каждая;
+- если Telegram отвергает сам file_id (TelegramBadRequest «wrong file identifier»,
+  «file reference …»), запись сбрасывается и файл загружается заново — для вызывающего
+  это прозрачно; прочие ошибки запроса (чат не найден, длинная подпись) пробрасываются
+  как есть, кэш не трогается;
+- отправка напрямую через bot или через Outbox (с его лимитами и приоритетами);
+- метрики: file_id_cache_hits_total, file_id_cache_uploads_total, file_id_cache_rejected_total.
+"""
+
+from __future__ import annotations
+import asyncio, hashlib, logging, os
+from typing import Any, Dict, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendDocument
+from aiogram.types import FSInputFile, Message
+
+from app.bot.outbox import Outbox, Priority
+from app.repositories.csv_repo import CsvTable
+from app.utils.metrics import METRICS
+from app.utils.time import now_iso
+
+log = logging.getLogger(__name__)
+
+FILE_ID_COLUMNS = ["sha256", "file_id", "file_unique_id", "file_name", "size_bytes", "uploaded_at"]
+HASH_CHUNK = 1024 * 1024
+FILE_ID_ERRORS = ("wrong file identifier", "file reference")  # Telegram не принимает сам file_id
+
+
+def _file_id_rejected(e: TelegramBadRequest) -> bool:
+    text = e.message.lower()
+    return any(marker in text for marker in FILE_ID_ERRORS)
+
+
+class FileIdCache:
+    def __init__(self, data_dir: str):
+        self.table = CsvTable(os.path.join(data_dir, "file_ids.csv"), FILE_ID_COLUMNS)
+        df = self.table.read()
+        self._ids: Dict[str, str] = {str(r.sha256): str(r.file_id) for r in df.itertuples()}
+        self._digests: Dict[str, Tuple[int, int, str]] = {}  # путь → (размер, mtime_ns, sha256)
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    # ── кэш ──────────────────────────────────────────────────────────────────
+    def get(self, sha256: str) -> Optional[str]:
+        return self._ids.get(sha256)
+
+    def put(self, sha256: str, file_id: str, file_unique_id: str = "", file_name: str = "",
+            size_bytes: int = 0) -> None:
+        self._ids[sha256] = file_id
+        self.table.upsert(["sha256"], {
+            "sha256": sha256, "file_id": file_id, "file_unique_id": file_unique_id,
+            "file_name": file_name, "size_bytes": size_bytes, "uploaded_at": now_iso(),
+        })
+
+    def invalidate(self, sha256: str) -> None:
+        if self._ids.pop(sha256, None) is None:
+            return
+        df = self.table.read()
+        self.table.write(df[df["sha256"].astype(str) != sha256])
+
+    def _digest(self, path: str) -> str:
+        st = os.stat(path)
+        cached = self._digests.get(path)
+        if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK):
+                h.update(chunk)
+        self._digests[path] = (st.st_size, st.st_mtime_ns, h.hexdigest())
+        return h.hexdigest()
+
+    # ── отправка ─────────────────────────────────────────────────────────────
+    async def send_document(self, bot: Bot, chat_id: int, path: str, file_name: Optional[str] = None,
+                            outbox: Optional[Outbox] = None, priority: Priority = Priority.INTERACTIVE,
+                            **kwargs: Any) -> Message:
+        """
+        Отправить локальный файл как документ: по file_id, если файл уже загружался,
+        иначе загрузкой (и запомнить file_id). kwargs — прочие поля SendDocument (caption, ...).
+        """
+        sha256 = await asyncio.to_thread(self._digest, path)
+        file_name = file_name or os.path.basename(path)
+
+        async def send(document: Any) -> Message:
+            method = SendDocument(chat_id=chat_id, document=document, **kwargs)
+            if outbox is not None:
+                return await outbox.submit(chat_id, method, priority)
+            return await bot(method)
+
+        file_id = self._ids.get(sha256)
+        if file_id is not None:
+            try:
+                message = await send(file_id)
+                METRICS.inc("file_id_cache_hits_total")
+                return message
+            except TelegramBadRequest as e:
+                if not _file_id_rejected(e):
+                    raise
+                METRICS.inc("file_id_cache_rejected_total")
+                log.warning("Telegram rejected cached file_id for %s, re-uploading: %s", file_name, e)
+                if self._ids.get(sha256) == file_id:
+                    await asyncio.to_thread(self.invalidate, sha256)
+
+        async with self._locks.setdefault(sha256, asyncio.Lock()):
+            file_id = self._ids.get(sha256)
+            if file_id is not None:  # файл загрузил параллельный вызов
+                return await send(file_id)
+            message = await send(FSInputFile(path, filename=file_name))
+            METRICS.inc("file_id_cache_uploads_total")
+            if message.document is not None:
+                await asyncio.to_thread(self.put, sha256, message.document.file_id,
+                                        message.document.file_unique_id, file_name,
+                                        message.document.file_size or 0)
+            return message
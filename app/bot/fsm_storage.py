@@ -0,0 +1,154 @@
+"""
+Персистентное FSM-хранилище на SQLite с горячим кэшем в памяти.
+
+- Состояния /register, /schedule, /submit, регистрации TA переживают рестарт и деплой.
+- Чтение горячих ключей — из dict в памяти; запись — write-through в SQLite
+  (WAL + synchronous=NORMAL: коммит без fsync, единицы–десятки микросекунд).
+- Несколько процессов могут работать с одним файлом: перед чтением сверяется
+  PRAGMA data_version, и если файл менял другой процесс, кэш сбрасывается.
+- Брошенные состояния истекают через ttl (считаются отсутствующими при чтении),
+  фоновая компакция удаляет их из файла и возвращает место (incremental_vacuum).
+"""
+
+from __future__ import annotations
+import asyncio, json, logging, os, sqlite3, time
+from typing import Any, Dict, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from app.utils.metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fsm (
+    key        TEXT PRIMARY KEY,
+    state      TEXT,
+    data       TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# (state, data, updated_at)
+_Entry = Tuple[Optional[str], Dict[str, Any], float]
+
+
+def _json_default(value: Any) -> Any:
+    # pandas/numpy-скаляры из to_dict(): np.int64, np.float64, Timestamp, ...
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class SqliteStorage(BaseStorage):
+    def __init__(self, path: str, ttl: float = 48 * 3600, compact_interval: float = 600.0,
+                 key_builder: Optional[KeyBuilder] = None):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.compact_interval = compact_interval
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")  # действует только для нового файла
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._cache: Dict[str, _Entry] = {}
+        self._data_version = self._read_data_version()
+        self._compactor: Optional[asyncio.Task] = None
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+    async def start(self) -> None:
+        """Запустить фоновую компакцию (dp.startup)."""
+        if self._compactor is None and self.compact_interval > 0:
+            self._compactor = asyncio.create_task(self._compact_loop(), name="fsm-compaction")
+
+    async def close(self) -> None:
+        if self._compactor is not None:
+            self._compactor.cancel()
+            await asyncio.gather(self._compactor, return_exceptions=True)
+            self._compactor = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ── BaseStorage ──────────────────────────────────────────────────────────
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        k = self.key_builder.build(key)
+        _, data, _ = self._load(k)
+        self._store(k, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return self._load(self.key_builder.build(key))[0]
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        k = self.key_builder.build(key)
+        state, _, _ = self._load(k)
+        self._store(k, state, data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return self._load(self.key_builder.build(key))[1].copy()
+
+    # ── internals ────────────────────────────────────────────────────────────
+    def _read_data_version(self) -> int:
+        return self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_foreign_writes(self) -> None:
+        version = self._read_data_version()
+        if version != self._data_version:
+            # файл менял другой процесс — кэш мог устареть
+            self._data_version = version
+            self._cache.clear()
+            METRICS.inc("fsm_cache_invalidations_total")
+
+    def _load(self, k: str) -> _Entry:
+        self._check_foreign_writes()
+        entry = self._cache.get(k)
+        if entry is None:
+            METRICS.inc("fsm_cache_misses_total")
+            row = self._db.execute("SELECT state, data, updated_at FROM fsm WHERE key = ?", (k,)).fetchone()
+            entry = (row[0], json.loads(row[1]), row[2]) if row else (None, {}, 0.0)
+            self._cache[k] = entry
+        if entry[2] and time.time() - entry[2] > self.ttl:
+            return None, {}, 0.0
+        return entry
+
+    def _store(self, k: str, state: Optional[str], data: Dict[str, Any]) -> None:
+        now = time.time()
+        if state is None and not data:
+            self._db.execute("DELETE FROM fsm WHERE key = ?", (k,))
+            self._cache[k] = (None, {}, 0.0)
+        else:
+            payload = json.dumps(data, ensure_ascii=False, default=_json_default)
+            self._db.execute(
+                "INSERT INTO fsm (key, state, data, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data, "
+                "updated_at = excluded.updated_at",
+                (k, state, payload, now),
+            )
+            self._cache[k] = (state, json.loads(payload), now)
+
+    # ── compaction ───────────────────────────────────────────────────────────
+    def compact(self) -> int:
+        """Удалить истёкшие состояния из файла и кэша; вернуть число удалённых строк."""
+        cutoff = time.time() - self.ttl
+        removed = self._db.execute("DELETE FROM fsm WHERE updated_at < ?", (cutoff,)).rowcount
+        for k in [k for k, (_, _, ts) in self._cache.items() if ts < cutoff]:
+            del self._cache[k]
+        self._db.execute("PRAGMA incremental_vacuum")
+        self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        METRICS.inc("fsm_compacted_total", removed)
+        METRICS.set("fsm_keys", self._db.execute("SELECT COUNT(*) FROM fsm").fetchone()[0])
+        if removed:
+            log.info("FSM compaction: removed %d expired states", removed)
+        return removed
+
+    async def _compact_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            try:
+                self.compact()
+            except sqlite3.Error:
+                log.exception("FSM compaction failed")
@@ -0,0 +1,83 @@
+"""
+Сборка альбомов (media group) в одну сдачу.
+
+Telegram присылает альбом отдельными сообщениями с общим media_group_id и без признака
+«последняя часть». Коллектор копит части группы и отдаёт их обработчику одним списком,
+когда window секунд не приходит новых частей (окно сдвигается с каждой частью).
+Хендлер не ждёт окна: add() сразу возвращается, обработка идёт в фоновой задаче,
+поэтому планировщик апдейтов не держит очередь пользователя.
+
+    albums.add(message, lambda parts: save_album(parts, ...))
+
+stop() (dp.shutdown) обрабатывает недособранные альбомы сразу и дожидается обработчиков.
+Метрики: media_group_albums_total, media_group_parts (гистограмма числа частей).
+"""
+
+from __future__ import annotations
+import asyncio, logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from aiogram.types import Message
+
+from app.utils.metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+AlbumHandler = Callable[[List[Message]], Awaitable[None]]
+
+
+@dataclass
+class _Album:
+    handler: AlbumHandler
+    parts: List[Message] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class MediaGroupCollector:
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self._albums: Dict[str, _Album] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def add(self, message: Message, handler: AlbumHandler) -> bool:
+        """Добавить часть альбома; True — это первая часть (handler запомнен для всей группы)."""
+        group_id = message.media_group_id or f"single:{message.chat.id}:{message.message_id}"
+        album = self._albums.get(group_id)
+        first = album is None
+        if first:
+            album = self._albums[group_id] = _Album(handler)
+        album.parts.append(message)
+        if album.timer is not None:
+            album.timer.cancel()
+        album.timer = asyncio.get_running_loop().call_later(self.window, self._flush, group_id)
+        return first
+
+    def pending(self) -> int:
+        return len(self._albums)
+
+    def _flush(self, group_id: str) -> None:
+        album = self._albums.pop(group_id, None)
+        if album is None:
+            return
+        if album.timer is not None:
+            album.timer.cancel()
+        parts = sorted(album.parts, key=lambda m: m.message_id)
+        METRICS.inc("media_group_albums_total")
+        METRICS.observe("media_group_parts", len(parts))
+        task = asyncio.get_running_loop().create_task(self._run(album.handler, parts), name=f"album-{group_id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _run(handler: AlbumHandler, parts: List[Message]) -> None:
+        try:
+            await handler(parts)
+        except Exception:
+            log.exception("Album handler failed (%d parts)", len(parts))
+
+    async def stop(self) -> None:
+        for group_id in list(self._albums):
+            self._flush(group_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,275 @@
+"""
+Очередь исходящих сообщений с учётом лимитов Telegram.
+
+Все «инициативные» отправки (напоминания студентам, уведомления TA, рассылки)
+идут через Outbox, а не напрямую через bot.send_message:
+
+- token bucket: глобально ~30 сообщений/с, в один чат ~1 сообщение/с;
+- полосы приоритета: INTERACTIVE (ответы на действия пользователя) обгоняет
+  NOTIFY (уведомления), а NOTIFY — BROADCAST (массовые рассылки);
+- порядок сообщений внутри одного чата сохраняется: у чата не больше одного
+  сообщения в полёте, следующее уходит только после ответа на предыдущее;
+- TelegramRetryAfter: чат откладывается на retry_after секунд, сообщение
+  отправляется повторно (не более max_retries раз);
+- метрики: outbox_sent_total, outbox_failed_total, outbox_retry_after_total,
+  outbox_queue_depth, outbox_delivery_seconds (от постановки в очередь до доставки).
+"""
+
+from __future__ import annotations
+import asyncio, heapq, itertools, logging, time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.methods import SendMessage, TelegramMethod
+
+from app.utils.metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    NOTIFY = 1
+    BROADCAST = 2
+
+
+class TokenBucket:
+    """Классический token bucket: rate токенов в секунду, не больше capacity в запасе."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Сколько ждать до появления токена (0 — можно сейчас)."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    chat_id: int = field(compare=False)
+    method: TelegramMethod = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued: float = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+class Outbox:
+    MAX_IDLE_BUCKETS = 10_000
+
+    def __init__(self, global_rate: float = 30.0, chat_rate: float = 1.0, chat_burst: float = 1.0,
+                 max_retries: int = 3, drain_timeout: float = 30.0):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.drain_timeout = drain_timeout
+
+        self.bot: Optional[Bot] = None
+        self._global = TokenBucket(global_rate, capacity=global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._chats: Dict[int, List[_Job]] = {}            # chat_id → heap заданий (приоритет, порядок)
+        self._ready: List[Tuple[int, int, int]] = []         # (приоритет, seq, chat_id) головы очередей чатов
+        self._parked: List[Tuple[float, int]] = []           # (когда можно, chat_id) — чат ждёт свой лимит
+        self._parked_until: Dict[int, float] = {}
+        self._busy: Set[int] = set()                         # чаты, у которых сообщение в полёте
+        self._seq = itertools.count()
+        self._pending = 0
+        self._wakeup = asyncio.Event()
+        self._inflight: Set[asyncio.Task] = set()
+        self._runner: Optional[asyncio.Task] = None
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+    async def start(self, bot: Bot) -> None:
+        """dp.startup: запомнить бота и запустить цикл отправки."""
+        self.bot = bot
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run(), name="outbox")
+
+    async def stop(self) -> None:
+        """dp.shutdown: дождаться отправки очереди (не дольше drain_timeout) и остановиться."""
+        deadline = time.monotonic() + self.drain_timeout
+        while (self._pending or self._inflight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self._pending:
+            log.warning("Outbox stopped with %d undelivered messages", self._pending)
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def send_message(self, chat_id: int, text: str, priority: Priority = Priority.NOTIFY,
+                     **kwargs: Any) -> asyncio.Future:
+        return self.submit(chat_id, SendMessage(chat_id=chat_id, text=text, **kwargs), priority)
+
+    def submit(self, chat_id: int, method: TelegramMethod, priority: Priority = Priority.NOTIFY) -> asyncio.Future:
+        """Поставить вызов Bot API в очередь; future завершится результатом вызова или ошибкой."""
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume_exception)
+        job = _Job(int(priority), next(self._seq), chat_id, method, future, time.monotonic())
+        jobs = self._chats.setdefault(chat_id, [])
+        heapq.heappush(jobs, job)
+        if jobs[0] is job and chat_id not in self._parked_until and chat_id not in self._busy:
+            self._push_ready(chat_id)
+        self._pending += 1
+        METRICS.set("outbox_queue_depth", self._pending)
+        self._wakeup.set()
+        return future
+
+    def depth(self) -> int:
+        return self._pending
+
+    # ── scheduling ───────────────────────────────────────────────────────────
+    # В _ready лежат головы очередей чатов; записи инвалидируются лениво:
+    # запись актуальна, только если совпадает с текущей головой, чат не отложен
+    # и у него нет сообщения в полёте (после ответа чат вернётся в _ready сам).
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _prune_buckets(self, now: float) -> None:
+        # полный bucket без очереди ничем не отличается от нового — его можно забыть
+        for chat_id in [c for c, b in self._chat_buckets.items()
+                        if c not in self._chats and c not in self._parked_until and c not in self._busy
+                        and b.delay(now) == 0 and b.tokens >= b.capacity]:
+            del self._chat_buckets[chat_id]
+
+    def _push_ready(self, chat_id: int) -> None:
+        head = self._chats[chat_id][0]
+        heapq.heappush(self._ready, (head.priority, head.seq, chat_id))
+
+    def _park(self, chat_id: int, until: float) -> None:
+        self._parked_until[chat_id] = until
+        heapq.heappush(self._parked, (until, chat_id))
+
+    def _unpark(self, now: float) -> None:
+        while self._parked and self._parked[0][0] <= now:
+            until, chat_id = heapq.heappop(self._parked)
+            if self._parked_until.get(chat_id) != until:
+                continue  # чат переотложен позже
+            del self._parked_until[chat_id]
+            if self._chats.get(chat_id) and chat_id not in self._busy:
+                self._push_ready(chat_id)
+
+    def _next_job(self, now: float) -> Optional[_Job]:
+        while self._ready:
+            priority, seq, chat_id = heapq.heappop(self._ready)
+            jobs = self._chats.get(chat_id)
+            if (not jobs or chat_id in self._parked_until or chat_id in self._busy
+                    or (jobs[0].priority, jobs[0].seq) != (priority, seq)):
+                continue
+            delay = self._chat_bucket(chat_id).delay(now)
+            if delay > 0:
+                self._park(chat_id, now + delay)
+                continue
+            job = heapq.heappop(jobs)
+            self._busy.add(chat_id)  # следующее сообщение чата — после ответа на это (_release)
+            if not jobs:
+                del self._chats[chat_id]
+                if len(self._chat_buckets) > self.MAX_IDLE_BUCKETS:
+                    self._prune_buckets(now)
+            return job
+        return None
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._unpark(now)
+            global_delay = self._global.delay(now)
+            if global_delay > 0:
+                await asyncio.sleep(global_delay)
+                continue
+            job = self._next_job(now)
+            if job is None:
+                self._wakeup.clear()
+                timeout = max(0.0, self._parked[0][0] - now) if self._parked else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._global.take(now)
+            self._chat_bucket(job.chat_id).take(now)
+            task = asyncio.create_task(self._deliver(job))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _deliver(self, job: _Job) -> None:
+        try:
+            result = await self.bot(job.method)
+        except TelegramRetryAfter as e:
+            METRICS.inc("outbox_retry_after_total")
+            job.attempts += 1
+            if job.attempts > self.max_retries:
+                self._finish(job, error=e)
+                return
+            log.warning("RetryAfter %ss for chat %s (attempt %d)", e.retry_after, job.chat_id, job.attempts)
+            self._requeue(job, delay=float(e.retry_after))
+        except (TelegramAPIError, asyncio.TimeoutError, OSError) as e:
+            self._finish(job, error=e)
+        except Exception as e:  # любая другая ошибка не должна оставить future и счётчик висеть
+            log.exception("Outbox delivery to %s crashed", job.chat_id)
+            self._finish(job, error=e)
+        else:
+            self._finish(job, result=result)
+
+    def _release(self, chat_id: int) -> None:
+        """Ответ на сообщение чата получен — следующее сообщение чата можно отправлять."""
+        self._busy.discard(chat_id)
+        if self._chats.get(chat_id) and chat_id not in self._parked_until:
+            self._push_ready(chat_id)
+            self._wakeup.set()
+
+    def _requeue(self, job: _Job, delay: float) -> None:
+        # возвращаем в голову очереди чата и откладываем весь чат, чтобы не нарушить порядок
+        jobs = self._chats.setdefault(job.chat_id, [])
+        heapq.heappush(jobs, job)
+        now = time.monotonic()
+        bucket = self._chat_bucket(job.chat_id)
+        bucket.tokens, bucket.updated = 1.0 - delay * bucket.rate, now  # ровно один токен к концу паузы
+        self._park(job.chat_id, now + delay)
+        self._busy.discard(job.chat_id)  # чат вернётся в _ready из _unpark
+        self._wakeup.set()
+
+    def _finish(self, job: _Job, result: Any = None, error: Optional[BaseException] = None) -> None:
+        self._pending -= 1
+        self._release(job.chat_id)
+        METRICS.set("outbox_queue_depth", self._pending)
+        if error is None:
+            METRICS.inc("outbox_sent_total", priority=Priority(job.priority).name.lower())
+            METRICS.observe("outbox_delivery_seconds", time.monotonic() - job.enqueued)
+            if not job.future.done():
+                job.future.set_result(result)
+        else:
+            METRICS.inc("outbox_failed_total", error=type(error).__name__)
+            log.warning("Outbox delivery to %s failed: %s", job.chat_id, error)
+            if not job.future.done():
+                job.future.set_exception(error)
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # ошибка уже залогирована; отправитель может не ждать future
+    if not future.cancelled():
+        future.exception()
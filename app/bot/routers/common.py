@@ -55,7 +55,8 @@ def _help_for_role(role: str) -> List[str]:
             "/register_ta — заявка TA", 
             "/schedule — создать расписание",
             "/myslots — мои слоты", 
-            "/myslots_manage — управление слотами"
+            "/myslots_manage — управление слотами",
+            "/grades_import — оценки файлом CSV/XLSX"
         ]
     if role == "owner":
         base += [
@@ -64,7 +65,10 @@ def _help_for_role(role: str) -> List[str]:
             "/impersonate <tg_id|student_code=...>", 
             "/impersonate_off",
             "/dev_user_role <tg_id> <role>", 
-            "/dev_user_del <tg_id>"
+            "/dev_user_del <tg_id>",
+            "/metrics — метрики процесса",
+            "/storage_gc [last] — мусор в хранилище",
+            "/grade_override <student_code> <task_id> <баллы> [комментарий]"
         ]
     return base
 
@@ -4,6 +4,10 @@ from .roles import router as roles_router
 from .ta_requests import router as ta_requests_router
 from .assignments_admin import router as assignments_admin_router
 from .weeks_admin import router as weeks_admin_router  # Новый роутер
+from .metrics import router as metrics_router
+from .broadcast import router as broadcast_router
+from .storage_gc import router as storage_gc_router
+from .grades_admin import router as grades_admin_router
 try:
     from .dev_impersonate import router as dev_impersonate_router
 except Exception:
@@ -14,5 +18,9 @@ router.include_router(roles_router)
 router.include_router(ta_requests_router)
 router.include_router(assignments_admin_router)
 router.include_router(weeks_admin_router)  # Подключаем управление неделями
+router.include_router(metrics_router)
+router.include_router(broadcast_router)
+router.include_router(storage_gc_router)
+router.include_router(grades_admin_router)
 if dev_impersonate_router:
     router.include_router(dev_impersonate_router)
\ No newline at end of file
@@ -0,0 +1,53 @@
+from __future__ import annotations
+from aiogram import Router, F
+from aiogram.types import Message
+from app.services.broadcast_service import BroadcastService
+
+router = Router(name="owner_broadcast")
+
+ROLE_ARGS = {"all": ("student", "ta"), "student": ("student",), "ta": ("ta",)}
+
+@router.message(F.text.startswith("/broadcast_week"))
+async def broadcast_week(message: Message, broadcasts: BroadcastService, owner_id: int):
+    """
+    Разослать материалы недели
+    /broadcast_week <номер_недели> [all|student|ta]
+    """
+    if message.from_user.id != owner_id:
+        await message.answer("Только для владельца курса.")
+        return
+
+    parts = message.text.split()
+    if len(parts) < 2 or not parts[1].isdigit() or (len(parts) > 2 and parts[2] not in ROLE_ARGS):
+        await message.answer("Формат: /broadcast_week <номер_недели> [all|student|ta]")
+        return
+
+    try:
+        row = broadcasts.create(int(parts[1]), ROLE_ARGS[parts[2] if len(parts) > 2 else "all"],
+                                created_by=str(message.from_user.id))
+    except ValueError as e:
+        await message.answer(f"❌ {e}")
+        return
+    await message.answer(f"📣 Рассылка {row['broadcast_id']} запущена: {row['total']} получателей.\n"
+                         f"Статус: /broadcast_status {row['broadcast_id']}")
+
+@router.message(F.text.startswith("/broadcast_status"))
+async def broadcast_status(message: Message, broadcasts: BroadcastService, owner_id: int):
+    """Отчёт о доставке рассылки: /broadcast_status <broadcast_id>"""
+    if message.from_user.id != owner_id:
+        await message.answer("Только для владельца курса.")
+        return
+
+    parts = message.text.split()
+    info = broadcasts.get(parts[1]) if len(parts) > 1 else None
+    if not info:
+        await message.answer("Формат: /broadcast_status <broadcast_id>")
+        return
+
+    counts = broadcasts.summary(parts[1])
+    lines = [f"📣 Рассылка {parts[1]} (неделя {info['week']}): {info['status']}",
+             f"✅ доставлено: {counts['sent']}, ⏳ в очереди: {counts['pending']}, ❌ ошибок: {counts['failed']}"]
+    report = broadcasts.report(parts[1])
+    for row in report[report["status"] == "failed"].head(10).itertuples():
+        lines.append(f"• {row.tg_id}: {row.error}")
+    await message.answer("\n".join(lines), parse_mode=None)
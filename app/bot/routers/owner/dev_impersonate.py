@@ -102,16 +102,10 @@ async def dev_user_del(message: Message, users: UsersService, owner_id: int):
         await message.answer("tg_id должен быть числом.")
         return
 
-    # Прямой доступ к CSV через pandas (CsvTable не раскрывает delete явным методом).
-    table = users.table
-    df = table.read()
-    if not df.empty:
-        df = df[df["tg_id"].astype(str) != str(tg_id)]
-        with table.lock:
-            df.to_csv(table.path, index=False)
+    if users.delete(tg_id):
         await message.answer(f"🗑️ Удалена запись с tg_id={tg_id} из users.csv")
     else:
-        await message.answer("В users.csv пока пусто — удалять нечего.")
+        await message.answer("В users.csv такой записи нет — удалять нечего.")
 
 @router.message(F.text.startswith("/set_student_id"))
 async def set_student_id(message: Message, users: UsersService, owner_id: int):
@@ -0,0 +1,29 @@
+from __future__ import annotations
+from aiogram import Router, F
+from aiogram.types import Message
+from app.services.grade_service import GradeService
+
+router = Router(name="owner_grades_admin")
+
+@router.message(F.text.startswith("/grade_override"))
+async def grade_override(message: Message, grades: GradeService, owner_id: int):
+    """
+    Исправить оценку от имени владельца
+    /grade_override <student_code> <task_id> <баллы> [комментарий]
+    """
+    if message.from_user.id != owner_id:
+        await message.answer("Только для владельца курса.")
+        return
+
+    parts = message.text.split(maxsplit=4)
+    try:
+        student_code, task_id, points = parts[1], parts[2], float(parts[3].replace(",", "."))
+    except (IndexError, ValueError):
+        await message.answer("Формат: /grade_override <student_code> <task_id> <баллы> [комментарий]")
+        return
+
+    previous = grades.latest(student_code, task_id)
+    grades.override_grade(task_id, student_code, points, parts[4] if len(parts) > 4 else "", message.from_user.id)
+    was = f"{previous['points']:g}" if previous else "—"
+    await message.answer(f"✅ {student_code} / {task_id}: {was} → {points:g} б. "
+                         f"Итого у студента: {grades.total(student_code):g} б.", parse_mode=None)
@@ -0,0 +1,16 @@
+from aiogram import Router, F
+from aiogram.types import Message
+from app.utils.metrics import METRICS
+
+router = Router(name="owner_metrics")
+
+@router.message(F.text == "/metrics")
+async def metrics_cmd(message: Message, owner_id: int):
+    if message.from_user.id != owner_id:
+        await message.answer("Только для владельца курса.")
+        return
+    text = METRICS.render_text().strip() or "Метрик пока нет."
+    # Telegram ограничивает сообщение 4096 символами
+    if len(text) > 4000:
+        text = text[:4000] + "\n…"
+    await message.answer(text, parse_mode=None)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+import asyncio
+from typing import Optional
+from aiogram import Router, F
+from aiogram.types import Message
+from app.services.storage_gc_service import GcReport, StorageGC
+
+router = Router(name="owner_storage_gc")
+
+def _mb(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} МБ"
+
+def format_report(report: GcReport) -> str:
+    return "\n".join([
+        f"🧹 GC хранилища {report.started_at} → {report.finished_at}",
+        f"Просмотрено файлов: {report.scanned}",
+        f"В карантин: {report.quarantined} ({_mb(report.quarantined_bytes)})",
+        f"Возвращено из карантина: {report.restored}",
+        f"Удалено окончательно: {report.purged} ({_mb(report.purged_bytes)})",
+        f"Можно освободить (в карантине): {report.reclaimable} ({_mb(report.reclaimable_bytes)})",
+    ])
+
+async def _run_and_report(message: Message, storage_gc: StorageGC) -> None:
+    try:
+        report = await storage_gc.run()
+    except Exception as e:
+        await message.answer(f"❌ GC хранилища упал: {e}", parse_mode=None)
+        return
+    await message.answer(format_report(report), parse_mode=None)
+
+@router.message(F.text.startswith("/storage_gc"))
+async def storage_gc_cmd(message: Message, storage_gc: Optional[StorageGC], owner_id: int):
+    """
+    Сборка мусора в хранилище
+    /storage_gc — запустить проход (отчёт придёт по окончании)
+    /storage_gc last — отчёт последнего прохода
+    """
+    if message.from_user.id != owner_id:
+        await message.answer("Только для владельца курса.")
+        return
+    if storage_gc is None:
+        await message.answer("GC доступен только для локального хранилища (STORAGE_KIND=cas|local).")
+        return
+
+    parts = message.text.split()
+    if len(parts) > 1 and parts[1] == "last":
+        report = storage_gc.last_report
+        await message.answer(format_report(report) if report else "Проходов ещё не было.", parse_mode=None)
+        return
+    # проход идёт с паузами и может быть долгим — очередь апдейтов владельца не держим
+    storage_gc.track(asyncio.create_task(_run_and_report(message, storage_gc)))
+    await message.answer("🧹 GC запущен, отчёт пришлю по окончании.")
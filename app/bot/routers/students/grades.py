@@ -1,21 +1,28 @@
+from typing import List
 from aiogram import Router, F
 from aiogram.types import Message
-from app.services.users_service import UsersService
+from app.services.users_service import UsersService, student_code_of
 from app.services.grade_service import GradeService
 
 router = Router(name="students_grades")
 
+def format_grade(g: dict) -> str:
+    comment = g.get("comment")
+    comment = f" ({comment})" if isinstance(comment, str) and comment else ""
+    return f"- task {g['task_id']}: {g['points']:g} б.{comment}"
+
+def format_grades(grades: List[dict]) -> List[str]:
+    return [format_grade(g) for g in grades]
+
 @router.message(F.text == "/grades")
 async def my_grades(message: Message, users: UsersService, grades: GradeService):
-    user = users.get_by_tg(message.from_user.id)
-    if not user or not user.get("student_code"):
+    student_code = student_code_of(users.get_by_tg(message.from_user.id))
+    if not student_code:
         await message.answer("Сначала /register и подтвердите email")
         return
-    df = grades.list_grades_for_student(user["student_code"])
-    if df.empty:
+    current = grades.current_grades(student_code)
+    if not current:
         await message.answer("Оценок пока нет.")
         return
-    out = ["Мои оценки:"]
-    for _, r in df.iterrows():
-        out.append(f"- task {r['task_id']}: {r['points']} б. ({r['comment']})")
-    await message.answer("\n".join(out))
\ No newline at end of file
+    out = ["Мои оценки:", *format_grades(current), f"Итого: {grades.total(student_code):g} б."]
+    await message.answer("\n".join(out))
@@ -92,12 +92,5 @@ async def book_cmd(message: Message, slots: SlotService, bookings: BookingServic
         await message.answer("В слоте больше нет свободных мест.")
         return
 
-    # Добавляем запись (упрощенно)
-    booking_row = {
-        "slot_id": slot_id,
-        "student_tg_id": message.from_user.id,
-        "status": "active",
-        "created_at": "2025-08-21T00:00:00Z"  # заглушка
-    }
-    bookings.table.append_row(booking_row)
+    bookings.create(slot_id, message.from_user.id)
     await message.answer(f"✅ Вы записались на слот {slot_id}!")
\ No newline at end of file
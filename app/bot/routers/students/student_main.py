@@ -13,16 +13,20 @@
 """
 
 from __future__ import annotations
-import logging
+import html, logging, os
 from datetime import datetime, timezone
-from aiogram import Router, F
+from aiogram import Bot, Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.fsm.context import FSMContext
 
+from app.bot.callbacks import CallbackCodec, CallbackData, CallbackDispatcher
+from app.bot.file_id_cache import FileIdCache
+from app.bot.routers.students.grades import format_grades
+
 # Services
-from app.services.users_service import UsersService
+from app.services.users_service import UsersService, student_code_of
 from app.services.weeks_service import WeeksService
 from app.services.assignments_service import AssignmentsService
 from app.services.slot_service import SlotService
@@ -47,35 +51,29 @@ class StudentFSM(StatesGroup):
     booking_resign_pick_slot = State()
 
 # ================================================================================================
-# CALLBACK DATA HELPERS - единый формат r=s;a=action;...
+# CALLBACK DATA - компактный формат s|<код>|..., старый r=s;a=action;... декодируется
 # ================================================================================================
 
+STUDENT_CB = CallbackCodec("s")
+STUDENT_CB.action("wic_main", "m")
+STUDENT_CB.action("wic_show_all", "a")
+STUDENT_CB.action("week_menu", "w", w=int)
+STUDENT_CB.action("week_info", "i", w=int)
+STUDENT_CB.action("week_tasks_download", "d", w=int)
+STUDENT_CB.action("week_solution_upload_wait", "u", w=int)
+STUDENT_CB.action("week_grade_view", "g", w=int)
+STUDENT_CB.action("week_signup_pick_teacher", "p", w=int, ta=str)
+STUDENT_CB.action("week_unsign_list", "x", w=int)
+STUDENT_CB.action("my_bookings_list", "b")
+STUDENT_CB.action("my_grades_list", "G")
+STUDENT_CB.action("history_weeks_list", "h")
+STUDENT_CB.action("back_to_main", "0")
+
+callbacks = CallbackDispatcher(router, STUDENT_CB)
+
 def build_callback(action: str, **kwargs) -> str:
-    """Построить callback_data в едином формате r=s;a=action;w=week;..."""
-    parts = [f"r=s", f"a={action}"]
-    
-    for key, value in kwargs.items():
-        if value is not None:
-            parts.append(f"{key}={value}")
-    
-    result = ";".join(parts)
-    # Telegram ограничение 64 байта
-    if len(result) > 63:
-        log.warning(f"Callback data too long ({len(result)}): {result}")
-    return result
-
-def parse_callback(callback_data: str) -> dict:
-    """Парсинг callback_data"""
-    result = {}
-    try:
-        parts = callback_data.split(";")
-        for part in parts:
-            if "=" in part:
-                key, value = part.split("=", 1)
-                result[key] = value
-    except Exception as e:
-        log.error(f"Error parsing callback: {callback_data}, error: {e}")
-    return result
+    """Построить callback_data студенческого меню (см. STUDENT_CB)"""
+    return STUDENT_CB.pack(action, **kwargs)
 
 # ================================================================================================
 # АГРЕГИРОВАННЫЕ СТАТУСЫ НЕДЕЛЬ (по приоритету)
@@ -103,24 +101,14 @@ def get_week_aggregated_status(
     now = datetime.now(timezone.utc)
     
     # Проверяем оценку (приоритет 1)
-    try:
-        # Пытаемся найти оценку через grades service
-        grade_df = grades.table.read()
-        if not grade_df.empty:
-            student_grades = grade_df[
-                (grade_df["student_code"].astype(str) == str(student_code)) &
-                (grade_df["task_id"].asstr().str.contains(f"W{week_number:02d}", na=False))
-            ]
-            if not student_grades.empty:
-                grade_value = student_grades.iloc[-1]["points"]
-                return {
-                    "status": "graded",
-                    "emoji": "🟣",
-                    "text": f"Оценено ({grade_value})",
-                    "priority": 1
-                }
-    except Exception as e:
-        log.debug(f"Error checking grades for week {week_number}: {e}")
+    grade_value = grades.week_score(str(student_code), week_number)
+    if grade_value is not None:
+        return {
+            "status": "graded",
+            "emoji": "🟣",
+            "text": f"Оценено ({grade_value:g})",
+            "priority": 1
+        }
     
     # Проверяем загрузки (приоритет 2)
     try:
@@ -233,7 +221,7 @@ async def student_main_menu(
 # WIC - РАБОТА С НЕДЕЛЯМИ (интеграция с существующей системой)
 # ================================================================================================
 
-@router.callback_query(F.data == build_callback("wic_main"))
+@callbacks.on("wic_main")
 async def wic_main_handler(
     cb: CallbackQuery,
     actor_tg_id: int,
@@ -298,7 +286,7 @@ async def wic_main_handler(
     
     await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
 
-@router.callback_query(F.data == build_callback("wic_show_all"))
+@callbacks.on("wic_show_all")
 async def wic_show_all_weeks(
     cb: CallbackQuery,
     weeks: WeeksService,
@@ -346,9 +334,10 @@ async def wic_show_all_weeks(
 # МЕНЮ НЕДЕЛИ (интеграция с существующей week_master логикой)
 # ================================================================================================
 
-@router.callback_query(F.data.regexp(r"r=s;a=week_menu;w=\d+"))
+@callbacks.on("week_menu")
 async def week_menu_handler(
     cb: CallbackQuery,
+    cbd: CallbackData,
     actor_tg_id: int,
     weeks: WeeksService,
     assignments: AssignmentsService,
@@ -358,7 +347,7 @@ async def week_menu_handler(
     await cb.answer()
     
     # Парсим callback
-    data = parse_callback(cb.data)
+    data = cbd.params
     try:
         week_number = int(data.get("w", 0))
     except ValueError:
@@ -448,9 +437,10 @@ async def week_menu_handler(
 # ДЕЙСТВИЯ ДЛЯ НЕДЕЛИ
 # ================================================================================================
 
-@router.callback_query(F.data.regexp(r"r=s;a=week_info;w=\d+"))
+@callbacks.on("week_info")
 async def week_info_handler(
     cb: CallbackQuery,
+    cbd: CallbackData,
     weeks: WeeksService,
     assignments: AssignmentsService,
     users: UsersService,
@@ -459,7 +449,7 @@ async def week_info_handler(
     """Показать описание и дедлайн недели с информацией о TA"""
     await cb.answer()
     
-    data = parse_callback(cb.data)
+    data = cbd.params
     try:
         week_number = int(data.get("w", 0))
     except ValueError:
@@ -498,33 +488,42 @@ async def week_info_handler(
     
     await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
 
-@router.callback_query(F.data.regexp(r"r=s;a=week_tasks_download;w=\d+"))
-async def week_tasks_download_handler(cb: CallbackQuery):
-    """Получить задачи и вопросы - заглушка"""
+@callbacks.on("week_tasks_download")
+async def week_tasks_download_handler(cb: CallbackQuery, cbd: CallbackData, bot: Bot,
+                                      file_cache: FileIdCache, materials_dir: str):
+    """Получить задачи и вопросы: файлы из data/materials/Wnn, через кэш file_id"""
     await cb.answer()
     
-    data = parse_callback(cb.data)
+    data = cbd.params
     week_number = data.get("w", "?")
-    
-    text = f"📝 <b>Задачи и вопросы для W{week_number}</b>\n\n" \
-           f"🚧 Функция в разработке\n\n" \
-           f"Пока вы можете найти задания на сайте курса:\n" \
-           f"📖 <a href='https://example.com/course'>Программа курса</a>"
+    week_dir = os.path.join(materials_dir, f"W{int(week_number):02d}") if str(week_number).isdigit() else ""
+    files = sorted(e.path for e in os.scandir(week_dir) if e.is_file()) if os.path.isdir(week_dir) else []
     
     kb = InlineKeyboardBuilder()
     kb.button(text="⬅️ Назад", callback_data=build_callback("week_menu", w=week_number))
     
-    await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
+    if not files:
+        text = f"📝 <b>Задачи и вопросы для W{week_number}</b>\n\n" \
+               f"🚧 Материалы ещё не загружены\n\n" \
+               f"Пока вы можете найти задания на сайте курса:\n" \
+               f"📖 <a href='https://example.com/course'>Программа курса</a>"
+        await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
+        return
+    
+    for path in files:
+        await file_cache.send_document(bot, cb.from_user.id, path)
+    await cb.message.answer(f"📝 Материалы W{week_number} отправлены выше.", reply_markup=kb.as_markup())
 
-@router.callback_query(F.data.regexp(r"r=s;a=week_solution_upload_wait;w=\d+"))
+@callbacks.on("week_solution_upload_wait")
 async def week_solution_upload_start(
-    cb: CallbackQuery, 
+    cb: CallbackQuery,
+    cbd: CallbackData,
     state: FSMContext
 ):
     """Начать загрузку решения - интеграция с существующим /submit"""
     await cb.answer()
     
-    data = parse_callback(cb.data)
+    data = cbd.params
     week_number = data.get("w", "?")
     
     # TODO: интеграция с существующей логикой /submit
@@ -537,18 +536,23 @@ async def week_solution_upload_start(
     
     await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
 
-@router.callback_query(F.data.regexp(r"r=s;a=week_grade_view;w=\d+"))
-async def week_grade_view_handler(cb: CallbackQuery):
-    """Показать оценку за неделю - интеграция с /grades"""
+@callbacks.on("week_grade_view")
+async def week_grade_view_handler(cb: CallbackQuery, cbd: CallbackData, actor_tg_id: int,
+                                  users: UsersService, grades: GradeService):
+    """Показать оценку за неделю: текущие оценки по заданиям недели из индекса GradeService"""
     await cb.answer()
     
-    data = parse_callback(cb.data)
+    data = cbd.params
     week_number = data.get("w", "?")
+    student_code = student_code_of(users.get_by_tg(actor_tg_id))
     
-    # TODO: интеграция с существующей логикой grades
-    text = f"🎯 <b>Оценка за W{week_number}</b>\n\n" \
-           f"🚧 Функция в разработке\n\n" \
-           f"Пока используйте команду /grades для просмотра всех оценок."
+    week_grades = grades.week_grades(str(student_code), int(week_number)) if student_code and str(week_number).isdigit() else []
+    if week_grades:
+        text = f"🎯 <b>Оценка за W{week_number}</b>\n\n" + "\n".join(html.escape(line) for line in format_grades(week_grades)) + \
+               f"\n\n<b>За неделю:</b> {grades.week_score(str(student_code), int(week_number)):g} б."
+    else:
+        text = f"🎯 <b>Оценка за W{week_number}</b>\n\n" \
+               f"Оценок за эту неделю пока нет."
     
     kb = InlineKeyboardBuilder()
     kb.button(text="⬅️ Назад", callback_data=build_callback("week_menu", w=week_number))
@@ -559,12 +563,12 @@ async def week_grade_view_handler(cb: CallbackQuery):
 # ЗАПИСЬ НА СДАЧУ (интеграция с booking system)
 # ================================================================================================
 
-@router.callback_query(F.data.regexp(r"r=s;a=week_signup_pick_teacher;w=\d+;ta=.+"))
-async def week_signup_pick_teacher_handler(cb: CallbackQuery):
+@callbacks.on("week_signup_pick_teacher")
+async def week_signup_pick_teacher_handler(cb: CallbackQuery, cbd: CallbackData):
     """Записаться на сдачу - перенаправление к слотам TA"""
     await cb.answer()
     
-    data = parse_callback(cb.data)
+    data = cbd.params
     week_number = data.get("w", "?")
     ta_code = data.get("ta", "?")
     
@@ -579,12 +583,12 @@ async def week_signup_pick_teacher_handler(cb: CallbackQuery):
     
     await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
 
-@router.callback_query(F.data.regexp(r"r=s;a=week_unsign_list;w=\d+"))
-async def week_unsign_list_handler(cb: CallbackQuery):
+@callbacks.on("week_unsign_list")
+async def week_unsign_list_handler(cb: CallbackQuery, cbd: CallbackData):
     """Отменить запись на сдачу - показать список активных записей"""
     await cb.answer()
     
-    data = parse_callback(cb.data)
+    data = cbd.params
     week_number = data.get("w", "?")
     
     # TODO: найти активные записи студента на эту неделю
@@ -601,7 +605,7 @@ async def week_unsign_list_handler(cb: CallbackQuery):
 # МОИ ЗАПИСИ НА СДАЧУ (замена проблемного /slots)
 # ================================================================================================
 
-@router.callback_query(F.data == build_callback("my_bookings_list"))
+@callbacks.on("my_bookings_list")
 async def my_bookings_list_handler(cb: CallbackQuery):
     """Мои записи на сдачу - список будущих/текущих записей"""
     await cb.answer()
@@ -623,15 +627,19 @@ async def my_bookings_list_handler(cb: CallbackQuery):
 # МОИ ОЦЕНКИ (интеграция с существующим /grades)
 # ================================================================================================
 
-@router.callback_query(F.data == build_callback("my_grades_list"))
-async def my_grades_list_handler(cb: CallbackQuery):
-    """Мои оценки - интеграция с существующим /grades"""
+@callbacks.on("my_grades_list")
+async def my_grades_list_handler(cb: CallbackQuery, actor_tg_id: int, users: UsersService, grades: GradeService):
+    """Мои оценки: текущие оценки по заданиям и итог из индекса GradeService"""
     await cb.answer()
     
-    # TODO: интеграция с существующей логикой /grades
-    text = f"📊 <b>Мои оценки</b>\n\n" \
-           f"🚧 Функция в разработке\n\n" \
-           f"Пока используйте команду /grades для просмотра оценок."
+    student_code = student_code_of(users.get_by_tg(actor_tg_id))
+    current = grades.current_grades(str(student_code)) if student_code else []
+    if current:
+        text = f"📊 <b>Мои оценки</b>\n\n" + "\n".join(html.escape(line) for line in format_grades(current)) + \
+               f"\n\n<b>Итого:</b> {grades.total(str(student_code)):g} б."
+    else:
+        text = f"📊 <b>Мои оценки</b>\n\n" \
+               f"Оценок пока нет."
     
     kb = InlineKeyboardBuilder()
     kb.button(
@@ -645,7 +653,7 @@ async def my_grades_list_handler(cb: CallbackQuery):
 # ИСТОРИЯ СДАЧ (заглушка)
 # ================================================================================================
 
-@router.callback_query(F.data == build_callback("history_weeks_list"))
+@callbacks.on("history_weeks_list")
 async def history_weeks_list_handler(cb: CallbackQuery):
     """История сдач - заглушка"""
     await cb.answer()
@@ -666,7 +674,7 @@ async def history_weeks_list_handler(cb: CallbackQuery):
 # ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ И НАВИГАЦИЯ
 # ================================================================================================
 
-@router.callback_query(F.data == build_callback("back_to_main"))
+@callbacks.on("back_to_main")
 async def back_to_main_handler(
     cb: CallbackQuery,
     actor_tg_id: int, 
@@ -1,11 +1,14 @@
 from __future__ import annotations
+from typing import AsyncIterator, List, Optional, Tuple
 from aiogram import Router, F, Bot
-from aiogram.types import Message, Document
+from aiogram.types import Message
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.fsm.context import FSMContext
 
-from app.services.users_service import UsersService
-from app.services.submission_service import SubmissionService
+from app.services.users_service import UsersService, student_code_of
+from app.services.submission_service import QuotaExceeded, SubmissionService, UploadTooLarge
+from app.bot.file_download import telegram_file_chunks
+from app.bot.media_group import MediaGroupCollector
 
 router = Router(name="students_submissions")
 
@@ -21,29 +24,66 @@ async def submit_cmd(message: Message, state: FSMContext):
         return
     await state.set_state(SubmitFSM.waiting_file)
     await state.update_data(task_id=parts[1].strip())
-    await message.answer("Ок! Теперь пришлите файл (документом, не фото).")
+    await message.answer("Ок! Теперь пришлите файл документом или альбом фото.")
 
-@router.message(SubmitFSM.waiting_file, F.document)
-async def handle_document(message: Message, state: FSMContext,
-                          users: UsersService, submissions: SubmissionService, bot: Bot):
+def _file_of(message: Message) -> Tuple[str, str, Optional[int]]:
+    """(file_id, имя, размер) документа или самой крупной версии фото."""
+    if message.document:
+        doc = message.document
+        return doc.file_id, doc.file_name or f"{doc.file_unique_id}.bin", doc.file_size
+    photo = message.photo[-1]
+    return photo.file_id, f"photo_{message.message_id}_{photo.file_unique_id}.jpg", photo.file_size
+
+async def _chunks(bot: Bot, file_id: str) -> AsyncIterator[bytes]:
+    # getFile — внутри генератора: вызывается, только когда дошла очередь скачивать этот файл
+    file = await bot.get_file(file_id)
+    async for chunk in telegram_file_chunks(bot, file.file_path):
+        yield chunk
+
+async def _save(parts: List[Message], state: FSMContext, users: UsersService,
+                submissions: SubmissionService, bot: Bot) -> None:
+    """Одно сообщение или альбом — одна сдача, одна запись в таблицу, один ответ."""
+    reply_to = parts[0]
     data = await state.get_data()
     task_id = data.get("task_id")
-    doc: Document = message.document
-    file = await bot.get_file(doc.file_id)
-    file_bytes = await bot.download(file.file_path)
-    file_bytes = file_bytes.read()
-    user = users.get_by_tg(message.from_user.id)
-    student_code = (user or {}).get("student_code", None)
-    saved = await submissions.save_submission(
-        tg_id=message.from_user.id,
-        student_code=student_code or "",
-        task_id=task_id,
-        file_name=doc.file_name or "submission.bin",
-        file_bytes=file_bytes,
-    )
-    await message.answer(f"Принято! submission_id={saved['submission_id']} путь={saved['file_path']}")
+    files = [_file_of(m) for m in parts]
+    max_mb = submissions.max_upload_bytes // (1024 * 1024)
+    if any(size and size > submissions.max_upload_bytes for _, _, size in files):
+        await reply_to.answer(f"Файл слишком большой: максимум {max_mb} МБ.")
+        return
+    student_code = student_code_of(users.get_by_tg(reply_to.from_user.id)) or ""
+    try:
+        # квота проверяется до скачивания: файлы, которые не примем, не тянем из Telegram
+        submissions.check_quota_many(reply_to.from_user.id, student_code, task_id,
+                                     [(name, size) for _, name, size in files])
+        saved = await submissions.save_uploads(
+            tg_id=reply_to.from_user.id,
+            student_code=student_code,
+            task_id=task_id,
+            files=[(name, _chunks(bot, file_id)) for file_id, name, _ in files],
+        )
+    except UploadTooLarge:
+        await reply_to.answer(f"Файл слишком большой: максимум {max_mb} МБ.")
+        return
+    except QuotaExceeded as e:
+        await reply_to.answer(f"Лимит недели: {e}.")
+        return
+    if len(saved) == 1:
+        await reply_to.answer(f"Принято! submission_id={saved[0]['submission_id']} путь={saved[0]['file_path']}")
+    else:
+        await reply_to.answer(f"Принято {len(saved)} файлов одной сдачей (group_id={saved[0]['group_id']}).")
     await state.clear()
 
+@router.message(SubmitFSM.waiting_file, F.media_group_id, F.document | F.photo)
+async def handle_album_part(message: Message, state: FSMContext, albums: MediaGroupCollector,
+                            users: UsersService, submissions: SubmissionService, bot: Bot):
+    albums.add(message, lambda parts: _save(parts, state, users, submissions, bot))
+
+@router.message(SubmitFSM.waiting_file, F.document | F.photo)
+async def handle_document(message: Message, state: FSMContext,
+                          users: UsersService, submissions: SubmissionService, bot: Bot):
+    await _save([message], state, users, submissions, bot)
+
 @router.message(SubmitFSM.waiting_file)
 async def submit_waiting_file_hint(message: Message):
-    await message.answer("Жду файл в ответ на команду /submit [task_id].")
\ No newline at end of file
+    await message.answer("Жду файл в ответ на команду /submit [task_id].")
@@ -314,17 +314,7 @@ async def book_slot(
 
     # Создаем бронирование
     try:
-        from datetime import datetime, timezone
-        booking_row = {
-            "slot_id": slot_id,
-            "student_tg_id": actor_tg_id,
-            "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "comment": ""
-        }
-        
-        # Добавляем бронирование через CSV таблицу
-        bookings.table.append_row(booking_row)
+        bookings.create(slot_id, actor_tg_id)
         
         # Формируем красивый ответ
         date_str = slot_dict.get('date', '')
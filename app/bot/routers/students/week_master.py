@@ -1,13 +1,15 @@
 from __future__ import annotations
+import html
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from app.services.weeks_service import WeeksService
 from app.services.assignments_service import AssignmentsService
-from app.services.users_service import UsersService
+from app.services.users_service import UsersService, student_code_of
 from app.services.slot_service import SlotService
 from app.services.booking_service import BookingService
 from app.services.grade_service import GradeService
+from app.bot.routers.students.grades import format_grades
 
 router = Router(name="students_week_master")
 
@@ -327,25 +329,23 @@ async def week_show_grade(cb: CallbackQuery, actor_tg_id: int, weeks: WeeksServi
         return
     
     # ИСПРАВЛЕНО: используем actor_tg_id вместо cb.from_user.id
-    user = users.get_by_tg(actor_tg_id)
-    # В зависимости от того, как регистрируется пользователь, student_code может быть в поле "id" или "student_code"
-    student_code = user.get("id") if user else None
-    if not student_code and user:
-        student_code = user.get("student_code")
-    
+    student_code = student_code_of(users.get_by_tg(actor_tg_id))
     if not student_code:
         await cb.answer("Не удалось определить ваш student_code", show_alert=True)
         return
     
-    # Ищем оценки по week (предполагаем что task_id = week или есть связь)
-    # Пока сделаем заглушку, так как нужно адаптировать GradeService
-    
     week_info = weeks.get_week(week_number)
     week_title = week_info["title"] if week_info else f"Неделя {week_number}"
     
-    text = f"🎯 <b>Оценка за {week_title}</b>\n\n" \
-           f"🚧 Функция в разработке\n\n" \
-           f"Для просмотра оценок пока используйте команду /grades"
+    # текущие оценки заданий недели — из индекса GradeService, без чтения grades.csv
+    week_grades = grades.week_grades(str(student_code), week_number)
+    if week_grades:
+        text = f"🎯 <b>Оценка за {html.escape(str(week_title))}</b>\n\n" + \
+               "\n".join(html.escape(line) for line in format_grades(week_grades)) + \
+               f"\n\n<b>За неделю:</b> {grades.week_score(str(student_code), week_number):g} б."
+    else:
+        text = f"🎯 <b>Оценка за {html.escape(str(week_title))}</b>\n\n" \
+               f"Оценок за эту неделю пока нет."
     
     kb = InlineKeyboardBuilder()
     kb.button(text="⬅️ Назад", callback_data=f"week:select:{week_number}")
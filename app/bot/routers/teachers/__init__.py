@@ -4,11 +4,13 @@ from .ta_register import router as ta_register_router
 from .schedule import router as schedule_router
 from .slots_manage import router as slots_manage_router
 from .professor_main import router as professor_main_router  # Новый главный роутер
+from .grades_import import router as grades_import_router
 
 router = Router(name="teachers_root")
 
 # Подключаем новый главный роутер ПЕРВЫМ (приоритет)
 router.include_router(professor_main_router)
+router.include_router(grades_import_router)
 
 # Остальные роутеры (для совместимости и переходного периода)
 router.include_router(ta_register_router)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+import asyncio
+from aiogram import Router, F, Bot
+from aiogram.types import Message
+from aiogram.fsm.state import StatesGroup, State
+from aiogram.fsm.context import FSMContext
+
+from app.services.grade_import_service import GradeImportError, GradeImportService, MAX_IMPORT_BYTES
+from app.services.users_service import UsersService
+
+router = Router(name="teachers_grades_import")
+
+REJECTED_SHOWN = 30  # дальше — «и ещё N»
+
+USAGE = ("Пришлите CSV или XLSX документом. Колонки: student_code, task_id или week, points, comment.\n"
+         "Например:\nstudent_code,week,points,comment\nS-001,3,8,хорошо")
+
+
+class GradeImportFSM(StatesGroup):
+    waiting_file = State()
+
+
+@router.message(F.text == "/grades_import")
+async def grades_import_cmd(message: Message, state: FSMContext, actor_tg_id: int,
+                            users: UsersService, owner_id: int):
+    """Пакетный импорт оценок: TA — своим студентам по назначениям, владелец — всем."""
+    if actor_tg_id != owner_id and not users.get_ta_id_by_tg(actor_tg_id):
+        await message.answer("Команда доступна только преподавателям.")
+        return
+    await state.set_state(GradeImportFSM.waiting_file)
+    await message.answer(USAGE, parse_mode=None)
+
+
+@router.message(GradeImportFSM.waiting_file, F.document)
+async def grades_import_file(message: Message, state: FSMContext, actor_tg_id: int, bot: Bot,
+                             users: UsersService, grade_import: GradeImportService, owner_id: int):
+    doc = message.document
+    if doc.file_size and doc.file_size > MAX_IMPORT_BYTES:
+        await message.answer(f"Файл слишком большой: максимум {MAX_IMPORT_BYTES // (1024 * 1024)} МБ.")
+        return
+    ta_id = None if actor_tg_id == owner_id else users.get_ta_id_by_tg(actor_tg_id)
+    if actor_tg_id != owner_id and not ta_id:
+        await state.clear()
+        await message.answer("Команда доступна только преподавателям.")
+        return
+    content = (await bot.download(doc)).getvalue()
+    try:
+        report = await asyncio.to_thread(grade_import.check_file, doc.file_name or "", content, ta_id)
+    except GradeImportError as e:
+        await message.answer(f"Файл не принят: {e}. Пришлите исправленный или /cancel.", parse_mode=None)
+        return
+    report = grade_import.commit(report, actor_tg_id)  # индекс оценок меняется только из event loop
+    await state.clear()
+
+    lines = [f"✅ Записано оценок: {len(report.accepted)}. Отклонено строк: {len(report.rejected)}."]
+    for line, reason in report.rejected[:REJECTED_SHOWN]:
+        lines.append(f"• строка {line}: {reason}")
+    if len(report.rejected) > REJECTED_SHOWN:
+        lines.append(f"… и ещё {len(report.rejected) - REJECTED_SHOWN}")
+    await message.answer("\n".join(lines), parse_mode=None)
+
+
+@router.message(GradeImportFSM.waiting_file, F.text == "/cancel")
+async def grades_import_cancel(message: Message, state: FSMContext):
+    await state.clear()
+    await message.answer("Импорт оценок отменён.")
+
+
+@router.message(GradeImportFSM.waiting_file)
+async def grades_import_hint(message: Message):
+    await message.answer("Жду CSV/XLSX документом (или /cancel).")
@@ -6,15 +6,17 @@
 """
 
 from __future__ import annotations
-import logging
-from datetime import datetime, timezone, timedelta
+import asyncio, logging
+from datetime import date, datetime, timezone, timedelta
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, FSInputFile
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.fsm.context import FSMContext
 import copy
 
+from app.bot.callbacks import CallbackCodec, CallbackData, CallbackDispatcher
+
 # Services
 from app.services.users_service import UsersService
 from app.services.slot_service import SlotService
@@ -24,6 +26,8 @@ from app.services.weeks_service import WeeksService
 from app.services.grade_service import GradeService
 from app.services.submission_service import SubmissionService
 from app.services.audit_service import AuditService
+from app.services.assignments_service import AssignmentsService
+from app.services.export_service import SubmissionExportService
 
 router = Router(name="professors_main")
 log = logging.getLogger(__name__)
@@ -42,21 +46,38 @@ class ProfessorFSM(StatesGroup):
     material_upload_wait_file = State()
 
 # ================================================================================================
-# CALLBACK DATA HELPERS
+# CALLBACK DATA - компактный формат t|<код>|..., старый r=t;a=action;... декодируется
 # ================================================================================================
 
-def parse_callback(callback_data: str) -> dict:
-    """Парсинг callback_data"""
-    result = {}
-    try:
-        parts = callback_data.split(";")
-        for part in parts:
-            if "=" in part:
-                key, value = part.split("=", 1)
-                result[key] = value
-    except Exception as e:
-        log.error(f"Error parsing callback data: {callback_data}, error: {e}")
-    return result
+TEACHER_CB = CallbackCodec("t")
+TEACHER_CB.action("back_to_main", "0")
+TEACHER_CB.action("sched_create_start", "c")
+TEACHER_CB.action("sched_pick_dates", "cd")
+TEACHER_CB.action("sched_manage_main", "M")
+TEACHER_CB.action("slot_list", "L", d=date)
+TEACHER_CB.action("slot_card", "S", s=str)
+TEACHER_CB.action("slot_students", "st", s=str)
+TEACHER_CB.action("slot_edit", "se", s=str)
+TEACHER_CB.action("slot_open", "so", s=str)
+TEACHER_CB.action("slot_close", "sc", s=str)
+TEACHER_CB.action("slot_delete", "sd", s=str)
+TEACHER_CB.action("materials_main", "mm")
+TEACHER_CB.action("syllabus_view", "sy")
+TEACHER_CB.action("material_upload_pick_week", "mu")
+TEACHER_CB.action("submissions_main", "sb")
+TEACHER_CB.action("sub_act_dates", "sa")
+TEACHER_CB.action("sub_past_pick_mode", "sp")
+TEACHER_CB.action("sub_past_by_slot", "ps")
+TEACHER_CB.action("sub_past_by_week", "pw")
+TEACHER_CB.action("sub_past_by_group", "pg")
+TEACHER_CB.action("sub_past_by_student", "pu")
+TEACHER_CB.action("sub_export_week", "sx", w=int)
+
+callbacks = CallbackDispatcher(router, TEACHER_CB)
+
+def build_callback(action: str, **kwargs) -> str:
+    """Построить callback_data меню преподавателя (см. TEACHER_CB)"""
+    return TEACHER_CB.pack(action, **kwargs)
 
 def get_slot_display_status(slot_dict: dict, current_bookings: int) -> dict:
     """Определение статуса слота для отображения"""
@@ -105,10 +126,10 @@ async def professor_main_menu(
     
     kb = InlineKeyboardBuilder()
     # ИСПРАВЛЕНИЕ 1: Единое управление расписанием согласно спецификации
-    kb.button(text="➕ Создать расписание", callback_data="r=t;a=sched_create_start")
-    kb.button(text="📅 Управление расписанием", callback_data="r=t;a=sched_manage_main")
-    kb.button(text="📚 Методические материалы", callback_data="r=t;a=materials_main")
-    kb.button(text="👨‍🎓 Сдачи студентов", callback_data="r=t;a=submissions_main")
+    kb.button(text="➕ Создать расписание", callback_data=build_callback("sched_create_start"))
+    kb.button(text="📅 Управление расписанием", callback_data=build_callback("sched_manage_main"))
+    kb.button(text="📚 Методические материалы", callback_data=build_callback("materials_main"))
+    kb.button(text="👨‍🎓 Сдачи студентов", callback_data=build_callback("submissions_main"))
     kb.adjust(1)
     
     teacher_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
@@ -118,7 +139,7 @@ async def professor_main_menu(
     text = f"👨‍🏫 <b>Добро пожаловать, {teacher_name}!</b>\n\n📚 Выберите нужный раздел:"
     await message.answer(text, reply_markup=kb.as_markup(), parse_mode="HTML")
 
-@router.callback_query(F.data == "r=t;a=back_to_main")
+@callbacks.on("back_to_main")
 async def back_to_main_handler(cb: CallbackQuery, actor_tg_id: int, users: UsersService):
     """Возврат в главное меню"""
     await cb.answer()
@@ -129,10 +150,10 @@ async def back_to_main_handler(cb: CallbackQuery, actor_tg_id: int, users: Users
         return
     
     kb = InlineKeyboardBuilder()
-    kb.button(text="➕ Создать расписание", callback_data="r=t;a=sched_create_start")
-    kb.button(text="📅 Управление расписанием", callback_data="r=t;a=sched_manage_main")
-    kb.button(text="📚 Методические материалы", callback_data="r=t;a=materials_main")
-    kb.button(text="👨‍🎓 Сдачи студентов", callback_data="r=t;a=submissions_main")
+    kb.button(text="➕ Создать расписание", callback_data=build_callback("sched_create_start"))
+    kb.button(text="📅 Управление расписанием", callback_data=build_callback("sched_manage_main"))
+    kb.button(text="📚 Методические материалы", callback_data=build_callback("materials_main"))
+    kb.button(text="👨‍🎓 Сдачи студентов", callback_data=build_callback("submissions_main"))
     kb.adjust(1)
     
     teacher_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
@@ -146,14 +167,14 @@ async def back_to_main_handler(cb: CallbackQuery, actor_tg_id: int, users: Users
 # ➕ СОЗДАНИЕ РАСПИСАНИЯ
 # ================================================================================================
 
-@router.callback_query(F.data == "r=t;a=sched_create_start")
+@callbacks.on("sched_create_start")
 async def sched_create_start_handler(cb: CallbackQuery, state: FSMContext):
     """Создание расписания - начало мастера"""
     await cb.answer()
     
     kb = InlineKeyboardBuilder()
-    kb.button(text="📅 Выбрать даты", callback_data="r=t;a=sched_pick_dates")
-    kb.button(text="⬅️ Назад", callback_data="r=t;a=back_to_main")
+    kb.button(text="📅 Выбрать даты", callback_data=build_callback("sched_pick_dates"))
+    kb.button(text="⬅️ Назад", callback_data=build_callback("back_to_main"))
     kb.adjust(1)
     
     text = (
@@ -173,7 +194,7 @@ async def sched_create_start_handler(cb: CallbackQuery, state: FSMContext):
 # 📅 УПРАВЛЕНИЕ РАСПИСАНИЕМ
 # ================================================================================================
 
-@router.callback_query(F.data == "r=t;a=sched_manage_main")
+@callbacks.on("sched_manage_main")
 async def sched_manage_main_handler(
     cb: CallbackQuery,
     actor_tg_id: int,
@@ -193,8 +214,8 @@ async def sched_manage_main_handler(
         if slots_df.empty:
             text = "📅 <b>Управление расписанием</b>\n\n❌ У вас пока нет созданных слотов.\nИспользуйте «Создать расписание» для добавления."
             kb = InlineKeyboardBuilder()
-            kb.button(text="➕ Создать расписание", callback_data="r=t;a=sched_create_start")
-            kb.button(text="⬅️ Назад", callback_data="r=t;a=back_to_main")
+            kb.button(text="➕ Создать расписание", callback_data=build_callback("sched_create_start"))
+            kb.button(text="⬅️ Назад", callback_data=build_callback("back_to_main"))
             kb.adjust(1)
             await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
             return
@@ -203,8 +224,8 @@ async def sched_manage_main_handler(
         if teacher_slots.empty:
             text = "📅 <b>Управление расписанием</b>\n\n❌ У вас пока нет созданных слотов.\nИспользуйте «Создать расписание» для добавления."
             kb = InlineKeyboardBuilder()
-            kb.button(text="➕ Создать расписание", callback_data="r=t;a=sched_create_start")
-            kb.button(text="⬅️ Назад", callback_data="r=t;a=back_to_main")
+            kb.button(text="➕ Создать расписание", callback_data=build_callback("sched_create_start"))
+            kb.button(text="⬅️ Назад", callback_data=build_callback("back_to_main"))
             kb.adjust(1)
             await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
             return
@@ -223,12 +244,12 @@ async def sched_manage_main_handler(
                 
                 kb.button(
                     text=f"📅 {formatted_date} ({slots_count} слотов)",
-                    callback_data=f"r=t;a=slot_list;d={date_str.replace('-', '')}"
+                    callback_data=build_callback("slot_list", d=date_obj)
                 )
             except Exception as e:
                 log.error(f"Error processing date {date_str}: {e}")
         
-        kb.button(text="⬅️ Назад", callback_data="r=t;a=back_to_main")
+        kb.button(text="⬅️ Назад", callback_data=build_callback("back_to_main"))
         kb.adjust(1)
         
         text = "📅 <b>Управление расписанием</b>\n\nВыберите дату для просмотра и управления слотами:"
@@ -242,9 +263,10 @@ async def sched_manage_main_handler(
 # СПИСОК СЛОТОВ И КАРТОЧКА СЛОТА
 # ================================================================================================
 
-@router.callback_query(F.data.regexp(r"r=t;a=slot_list;d=\d{8}"))
+@callbacks.on("slot_list")
 async def slot_list_handler(
     cb: CallbackQuery,
+    cbd: CallbackData,
     actor_tg_id: int,
     users: UsersService,
     slots: SlotService,
@@ -253,26 +275,9 @@ async def slot_list_handler(
     """Список слотов на дату"""
     await cb.answer()
     
-    # Парсим дату
-    try:
-        data = parse_callback(cb.data)
-        date_str = data.get("d", "")
-        
-        if not date_str:
-            await cb.message.edit_text("❌ Некорректные данные")
-            return
-    except Exception:
-        await cb.message.edit_text("❌ Ошибка обработки данных")
-        return
-    
-    # Преобразуем дату
-    try:
-        date_obj = datetime.strptime(date_str, "%Y%m%d").date()
-        formatted_date = date_obj.strftime("%d.%m.%Y")
-        iso_date = date_obj.isoformat()
-    except ValueError:
-        await cb.message.edit_text("❌ Некорректная дата")
-        return
+    date_obj = cbd.get("d")
+    formatted_date = date_obj.strftime("%d.%m.%Y")
+    iso_date = date_obj.isoformat()
     
     ta_id = users.get_ta_id_by_tg(actor_tg_id)
     if not ta_id:
@@ -324,10 +329,10 @@ async def slot_list_handler(
             
             kb.button(
                 text=button_text,
-                callback_data=f"r=t;a=slot_card;s={slot_id}"
+                callback_data=build_callback("slot_card", s=slot_id)
             )
         
-        kb.button(text="⬅️ Назад", callback_data="r=t;a=sched_manage_main")
+        kb.button(text="⬅️ Назад", callback_data=build_callback("sched_manage_main"))
         kb.adjust(1)
         
         text = f"📅 <b>Слоты на {formatted_date}</b>\n\nВыберите слот для просмотра деталей:"
@@ -337,9 +342,10 @@ async def slot_list_handler(
         log.error(f"Error in slot_list: {e}")
         await cb.message.edit_text(f"❌ Ошибка: {str(e)}")
 
-@router.callback_query(F.data.startswith("r=t;a=slot_card;s="))
+@callbacks.on("slot_card")
 async def slot_card_handler(
     cb: CallbackQuery,
+    cbd: CallbackData,
     slots: SlotService,
     bookings: BookingService
 ):
@@ -347,8 +353,7 @@ async def slot_card_handler(
     await cb.answer()
     
     try:
-        data = parse_callback(cb.data)
-        slot_id = data.get("s", "")
+        slot_id = cbd.get("s", "")
         
         if not slot_id:
             await cb.message.edit_text("❌ Некорректные данные")
@@ -390,16 +395,16 @@ async def slot_card_handler(
         
         # Кнопки действий
         kb = InlineKeyboardBuilder()
-        kb.button(text="👨‍🎓 Студенты", callback_data=f"r=t;a=slot_students;s={slot_id}")
-        kb.button(text="✏️ Изменить", callback_data=f"r=t;a=slot_edit;s={slot_id}")
+        kb.button(text="👨‍🎓 Студенты", callback_data=build_callback("slot_students", s=slot_id))
+        kb.button(text="✏️ Изменить", callback_data=build_callback("slot_edit", s=slot_id))
         
         if status_info["status"] == "closed":
-            kb.button(text="🟢 Открыть", callback_data=f"r=t;a=slot_open;s={slot_id}")
+            kb.button(text="🟢 Открыть", callback_data=build_callback("slot_open", s=slot_id))
         else:
-            kb.button(text="🚫 Закрыть", callback_data=f"r=t;a=slot_close;s={slot_id}")
+            kb.button(text="🚫 Закрыть", callback_data=build_callback("slot_close", s=slot_id))
         
-        kb.button(text="❌ Удалить", callback_data=f"r=t;a=slot_delete;s={slot_id}")
-        kb.button(text="⬅️ Назад", callback_data=f"r=t;a=slot_list;d={date.replace('-', '')}")
+        kb.button(text="❌ Удалить", callback_data=build_callback("slot_delete", s=slot_id))
+        kb.button(text="⬅️ Назад", callback_data=build_callback("slot_list", d=datetime.fromisoformat(date).date()))
         
         kb.adjust(2, 2, 1, 1)
         
@@ -413,9 +418,10 @@ async def slot_card_handler(
 # ИСПРАВЛЕНИЕ 2: Кнопка "Студенты" - полноценное отображение списка
 # ================================================================================================
 
-@router.callback_query(F.data.startswith("r=t;a=slot_students;s="))
+@callbacks.on("slot_students")
 async def slot_students_handler(
     cb: CallbackQuery,
+    cbd: CallbackData,
     bookings: BookingService,
     users: UsersService
 ):
@@ -424,8 +430,7 @@ async def slot_students_handler(
     
     # Извлекаем slot_id
     try:
-        data = parse_callback(cb.data)
-        slot_id = data.get("s", "")
+        slot_id = cbd.get("s", "")
         
         log.info(f"slot_students_handler: callback_data={cb.data}, slot_id={slot_id}")
         
@@ -489,7 +494,7 @@ async def slot_students_handler(
         
         # Кнопка назад
         kb = InlineKeyboardBuilder()
-        kb.button(text="⬅️ Назад к слоту", callback_data=f"r=t;a=slot_card;s={slot_id}")
+        kb.button(text="⬅️ Назад к слоту", callback_data=build_callback("slot_card", s=slot_id))
         
         await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
         
@@ -501,21 +506,21 @@ async def slot_students_handler(
 # 📚 МЕТОДИЧЕСКИЕ МАТЕРИАЛЫ
 # ================================================================================================
 
-@router.callback_query(F.data == "r=t;a=materials_main")
+@callbacks.on("materials_main")
 async def materials_main_handler(cb: CallbackQuery):
     """Главное меню методических материалов"""
     await cb.answer()
     
     kb = InlineKeyboardBuilder()
-    kb.button(text="📖 Просмотреть список тем курса", callback_data="r=t;a=syllabus_view")
-    kb.button(text="📤 Загрузить материалы по неделе", callback_data="r=t;a=material_upload_pick_week")
-    kb.button(text="⬅️ Назад", callback_data="r=t;a=back_to_main")
+    kb.button(text="📖 Просмотреть список тем курса", callback_data=build_callback("syllabus_view"))
+    kb.button(text="📤 Загрузить материалы по неделе", callback_data=build_callback("material_upload_pick_week"))
+    kb.button(text="⬅️ Назад", callback_data=build_callback("back_to_main"))
     kb.adjust(1)
     
     text = "📚 <b>Методические материалы</b>\n\nВыберите действие:"
     await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
 
-@router.callback_query(F.data == "r=t;a=syllabus_view")
+@callbacks.on("syllabus_view")
 async def syllabus_view_handler(cb: CallbackQuery, weeks: WeeksService):
     """Просмотр тем курса"""
     await cb.answer()
@@ -534,7 +539,7 @@ async def syllabus_view_handler(cb: CallbackQuery, weeks: WeeksService):
             text = "\n".join(lines)
         
         kb = InlineKeyboardBuilder()
-        kb.button(text="⬅️ Назад", callback_data="r=t;a=materials_main")
+        kb.button(text="⬅️ Назад", callback_data=build_callback("materials_main"))
         
         await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
     except Exception as e:
@@ -545,21 +550,21 @@ async def syllabus_view_handler(cb: CallbackQuery, weeks: WeeksService):
 # 👨‍🎓 СДАЧИ СТУДЕНТОВ
 # ================================================================================================
 
-@router.callback_query(F.data == "r=t;a=submissions_main")
+@callbacks.on("submissions_main")
 async def submissions_main_handler(cb: CallbackQuery):
     """Главное меню сдач студентов"""
     await cb.answer()
     
     kb = InlineKeyboardBuilder()
-    kb.button(text="📆 Актуальные сдачи", callback_data="r=t;a=sub_act_dates")
-    kb.button(text="📜 Прошедшие сдачи", callback_data="r=t;a=sub_past_pick_mode")
-    kb.button(text="⬅️ Назад", callback_data="r=t;a=back_to_main")
+    kb.button(text="📆 Актуальные сдачи", callback_data=build_callback("sub_act_dates"))
+    kb.button(text="📜 Прошедшие сдачи", callback_data=build_callback("sub_past_pick_mode"))
+    kb.button(text="⬅️ Назад", callback_data=build_callback("back_to_main"))
     kb.adjust(1)
     
     text = "👨‍🎓 <b>Сдачи студентов</b>\n\n🚧 Функции частично в разработке\n\nВыберите действие:"
     await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
 
-@router.callback_query(F.data == "r=t;a=sub_act_dates")
+@callbacks.on("sub_act_dates")
 async def sub_act_dates_handler(cb: CallbackQuery):
     """Актуальные сдачи"""
     await cb.answer()
@@ -567,41 +572,88 @@ async def sub_act_dates_handler(cb: CallbackQuery):
     text = "📆 <b>Актуальные сдачи</b>\n\n🚧 Функция в разработке\n\nЗдесь будут сдачи на сегодня и ближайшие дни с возможностью:\n• 📂 Скачать работу\n• ✅ Поставить оценку"
     
     kb = InlineKeyboardBuilder()
-    kb.button(text="⬅️ Назад", callback_data="r=t;a=submissions_main")
+    kb.button(text="⬅️ Назад", callback_data=build_callback("submissions_main"))
     
     await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
 
-@router.callback_query(F.data == "r=t;a=sub_past_pick_mode")
+@callbacks.on("sub_past_pick_mode")
 async def sub_past_pick_mode_handler(cb: CallbackQuery):
     """Прошедшие сдачи - режимы поиска"""
     await cb.answer()
     
     kb = InlineKeyboardBuilder()
-    kb.button(text="🔎 По слотам", callback_data="r=t;a=sub_past_by_slot")
-    kb.button(text="📖 По неделям", callback_data="r=t;a=sub_past_by_week")
-    kb.button(text="👥 По группе", callback_data="r=t;a=sub_past_by_group")
-    kb.button(text="🧑‍🎓 По студенту", callback_data="r=t;a=sub_past_by_student")
-    kb.button(text="⬅️ Назад", callback_data="r=t;a=submissions_main")
+    kb.button(text="🔎 По слотам", callback_data=build_callback("sub_past_by_slot"))
+    kb.button(text="📖 По неделям", callback_data=build_callback("sub_past_by_week"))
+    kb.button(text="👥 По группе", callback_data=build_callback("sub_past_by_group"))
+    kb.button(text="🧑‍🎓 По студенту", callback_data=build_callback("sub_past_by_student"))
+    kb.button(text="⬅️ Назад", callback_data=build_callback("submissions_main"))
     
     kb.adjust(2, 2, 1)
     
     text = "📜 <b>Прошедшие сдачи</b>\n\nВыберите способ поиска:"
     await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
 
-@router.callback_query(F.data == "r=t;a=sub_past_by_slot")
-@router.callback_query(F.data == "r=t;a=sub_past_by_week")
-@router.callback_query(F.data == "r=t;a=sub_past_by_group")  
-@router.callback_query(F.data == "r=t;a=sub_past_by_student")
-async def sub_past_by_handler(cb: CallbackQuery):
+@callbacks.on("sub_past_by_week")
+async def sub_past_by_week_handler(cb: CallbackQuery, actor_tg_id: int, users: UsersService,
+                                   weeks: WeeksService, assignments: AssignmentsService):
+    """Прошедшие сдачи по неделям: недели с назначенными студентами и выгрузка ZIP"""
+    await cb.answer()
+    
+    kb = InlineKeyboardBuilder()
+    ta_id = users.get_ta_id_by_tg(actor_tg_id)
+    assigned = assignments.table.read()
+    counts = {}
+    if ta_id and not assigned.empty:
+        mine = assigned[assigned["ta_code"].astype(str) == ta_id]
+        counts = mine.groupby(mine["week"].astype(int)).size().to_dict()
+    
+    if not counts:
+        text = "📖 <b>По неделям</b>\n\nВам пока не назначены студенты."
+    else:
+        text = "📖 <b>По неделям</b>\n\nВыберите неделю — пришлю ZIP с последними сдачами ваших студентов:"
+        for week_number in sorted(counts):
+            week = weeks.get_week(week_number)
+            title = f" {week['title']}" if week else ""
+            kb.button(text=f"📦 W{week_number:02d}{title} ({counts[week_number]} студ.)",
+                      callback_data=build_callback("sub_export_week", w=week_number))
+    kb.button(text="⬅️ Назад", callback_data=build_callback("sub_past_pick_mode"))
+    kb.adjust(1)
+    
+    await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
+
+@callbacks.on("sub_export_week")
+async def sub_export_week_handler(cb: CallbackQuery, cbd: CallbackData, actor_tg_id: int,
+                                  users: UsersService, exports: SubmissionExportService):
+    """Выгрузка сдач недели одним или несколькими ZIP"""
+    week_number = cbd.params["w"]
+    ta_id = users.get_ta_id_by_tg(actor_tg_id)
+    if not ta_id:
+        await cb.answer("Доступно только преподавателям", show_alert=True)
+        return
+    await cb.answer("Собираю архив…")
+    
+    selected = await asyncio.to_thread(exports.select, ta_id, week_number)
+    if selected.empty:
+        await cb.message.answer(f"📦 W{week_number:02d}: сдач от ваших студентов пока нет.")
+        return
+    
+    archives = await asyncio.to_thread(exports.build_archives, ta_id, week_number, selected)
+    try:
+        for path in archives:
+            await cb.message.answer_document(FSInputFile(path))
+    finally:
+        await asyncio.to_thread(exports.cleanup, archives)
+    log.info("TA %s exported W%s: %d submissions", ta_id, week_number, len(selected))
+
+@callbacks.on("sub_past_by_slot", "sub_past_by_group", "sub_past_by_student")
+async def sub_past_by_handler(cb: CallbackQuery, cbd: CallbackData):
     """Режимы поиска прошедших сдач"""
     await cb.answer()
     
-    data = parse_callback(cb.data)
-    action = data.get("a", "")
+    action = cbd.action
     
     mode_names = {
         "sub_past_by_slot": "🔎 По слотам",
-        "sub_past_by_week": "📖 По неделям",
         "sub_past_by_group": "👥 По группе", 
         "sub_past_by_student": "🧑‍🎓 По студенту"
     }
@@ -611,7 +663,7 @@ async def sub_past_by_handler(cb: CallbackQuery):
     text = f"<b>{mode_name}</b>\n\n🚧 Функция в разработке\n\nЗдесь будет поиск прошедших сдач с возможностью:\n• 📂 Скачать работу\n• ✅ Поставить/изменить оценку"
     
     kb = InlineKeyboardBuilder()
-    kb.button(text="⬅️ Назад", callback_data="r=t;a=sub_past_pick_mode")
+    kb.button(text="⬅️ Назад", callback_data=build_callback("sub_past_pick_mode"))
     
     await cb.message.edit_text(text, reply_markup=kb.as_markup(), parse_mode="HTML")
 
@@ -666,5 +718,6 @@ TODO для полной реализации:
 ✅ 4. Кнопка назад из расписания - исправлена
 ✅ 5. Кнопка студенты в слоте - исправлена парсинг callback_data
 
-Все обработчики используют точные строки формата "r=t;a=action;..."
+Все callback-обработчики маршрутизируются через CallbackDispatcher (TEACHER_CB);
+старый формат "r=t;a=action;..." по-прежнему декодируется.
 """
\ No newline at end of file
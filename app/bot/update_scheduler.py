@@ -0,0 +1,189 @@
+"""
+Планировщик апдейтов: строгий порядок внутри одного пользователя, параллельность между пользователями.
+
+Подключается как outer-middleware на dp.update (build_dispatcher): продолжение цепочки
+(роутеры, хендлеры) ставится в очередь пользователя, а вызов middleware ждёт, пока воркер
+его выполнит, и возвращает результат хендлера. Поэтому лимиты вызывающего работают:
+в webhook слот WebhookRuntime занят до конца обработки апдейта, в polling апдейты идут
+задачами (handle_as_tasks=True), а параллельность ограничивают воркеры.
+
+- Очередь на пользователя (ключ — from_user.id, иначе chat.id) ограничена user_queue_limit;
+  при переполнении апдейт не отбрасывается, а ждёт места в очереди (backpressure) — Telegram
+  уже получил 200, терять такой апдейт нельзя. Ждущие встают в очередь строго по порядку прихода.
+- Глобально работают не более `workers` обработчиков; ключ пользователя в любой момент
+  обрабатывается максимум одним воркером → апдейты одного пользователя не гоняются друг с другом.
+- Метрики: scheduler_queue_depth, scheduler_active_keys, scheduler_backpressure_total,
+  scheduler_update_seconds; глубина очереди конкретного ключа — depth(key).
+"""
+
+from __future__ import annotations
+import asyncio, logging, time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject
+
+from app.utils.metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+# (хендлер, апдейт, data, future результата)
+Job = Tuple[Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]], TelegramObject, Dict[str, Any], asyncio.Future]
+
+
+class UpdateScheduler(BaseMiddleware):
+    def __init__(self, workers: int = 32, user_queue_limit: int = 20, drain_timeout: float = 30.0):
+        self.workers = workers
+        self.user_queue_limit = user_queue_limit
+        self.drain_timeout = drain_timeout
+
+        self._queues: Dict[Hashable, Deque[Job]] = {}
+        self._waiting: Dict[Hashable, Deque[Tuple[asyncio.Future, Job]]] = {}  # ждут места в очереди
+        self._ready: asyncio.Queue[Hashable] = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._pending = 0
+
+    # ── wiring ───────────────────────────────────────────────────────────────
+    def setup(self, dp: Dispatcher) -> None:
+        dp.update.outer_middleware(self)
+        dp.startup.register(self.start)
+        dp.shutdown.register(self.stop)
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker(i), name=f"update-worker-{i}")
+                         for i in range(self.workers)]
+        log.info("Update scheduler started: workers=%d user_queue_limit=%d", self.workers, self.user_queue_limit)
+
+    async def stop(self) -> None:
+        """Дождаться опустошения очередей (не дольше drain_timeout) и остановить воркеры."""
+        if self._pending:
+            log.info("Update scheduler draining %d queued updates", self._pending)
+            deadline = time.monotonic() + self.drain_timeout
+            while self._pending and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        # не дождавшиеся обработки: вызывающие получают CancelledError, а не висят
+        for queue in self._queues.values():
+            for *_, done in queue:
+                done.cancel()
+        for waiting in self._waiting.values():
+            for admitted, (*_, done) in waiting:
+                admitted.cancel()
+                done.cancel()
+            waiting.clear()
+        self._queues.clear()
+        self._waiting.clear()
+        self._ready = asyncio.Queue()
+        self._pending = 0
+        self._publish_depth()
+
+    # ── middleware ───────────────────────────────────────────────────────────
+    async def __call__(self, handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        if not self._workers:
+            # планировщик не запущен (например, прямой feed_update в тестах) — обрабатываем сразу
+            return await handler(event, data)
+        done = asyncio.get_running_loop().create_future()
+        await self.submit(self.key_for(event, data), (handler, event, data, done))
+        return await done
+
+    @staticmethod
+    def key_for(event: TelegramObject, data: Dict[str, Any]) -> Hashable:
+        user = data.get("event_from_user")
+        if user is not None:
+            return ("user", user.id)
+        chat = data.get("event_chat")
+        if chat is not None:
+            return ("chat", chat.id)
+        return ("update", getattr(event, "update_id", id(event)))
+
+    async def submit(self, key: Hashable, job: Job) -> None:
+        """Поставить апдейт в очередь ключа; если она полна — дождаться места."""
+        self._pending += 1
+        queue = self._queues.get(key)
+        if queue is None:
+            self._queues[key] = deque([job])
+            self._ready.put_nowait(key)
+        elif len(queue) < self.user_queue_limit and not self._waiting.get(key):
+            # ключ уже стоит в ready или обрабатывается — воркер подхватит его по порядку
+            queue.append(job)
+        else:
+            METRICS.inc("scheduler_backpressure_total")
+            admitted = asyncio.get_running_loop().create_future()
+            waiting = self._waiting.setdefault(key, deque())
+            entry = (admitted, job)
+            waiting.append(entry)
+            self._publish_depth()
+            try:
+                await admitted  # воркер сам переложит job в очередь, освободив место
+            except asyncio.CancelledError:
+                if entry in waiting:  # ещё не в очереди — убрать, апдейт не обработан
+                    waiting.remove(entry)
+                    if not waiting:
+                        self._waiting.pop(key, None)
+                    self._pending -= 1
+                    self._publish_depth()
+                raise
+            return
+        self._publish_depth()
+
+    # ── workers ──────────────────────────────────────────────────────────────
+    async def _worker(self, n: int) -> None:
+        while True:
+            key = await self._ready.get()
+            queue = self._queues[key]
+            handler, event, data, done = queue.popleft()
+            self._admit(key, queue)
+            started = time.perf_counter()
+            try:
+                if "state" in data:
+                    # FSM-состояние читалось при постановке в очередь — до обработки предыдущих апдейтов ключа
+                    data["raw_state"] = await data["state"].get_state()
+                result = await handler(event, data)
+            except Exception as e:
+                METRICS.inc("scheduler_errors_total")
+                if done.done():  # вызывающий уже не ждёт — логируем здесь
+                    log.exception("Update handler failed for %s", key)
+                else:
+                    done.set_exception(e)  # исключение получит вызывающий (dispatcher залогирует)
+            else:
+                if not done.done():
+                    done.set_result(result)
+            finally:
+                if not done.done():  # воркер отменён посреди обработки (stop)
+                    done.cancel()
+                METRICS.observe("scheduler_update_seconds", time.perf_counter() - started)
+                self._pending -= 1
+                if queue:
+                    # в конец общей очереди: остальные пользователи не ждут «болтливого»
+                    self._ready.put_nowait(key)
+                else:
+                    del self._queues[key]
+                self._publish_depth()
+
+    def _admit(self, key: Hashable, queue: Deque[Job]) -> None:
+        """Место в очереди освободилось — переложить в неё первого ждущего."""
+        waiting = self._waiting.get(key)
+        if not waiting:
+            return
+        admitted, job = waiting.popleft()
+        if not waiting:
+            del self._waiting[key]
+        queue.append(job)
+        if not admitted.done():
+            admitted.set_result(None)
+
+    def _publish_depth(self) -> None:
+        METRICS.set("scheduler_queue_depth", self._pending)
+        METRICS.set("scheduler_active_keys", len(self._queues))
+
+    def depth(self, key: Optional[Hashable] = None) -> int:
+        if key is None:
+            return self._pending
+        q = self._queues.get(key)
+        return len(q) if q else 0
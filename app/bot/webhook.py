@@ -0,0 +1,148 @@
+"""
+Webhook-режим: aiohttp-сервер как альтернатива long polling.
+
+- POST <path> принимает апдейты Telegram; сверяется заголовок X-Telegram-Bot-Api-Secret-Token
+  (run_webhook без секрета не запускается: иначе любой мог бы прислать апдейт от имени
+  владельца — RoleMiddleware верит from_user.id).
+- Обработка идёт в фоне, но не более max_concurrency апдейтов одновременно:
+  при исчерпании лимита запрос ждёт слота, и Telegram сам притормаживает доставку.
+- При остановке сервер перестаёт принимать апдейты (503) и дожидается
+  обработки уже принятых (drain_timeout).
+- GET /healthz — для мониторинга; GET /metrics — только если задан metrics_token,
+  и только с заголовком Authorization: Bearer <token>.
+"""
+
+from __future__ import annotations
+import asyncio, hmac, logging, signal, time
+from typing import Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+
+from app.utils.metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookRuntime:
+    def __init__(self, dp: Dispatcher, bot: Bot, path: str = "/webhook", secret: Optional[str] = None,
+                 max_concurrency: int = 64, drain_timeout: float = 30.0, metrics_token: Optional[str] = None):
+        self.dp = dp
+        self.bot = bot
+        self.path = path if path.startswith("/") else "/" + path
+        self.secret = secret or None
+        self.max_concurrency = max_concurrency
+        self.drain_timeout = drain_timeout
+        self.metrics_token = metrics_token or None
+
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._draining = False
+
+    @property
+    def inflight(self) -> int:
+        return len(self._tasks)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get("/healthz", self.handle_health)
+        if self.metrics_token:
+            app.router.add_get("/metrics", self.handle_metrics)
+        return app
+
+    # ── handlers ─────────────────────────────────────────────────────────────
+    async def handle_update(self, request: web.Request) -> web.Response:
+        if self._draining:
+            return web.Response(status=503, text="draining")
+        if self.secret and not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret):
+            METRICS.inc("webhook_rejected_total", reason="secret")
+            return web.Response(status=401, text="bad secret")
+        try:
+            update = await request.json()
+        except Exception:
+            METRICS.inc("webhook_rejected_total", reason="payload")
+            return web.Response(status=400, text="bad payload")
+
+        await self._slots.acquire()
+        if self._draining:
+            self._slots.release()
+            return web.Response(status=503, text="draining")
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        METRICS.inc("webhook_updates_total")
+        METRICS.set("webhook_inflight", self.inflight)
+        return web.Response(status=200)
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        status = 503 if self._draining else 200
+        return web.json_response({"draining": self._draining, "inflight": self.inflight}, status=status)
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {self.metrics_token}"):
+            return web.Response(status=401, text="unauthorized")
+        return web.Response(text=METRICS.render_text(), content_type="text/plain")
+
+    async def _process(self, update: dict) -> None:
+        started = time.perf_counter()
+        try:
+            await self.dp.feed_raw_update(self.bot, update)
+        except Exception:
+            METRICS.inc("webhook_errors_total")
+            log.exception("Failed to process update id=%s", update.get("update_id"))
+        finally:
+            METRICS.observe("webhook_update_seconds", time.perf_counter() - started)
+            self._slots.release()
+            METRICS.set("webhook_inflight", max(0, self.inflight - 1))
+
+    # ── shutdown ─────────────────────────────────────────────────────────────
+    async def drain(self) -> None:
+        """Перестать принимать апдейты и дождаться обработки принятых."""
+        self._draining = True
+        pending = set(self._tasks)
+        if not pending:
+            return
+        log.info("Draining %d in-flight updates (timeout %.0fs)", len(pending), self.drain_timeout)
+        done, not_done = await asyncio.wait(pending, timeout=self.drain_timeout)
+        if not_done:
+            log.warning("Drain timeout: cancelling %d updates", len(not_done))
+            for t in not_done:
+                t.cancel()
+            await asyncio.gather(*not_done, return_exceptions=True)
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, *, base_url: str, path: str, secret: str,
+                      host: str, port: int, max_concurrency: int, drain_timeout: float,
+                      metrics_token: Optional[str] = None) -> None:
+    if not secret:
+        raise ValueError("webhook secret is required")
+    runtime = WebhookRuntime(dp, bot, path=path, secret=secret, max_concurrency=max_concurrency,
+                             drain_timeout=drain_timeout, metrics_token=metrics_token)
+    runner = web.AppRunner(runtime.build_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host=host, port=port)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: остаётся KeyboardInterrupt
+
+    await dp.emit_startup(bot=bot, **dp.workflow_data)
+    try:
+        await site.start()
+        url = base_url.rstrip("/") + runtime.path
+        await bot.set_webhook(url=url, secret_token=secret, allowed_updates=["message", "callback_query"],
+                              max_connections=min(max_concurrency, 100), drop_pending_updates=False)
+        log.info("Webhook listening on %s:%s%s, registered as %s", host, port, runtime.path, url)
+        await stop.wait()
+    finally:
+        await runtime.drain()
+        await runner.cleanup()
+        await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+        log.info("Webhook server stopped")
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-import os
+import os, re
 from dataclasses import dataclass
 
+# secret_token setWebhook: 1–256 символов A-Z, a-z, 0-9, _ и -
+_WEBHOOK_SECRET = re.compile(r"[A-Za-z0-9_-]{1,256}")
+
 @dataclass(frozen=True)
 class Config:
     bot_token: str
@@ -12,6 +15,37 @@ class Config:
     log_level: str
     yadisk_token: str | None
     ta_invite_code: str | None
+    # Мониторинг лага event loop
+    loop_lag_interval_ms: int = 250
+    loop_lag_threshold_ms: int = 200
+    # Режим получения апдейтов: polling | webhook
+    run_mode: str = "polling"
+    webhook_base_url: str | None = None
+    webhook_path: str = "/webhook"
+    webhook_secret: str | None = None
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    webhook_max_concurrency: int = 64
+    webhook_drain_timeout_s: int = 30
+    webhook_metrics_token: str | None = None  # без токена /metrics на webhook-сервере не отдаётся
+    # Планировщик апдейтов: порядок внутри пользователя, параллельность между пользователями
+    update_workers: int = 32
+    update_user_queue_limit: int = 20
+    # FSM-хранилище: sqlite (переживает рестарт) | memory
+    fsm_storage: str = "sqlite"
+    fsm_state_ttl_h: int = 48
+    # Исходящая очередь: лимиты Telegram (сообщений в секунду)
+    outbox_global_per_s: int = 30
+    outbox_chat_per_s: int = 1
+    # Напоминания (L1 §9): как часто проверять изменения таблиц и наступившие задания
+    reminders_poll_s: int = 30
+    # Сводка для TA о записях/отменах: длина окна накопления, секунд
+    ta_digest_window_s: int = 600
+    # Яндекс.Диск (STORAGE_KIND=yadisk): корневая папка и число одновременных загрузок
+    yadisk_root: str = "app:/"
+    yadisk_upload_concurrency: int = 4
+    # Архивация сдач в бандлы: через сколько дней после дедлайна недели
+    archive_after_days: int = 14
 
 def _read_owner_tg_id() -> int:
     """
@@ -35,6 +69,13 @@ def _read_owner_tg_id() -> int:
                 pass
     return 0
 
+def _read_int(key: str, default: int) -> int:
+    raw = (os.getenv(key) or "").strip()
+    try:
+        return int(raw) if raw else default
+    except ValueError:
+        return default
+
 def load_config() -> Config:
     from dotenv import load_dotenv
     load_dotenv()
@@ -45,10 +86,20 @@ def load_config() -> Config:
 
     owner = _read_owner_tg_id()
     data_dir = os.getenv("DATA_DIR", "./data")
-    storage_kind = (os.getenv("STORAGE_KIND", "local") or "local").lower()
+    storage_kind = (os.getenv("STORAGE_KIND", "cas") or "cas").lower()
     log_level = (os.getenv("LOG_LEVEL", "INFO") or "INFO").upper()
     yadisk_token = os.getenv("YADISK_TOKEN") or None
     ta_invite_code = os.getenv("TA_INVITE_CODE") or None
+    loop_lag_interval_ms = _read_int("LOOP_LAG_INTERVAL_MS", 250)
+    loop_lag_threshold_ms = _read_int("LOOP_LAG_THRESHOLD_MS", 200)
+    run_mode = (os.getenv("RUN_MODE", "polling") or "polling").strip().lower()
+    webhook_base_url = (os.getenv("WEBHOOK_BASE_URL") or "").strip() or None
+    if run_mode == "webhook" and not webhook_base_url:
+        raise RuntimeError("RUN_MODE=webhook requires WEBHOOK_BASE_URL")
+    webhook_secret = (os.getenv("WEBHOOK_SECRET") or "").strip() or None
+    if run_mode == "webhook" and not (webhook_secret and _WEBHOOK_SECRET.fullmatch(webhook_secret)):
+        # без секрета кто угодно может прислать апдейт от имени владельца
+        raise RuntimeError("RUN_MODE=webhook requires WEBHOOK_SECRET (1-256 chars: A-Z a-z 0-9 _ -)")
 
     os.makedirs(data_dir, exist_ok=True)
 
@@ -60,4 +111,26 @@ def load_config() -> Config:
         log_level=log_level,
         yadisk_token=yadisk_token,
         ta_invite_code=ta_invite_code,
+        loop_lag_interval_ms=loop_lag_interval_ms,
+        loop_lag_threshold_ms=loop_lag_threshold_ms,
+        run_mode=run_mode,
+        webhook_base_url=webhook_base_url,
+        webhook_path=(os.getenv("WEBHOOK_PATH") or "/webhook").strip(),
+        webhook_secret=webhook_secret,
+        webhook_host=(os.getenv("WEBHOOK_HOST") or "0.0.0.0").strip(),
+        webhook_port=_read_int("WEBHOOK_PORT", 8080),
+        webhook_max_concurrency=_read_int("WEBHOOK_MAX_CONCURRENCY", 64),
+        webhook_drain_timeout_s=_read_int("WEBHOOK_DRAIN_TIMEOUT_S", 30),
+        webhook_metrics_token=(os.getenv("WEBHOOK_METRICS_TOKEN") or "").strip() or None,
+        update_workers=_read_int("UPDATE_WORKERS", 32),
+        update_user_queue_limit=_read_int("UPDATE_USER_QUEUE_LIMIT", 20),
+        fsm_storage=(os.getenv("FSM_STORAGE", "sqlite") or "sqlite").strip().lower(),
+        fsm_state_ttl_h=_read_int("FSM_STATE_TTL_H", 48),
+        outbox_global_per_s=_read_int("OUTBOX_GLOBAL_PER_S", 30),
+        outbox_chat_per_s=_read_int("OUTBOX_CHAT_PER_S", 1),
+        reminders_poll_s=_read_int("REMINDERS_POLL_S", 30),
+        ta_digest_window_s=_read_int("TA_DIGEST_WINDOW_S", 600),
+        yadisk_root=(os.getenv("YADISK_ROOT", "app:/") or "app:/").strip(),
+        yadisk_upload_concurrency=_read_int("YADISK_UPLOAD_CONCURRENCY", 4),
+        archive_after_days=_read_int("ARCHIVE_AFTER_DAYS", 14),
     )
@@ -0,0 +1,82 @@
+"""
+Доменные события об изменении данных курса.
+
+Публикуются сервисами через EventBus (app/services/event_bus.py) после успешной
+записи в CSV. Каждое событие несёт строку таблицы в том виде, в каком она
+записана, чтобы подписчикам не приходилось перечитывать таблицу.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from app.utils.time import now_iso
+
+
+@dataclass(frozen=True)
+class DomainEvent:
+    occurred_at: str = field(default_factory=now_iso, kw_only=True)
+
+
+# ── slots.csv ────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class SlotCreated(DomainEvent):
+    slot: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class SlotStatusChanged(DomainEvent):
+    slot_id: str
+    status: str  # free | closed
+
+
+@dataclass(frozen=True)
+class SlotCanceled(DomainEvent):
+    slot: Dict[str, Any]
+
+
+# ── bookings.csv ─────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class BookingCreated(DomainEvent):
+    booking: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class BookingCanceled(DomainEvent):
+    booking: Dict[str, Any]
+
+
+# ── users.csv ────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class UserUpserted(DomainEvent):
+    user: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class RoleChanged(DomainEvent):
+    tg_id: int
+    old_role: Optional[str]
+    new_role: str
+
+
+@dataclass(frozen=True)
+class UserDeleted(DomainEvent):
+    tg_id: int
+
+
+# ── assignments.csv / grades.csv ─────────────────────────────────────────────
+@dataclass(frozen=True)
+class AssignmentSet(DomainEvent):
+    student_code: str
+    week: int
+    ta_code: str
+
+
+@dataclass(frozen=True)
+class GradeSet(DomainEvent):
+    grade: Dict[str, Any]
+
+
+# ── submissions.csv ──────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class SubmissionCreated(DomainEvent):
+    submission: Dict[str, Any]
@@ -1,6 +1,16 @@
-from typing import Protocol
+from typing import BinaryIO, Optional, Protocol
 
 class Storage(Protocol):
     async def save_bytes(self, path: str, content: bytes) -> str:
         """Сохранить и вернуть путь/URL"""
         ...
+
+    async def save_file(self, path: str, src: str, sha256: Optional[str] = None) -> str:
+        """Забрать готовый локальный файл src (временный, после вызова не нужен) и вернуть путь/URL.
+        sha256 — уже посчитанная контрольная сумма src, если есть"""
+        ...
+
+    def open(self, path: str) -> BinaryIO:
+        """Открыть на чтение файл по пути/URL из save_* или по локатору архивного бандла
+        (bundle://…, см. bundles.py). Блокирующий вызов; нет локальной копии — FileNotFoundError"""
+        ...
@@ -0,0 +1,174 @@
+"""
+Архивные бандлы: много мелких файлов в одном файле с индексом смещений (холодный слой).
+
+Формат бандла archive/<имя>.bnd — записи подряд, без общего заголовка:
+
+    [magic b"SBM1"][метод: 1 байт][исходный размер: 8 байт LE][данные …]
+
+метод 0 — как есть (pdf/jpg/png/zip… уже сжаты), 1 — zlib. Рядом лежит индекс
+<имя>.idx.csv (name, offset, length, size, sha256, method) — для просмотра, проверки и GC.
+
+Ссылка на файл в бандле (локатор) — bundle://<путь бандла от корня хранилища>#<offset>+<length>.
+Чтение по локатору — один seek и последовательное чтение записи, индекс не нужен: O(1)
+по числу файлов в бандле. open_stored() понимает и локаторы, и обычные локальные пути —
+им пользуются Storage.open() локальных хранилищ.
+"""
+
+from __future__ import annotations
+import csv, hashlib, io, os, re, struct, tempfile, zlib
+from typing import BinaryIO, Dict, List, Optional
+
+BUNDLE_SCHEME = "bundle://"
+ARCHIVE_DIR = "archive"
+INDEX_COLUMNS = ["name", "offset", "length", "size", "sha256", "method"]
+
+_HEADER = struct.Struct("<4sBQ")
+_MAGIC = b"SBM1"
+STORED, ZLIB = 0, 1
+CHUNK_SIZE = 1024 * 1024
+# уже сжатые форматы: zlib их не уменьшит, только потратит CPU
+_PRECOMPRESSED = {".pdf", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".zip", ".7z", ".rar", ".gz",
+                  ".docx", ".xlsx", ".pptx", ".mp4", ".mov"}
+
+_LOCATOR = re.compile(r"^bundle://(?P<bundle>[^#]+)#(?P<offset>\d+)\+(?P<length>\d+)$")
+
+
+def is_locator(path: str) -> bool:
+    return str(path).startswith(BUNDLE_SCHEME)
+
+
+def parse_locator(locator: str):
+    """(путь бандла от корня хранилища, offset, length); ValueError — не локатор."""
+    m = _LOCATOR.match(str(locator))
+    if m is None:
+        raise ValueError(f"Not a bundle locator: {locator!r}")
+    return m["bundle"], int(m["offset"]), int(m["length"])
+
+
+def index_path(bundle_path: str) -> str:
+    return os.path.splitext(bundle_path)[0] + ".idx.csv"
+
+
+class BundleWriter:
+    """
+    Пишет бандл во временный файл; commit() делает fsync, атомарно переименовывает
+    его в root/archive/<name>.bnd и пишет индекс. До commit() локаторы недействительны.
+    """
+
+    def __init__(self, root: str, name: str, level: int = 6):
+        self.root = root
+        self.rel_path = os.path.join(ARCHIVE_DIR, name + ".bnd")
+        self.path = os.path.join(root, self.rel_path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".tmp-")
+        self._f = os.fdopen(fd, "wb")
+        self.level = level
+        self.entries: List[Dict] = []
+        self.bytes_in = 0
+
+    def add(self, name: str, src: str) -> str:
+        """Дописать файл src в бандл под именем name; вернуть локатор."""
+        size = os.path.getsize(src)
+        method = STORED if os.path.splitext(src)[1].lower() in _PRECOMPRESSED else ZLIB
+        offset = self._f.tell()
+        self._f.write(_HEADER.pack(_MAGIC, method, size))
+        digest = hashlib.sha256()
+        packer = zlib.compressobj(self.level) if method == ZLIB else None
+        with open(src, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                digest.update(chunk)
+                self._f.write(packer.compress(chunk) if packer else chunk)
+        if packer:
+            self._f.write(packer.flush())
+        length = self._f.tell() - offset
+        self.entries.append({"name": name, "offset": offset, "length": length, "size": size,
+                             "sha256": digest.hexdigest(), "method": method})
+        self.bytes_in += size
+        return f"{BUNDLE_SCHEME}{self.rel_path}#{offset}+{length}"
+
+    @property
+    def bytes_out(self) -> int:
+        return self._f.tell()
+
+    def commit(self) -> str:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+        os.replace(self._tmp, self.path)
+        with open(index_path(self.path), "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, INDEX_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.entries)
+        return self.path
+
+    def abort(self) -> None:
+        self._f.close()
+        if os.path.exists(self._tmp):
+            os.unlink(self._tmp)
+
+
+def read_index(bundle_path: str) -> List[Dict]:
+    with open(index_path(bundle_path), newline="", encoding="utf-8") as f:
+        return [{**row, **{k: int(row[k]) for k in ("offset", "length", "size", "method")}}
+                for row in csv.DictReader(f)]
+
+
+class _Member(io.RawIOBase):
+    """Поток распакованного содержимого одной записи бандла."""
+
+    def __init__(self, f: BinaryIO, length: int, method: int):
+        self._f = f
+        self._left = length
+        self._z = zlib.decompressobj() if method == ZLIB else None
+
+    def readable(self) -> bool:
+        return True
+
+    def _more(self, n: int) -> bytes:
+        if self._z is None:
+            data = self._f.read(min(n, self._left))
+            self._left -= len(data)
+            return data
+        while True:
+            if self._z.unconsumed_tail:
+                src = self._z.unconsumed_tail
+            elif self._left:
+                src = self._f.read(min(CHUNK_SIZE, self._left))
+                self._left -= len(src)
+            else:
+                return self._z.flush()
+            out = self._z.decompress(src, n)
+            if out:
+                return out
+
+    def readinto(self, b) -> int:
+        data = self._more(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        self._f.close()
+        super().close()
+
+
+def open_member(root: str, locator: str) -> BinaryIO:
+    bundle, offset, length = parse_locator(locator)
+    f = open(os.path.join(root, bundle), "rb")
+    try:
+        f.seek(offset)
+        magic, method, _size = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"Corrupted bundle entry: {locator}")
+    except BaseException:
+        f.close()
+        raise
+    return io.BufferedReader(_Member(f, length - _HEADER.size, method), CHUNK_SIZE)
+
+
+def open_stored(root: Optional[str], path: str) -> BinaryIO:
+    """Открыть сохранённый файл: локатор бандла под root или обычный локальный путь."""
+    if is_locator(path):
+        if root is None:
+            raise FileNotFoundError(path)
+        return open_member(root, path)
+    return open(path, "rb")
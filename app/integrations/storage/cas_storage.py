@@ -0,0 +1,192 @@
+"""
+Контентно-адресуемое хранилище файлов (реализация протокола Storage).
+
+- Блоб хранится один раз по sha256: blobs/ab/cd/abcd….<ext> (двухуровневое шардирование,
+  чтобы в одном каталоге не скапливались десятки тысяч файлов). Блобы неизменяемы;
+  save_* возвращает локальный путь блоба, как и LocalDiskStorage.
+- Логический путь (submissions/<student>/<task>/<name>) — строка манифеста в index.sqlite3:
+  каждая загрузка по тому же пути добавляет версию (L1: версионированные пересдачи),
+  повтор последней версии — no-op (L1: идемпотентность по контрольной сумме).
+- Счётчик ссылок блоба = число версий, которые на него указывают; блоб удаляется
+  вместе с последней ссылкой (delete).
+- Совпадающие загрузки (повтор, один материал для нескольких недель/групп) не пишут
+  на диск ничего, кроме строки индекса.
+"""
+
+from __future__ import annotations
+import asyncio, errno, hashlib, os, shutil, sqlite3, tempfile, threading
+from typing import BinaryIO, Dict, List, Optional
+
+from app.utils.metrics import METRICS
+from app.utils.time import now_iso
+from .base import Storage
+from .bundles import open_stored
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256   TEXT PRIMARY KEY,
+    file     TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    refcount INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS manifest (
+    path     TEXT NOT NULL,
+    version  INTEGER NOT NULL,
+    sha256   TEXT NOT NULL,
+    saved_at TEXT NOT NULL,
+    PRIMARY KEY (path, version)
+);
+"""
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(Storage):
+    def __init__(self, root: str):
+        self.root = root
+        self.blobs_dir = os.path.join(root, "blobs")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite3"), isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    # ── Storage ──────────────────────────────────────────────────────────────
+    async def save_bytes(self, path: str, content: bytes) -> str:
+        return await asyncio.to_thread(self._save_bytes, path, content)
+
+    async def save_file(self, path: str, src: str, sha256: Optional[str] = None) -> str:
+        return await asyncio.to_thread(self._save_file, path, src, sha256)
+
+    def open(self, path: str) -> BinaryIO:
+        return open_stored(self.root, path)
+
+    # ── queries ──────────────────────────────────────────────────────────────
+    def _blob_file(self, sha256: str, path: str) -> str:
+        ext = os.path.splitext(path)[1].lower()
+        return os.path.join(sha256[:2], sha256[2:4], sha256 + ext)
+
+    def _known_blob(self, sha256: str) -> Optional[str]:
+        row = self._db.execute("SELECT file FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        return os.path.join(self.blobs_dir, row[0]) if row else None
+
+    def versions(self, path: str) -> List[Dict]:
+        rows = self._db.execute(
+            "SELECT m.version, m.sha256, b.size, m.saved_at, b.file FROM manifest m JOIN blobs b USING (sha256) "
+            "WHERE m.path = ? ORDER BY m.version", (path,)).fetchall()
+        return [{"version": v, "sha256": h, "size": s, "saved_at": t, "blob_path": os.path.join(self.blobs_dir, f)}
+                for v, h, s, t, f in rows]
+
+    def manifest(self, prefix: str) -> Dict[str, Dict]:
+        """Последние версии всех путей под prefix (например, submissions/S-1/W01/)."""
+        rows = self._db.execute(
+            "SELECT m.path, MAX(m.version), m.sha256, b.size, m.saved_at, b.file "
+            "FROM manifest m JOIN blobs b USING (sha256) "
+            "WHERE m.path >= ? AND m.path < ? GROUP BY m.path ORDER BY m.path",
+            (prefix, prefix + "￿")).fetchall()
+        return {p: {"version": v, "sha256": h, "size": s, "saved_at": t, "blob_path": os.path.join(self.blobs_dir, f)}
+                for p, v, h, s, t, f in rows}
+
+    def refcount(self, sha256: str) -> int:
+        row = self._db.execute("SELECT refcount FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        return row[0] if row else 0
+
+    # ── mutations ────────────────────────────────────────────────────────────
+    def _save_bytes(self, path: str, content: bytes) -> str:
+        sha256 = hashlib.sha256(content).hexdigest()
+        known = self._known_blob(sha256)
+        if known and os.path.exists(known):
+            return self._link(path, sha256, len(content), None)
+        fd, tmp = tempfile.mkstemp(dir=self.blobs_dir, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        return self._link(path, sha256, len(content), tmp)
+
+    def _save_file(self, path: str, src: str, sha256: Optional[str]) -> str:
+        return self._link(path, sha256 or _file_sha256(src), os.path.getsize(src), src)
+
+    def _link(self, path: str, sha256: str, size: int, src: Optional[str]) -> str:
+        """Добавить версию path → sha256; src (если есть) становится блобом или удаляется."""
+        try:
+            with self._lock:
+                last = self._db.execute(
+                    "SELECT sha256 FROM manifest WHERE path = ? ORDER BY version DESC LIMIT 1", (path,)).fetchone()
+                known = self._known_blob(sha256)
+                # файла нет, хотя строка есть — блоб убран GC в карантин: записываем его заново
+                blob = known if known and os.path.exists(known) else None
+                if last and last[0] == sha256 and blob is not None:
+                    METRICS.inc("cas_dedup_total", reason="same_version")
+                    return blob
+                if blob is None:
+                    if src is None:
+                        raise FileNotFoundError(f"blob {sha256} is not stored")
+                    file = os.path.relpath(known, self.blobs_dir) if known else self._blob_file(sha256, path)
+                    blob = os.path.join(self.blobs_dir, file)
+                    os.makedirs(os.path.dirname(blob), exist_ok=True)
+                    self._move_into(src, blob)
+                    src = None
+                    METRICS.inc("cas_blobs_written_total")
+                    METRICS.inc("cas_bytes_written_total", size)
+                else:
+                    file = os.path.relpath(blob, self.blobs_dir)
+                    METRICS.inc("cas_dedup_total", reason="shared_blob")
+                with self._db:
+                    self._db.execute("BEGIN IMMEDIATE")
+                    self._db.execute(
+                        "INSERT INTO blobs (sha256, file, size, refcount) VALUES (?, ?, ?, 1) "
+                        "ON CONFLICT(sha256) DO UPDATE SET refcount = refcount + 1", (sha256, file, size))
+                    self._db.execute(
+                        "INSERT INTO manifest (path, version, sha256, saved_at) "
+                        "SELECT ?, COALESCE(MAX(version), 0) + 1, ?, ? FROM manifest WHERE path = ?",
+                        (path, sha256, now_iso(), path))
+                return blob
+        finally:
+            if src is not None and os.path.exists(src):
+                os.unlink(src)
+
+    def _move_into(self, src: str, blob: str) -> None:
+        try:
+            os.replace(src, blob)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # временный файл на другой ФС: копия рядом с блобами, затем атомарное переименование
+            fd, tmp = tempfile.mkstemp(dir=self.blobs_dir, prefix=".tmp-")
+            os.close(fd)
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, blob)
+
+    def forget(self, sha256: str) -> int:
+        """Удалить блоб из индекса вместе со всеми версиями, которые на него указывают (файл блоба
+        уже убран — так GC хранилища окончательно удаляет осиротевший блоб). Вернуть число версий."""
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            versions = self._db.execute("DELETE FROM manifest WHERE sha256 = ?", (sha256,)).rowcount
+            self._db.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+        return versions
+
+    def delete(self, path: str) -> int:
+        """Удалить все версии path; блобы без ссылок удаляются. Вернуть число удалённых версий."""
+        with self._lock:
+            rows = self._db.execute("SELECT sha256 FROM manifest WHERE path = ?", (path,)).fetchall()
+            if not rows:
+                return 0
+            with self._db:
+                self._db.execute("BEGIN IMMEDIATE")
+                self._db.execute("DELETE FROM manifest WHERE path = ?", (path,))
+                self._db.executemany("UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = ?", rows)
+                orphans = self._db.execute("SELECT file FROM blobs WHERE refcount <= 0").fetchall()
+                self._db.execute("DELETE FROM blobs WHERE refcount <= 0")
+            for (file,) in orphans:
+                os.unlink(os.path.join(self.blobs_dir, file))
+            return len(rows)
@@ -1,5 +1,7 @@
-import os
+import asyncio, errno, os, shutil, tempfile
+from typing import BinaryIO, Optional
 from .base import Storage
+from .bundles import open_stored
 
 class LocalDiskStorage(Storage):
     def __init__(self, root: str):
@@ -7,8 +9,46 @@ class LocalDiskStorage(Storage):
         os.makedirs(self.root, exist_ok=True)
 
     async def save_bytes(self, path: str, content: bytes) -> str:
+        return await asyncio.to_thread(self._write_atomic, path, content)
+
+    async def save_file(self, path: str, src: str, sha256: Optional[str] = None) -> str:
+        return await asyncio.to_thread(self._move_atomic, path, src)
+
+    def open(self, path: str) -> BinaryIO:
+        return open_stored(self.root, path)
+
+    def _target(self, path: str) -> str:
         full = os.path.join(self.root, path)
         os.makedirs(os.path.dirname(full), exist_ok=True)
-        with open(full, "wb") as f:
-            f.write(content)
+        return full
+
+    def _write_atomic(self, path: str, content: bytes) -> str:
+        full = self._target(path)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(full), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp, full)
+        except BaseException:
+            os.unlink(tmp)
+            raise
         return full  # локальный путь
+
+    def _move_atomic(self, path: str, src: str) -> str:
+        full = self._target(path)
+        try:
+            os.replace(src, full)  # та же ФС — атомарное переименование
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # другая ФС: копируем рядом с целью, затем атомарно переименовываем
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(full), prefix=".tmp-")
+            os.close(fd)
+            try:
+                shutil.copyfile(src, tmp)
+                os.replace(tmp, full)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            os.unlink(src)
+        return full
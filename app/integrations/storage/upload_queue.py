@@ -0,0 +1,146 @@
+"""
+Фоновая очередь загрузок в удалённое хранилище.
+
+Владелец очереди сам кладёт файл в надёжное место (spool) и ставит его под ключом:
+enqueue(key, src). Воркеры вызывают upload(key, src); хендлер сети не ждёт.
+
+- не больше workers одновременных загрузок;
+- ошибка — повтор через retry_delay·2^n (до max_attempts попыток), затем состояние failed,
+  файл не трогается (его можно поставить снова, например после рестарта);
+- повторная постановка того же ключа вытесняет ещё не загруженную старую версию;
+- status(key) — queued | uploading | done | failed, число попыток и последняя ошибка;
+  статусы done хранятся только для последних keep_done ключей (старые вытесняются),
+  иначе за долгую работу бота словарь статусов рос бы на каждую сдачу;
+- метрики с меткой queue=<name>: upload_queue_depth, upload_queue_done_total,
+  upload_queue_failed_total, upload_queue_seconds (от постановки до успешной загрузки).
+"""
+
+from __future__ import annotations
+import asyncio, logging, time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.utils.metrics import METRICS
+from app.utils.time import now_iso
+
+log = logging.getLogger(__name__)
+
+Uploader = Callable[[str, str], Awaitable[None]]
+
+
+@dataclass
+class UploadStatus:
+    key: str
+    state: str            # queued | uploading | done | failed
+    attempts: int = 0
+    error: str = ""
+    updated_at: str = ""
+    enqueued: float = field(default_factory=time.monotonic, repr=False)
+
+
+class UploadQueue:
+    def __init__(self, upload: Uploader, name: str = "storage", workers: int = 4,
+                 max_attempts: int = 5, retry_delay: float = 30.0, drain_timeout: float = 30.0,
+                 keep_done: int = 1000):
+        self.upload = upload
+        self.name = name
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.drain_timeout = drain_timeout
+        self.keep_done = keep_done
+        self._queue: asyncio.Queue[Tuple[str, str]] = asyncio.Queue()
+        self._statuses: Dict[str, UploadStatus] = {}
+        self._latest: Dict[str, str] = {}  # key → файл последней поставленной версии
+        self._done: Dict[str, None] = {}    # ключи со статусом done в порядке завершения
+        self._tasks: List[asyncio.Task] = []
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def enqueue(self, key: str, src: str) -> None:
+        self._latest[key] = src
+        self._done.pop(key, None)
+        self._statuses[key] = UploadStatus(key, "queued", updated_at=now_iso())
+        self._queue.put_nowait((key, src))
+        self._update_depth()
+
+    def status(self, key: str) -> Optional[UploadStatus]:
+        return self._statuses.get(key)
+
+    def depth(self) -> int:
+        return sum(1 for s in self._statuses.values() if s.state in ("queued", "uploading"))
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+    async def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker(), name=f"{self.name}-upload-{i}")
+                           for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Дождаться очереди (не дольше drain_timeout) и остановить воркеры."""
+        try:
+            await asyncio.wait_for(self._queue.join(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+        if self.depth():
+            log.warning("Upload queue %s stopped with %d pending uploads", self.name, self.depth())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ── internals ────────────────────────────────────────────────────────────
+    def _update_depth(self) -> None:
+        METRICS.set("upload_queue_depth", self.depth(), queue=self.name)
+
+    def _set(self, status: UploadStatus, state: str, error: str = "") -> None:
+        status.state, status.updated_at = state, now_iso()
+        status.error = error
+        self._update_depth()
+
+    def _record_done(self, key: str) -> None:
+        """Запомнить завершённый ключ; статусы done сверх keep_done — самые старые — удалить."""
+        self._done[key] = None
+        while len(self._done) > self.keep_done:
+            old = next(iter(self._done))
+            del self._done[old]
+            self._statuses.pop(old, None)
+
+    async def _worker(self) -> None:
+        while True:
+            key, src = await self._queue.get()
+            try:
+                await self._process(key, src)
+            except Exception:
+                log.exception("Upload of %s crashed", key)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, key: str, src: str) -> None:
+        status = self._statuses.get(key)
+        if self._latest.get(key) != src or status is None:
+            return  # вытеснено более новой версией
+        status.attempts += 1
+        self._set(status, "uploading")
+        try:
+            await self.upload(key, src)
+        except Exception as e:
+            if status.attempts < self.max_attempts:
+                delay = self.retry_delay * 2 ** (status.attempts - 1)
+                log.warning("Upload of %s failed (attempt %d), retry in %.0fs: %s", key, status.attempts, delay, e)
+                self._set(status, "queued", error=str(e))
+                asyncio.get_running_loop().call_later(delay, self._requeue, key, src)
+                return
+            METRICS.inc("upload_queue_failed_total", queue=self.name)
+            log.error("Upload of %s failed after %d attempts: %s", key, status.attempts, e)
+            self._set(status, "failed", error=str(e))
+            return
+        if self._latest.get(key) == src:
+            del self._latest[key]
+            self._set(status, "done")
+            self._record_done(key)
+        METRICS.inc("upload_queue_done_total", queue=self.name)
+        METRICS.observe("upload_queue_seconds", time.monotonic() - status.enqueued, queue=self.name)
+
+    def _requeue(self, key: str, src: str) -> None:
+        if self._latest.get(key) == src:
+            self._queue.put_nowait((key, src))
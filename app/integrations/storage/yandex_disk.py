@@ -0,0 +1,178 @@
+"""
+Клиент REST API Яндекс.Диска и хранилище поверх него.
+
+YandexDiskClient:
+- одна aiohttp-сессия на процесс с пулом соединений (TCPConnector(limit=...), keep-alive);
+- загрузка в два шага: GET /resources/upload → href, затем потоковый PUT файла кусками
+  (aiofiles, chunked transfer) — файл целиком в память не читается;
+- родительские папки создаются по необходимости (PUT /resources, 409 — уже есть), известные кэшируются;
+- 429/5xx/сетевые ошибки повторяются с экспоненциальной задержкой (учитывается Retry-After);
+- одновременно выполняется не больше concurrency загрузок.
+
+YandexDiskStorage — протокол Storage поверх клиента: save_* ждут окончания загрузки.
+Чтобы хендлер не ждал сети, сдачи идут через локальный spool SubmissionService
+и фоновую очередь (upload_queue.py).
+"""
+
+from __future__ import annotations
+import asyncio, logging, os, posixpath, random, tempfile
+from typing import AsyncIterator, BinaryIO, Optional, Set
+
+import aiofiles
+import aiohttp
+
+from app.utils.metrics import METRICS
+from .base import Storage
+from .bundles import open_stored
+
+log = logging.getLogger(__name__)
+
+API_BASE = "https://cloud-api.yandex.net/v1/disk"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHUNK_SIZE = 256 * 1024
+
+
+class YandexDiskError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Yandex.Disk {status}: {message}")
+        self.status = status
+
+
+class _Retryable(Exception):
+    def __init__(self, reason: str, retry_after: Optional[float] = None):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class YandexDiskClient:
+    def __init__(self, token: str, base_url: str = API_BASE, root: str = "app:/",
+                 concurrency: int = 4, max_connections: int = 8, retries: int = 5,
+                 backoff: float = 0.5, timeout: float = 300.0):
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.root = root if root.endswith("/") else root + "/"
+        self.retries = retries
+        self.backoff = backoff
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=10)
+        self._sem = asyncio.Semaphore(concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._known_dirs: Set[str] = set()
+        self._auth = {"Authorization": f"OAuth {token}"}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300),
+                timeout=self.timeout,
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def remote_path(self, path: str) -> str:
+        return self.root + path.replace(os.sep, "/").lstrip("/")
+
+    # ── запросы с повторами ──────────────────────────────────────────────────
+    async def _with_retries(self, what: str, attempt_fn):
+        for attempt in range(self.retries + 1):
+            try:
+                return await attempt_fn()
+            except (_Retryable, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise YandexDiskError(getattr(e, "status", 0) or 503, f"{what}: {e}") from e
+                delay = getattr(e, "retry_after", None) or self.backoff * 2 ** attempt * (0.5 + random.random())
+                METRICS.inc("yadisk_retries_total", op=what)
+                log.warning("Yandex.Disk %s failed (%s), retry %d in %.1fs", what, e, attempt + 1, delay)
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _check(resp: aiohttp.ClientResponse, ok: Set[int]) -> None:
+        if resp.status in ok:
+            return
+        body = await resp.text()
+        if resp.status in RETRY_STATUSES:
+            retry_after = resp.headers.get("Retry-After")
+            raise _Retryable(f"HTTP {resp.status}", float(retry_after) if retry_after else None)
+        raise YandexDiskError(resp.status, body[:200])
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    async def ensure_dir(self, remote_dir: str) -> None:
+        """Создать папку и недостающих родителей (app:/a/b → app:/a, app:/a/b)."""
+        if remote_dir in self._known_dirs or remote_dir.endswith((":", ":/")):
+            return
+        parent = posixpath.dirname(remote_dir)
+        if parent != remote_dir:
+            await self.ensure_dir(parent)
+        session = await self._get_session()
+
+        async def attempt():
+            async with session.put(f"{self.base_url}/resources", params={"path": remote_dir},
+                                   headers=self._auth) as resp:
+                await self._check(resp, {201, 409})  # 409 — папка уже существует
+
+        await self._with_retries("mkdir", attempt)
+        self._known_dirs.add(remote_dir)
+
+    async def upload_file(self, path: str, src: str, overwrite: bool = True) -> str:
+        """Загрузить локальный файл src в path (относительно root); вернуть полный путь на Диске."""
+        remote = self.remote_path(path)
+        async with self._sem:
+            await self.ensure_dir(posixpath.dirname(remote))
+            session = await self._get_session()
+
+            async def attempt():
+                params = {"path": remote, "overwrite": "true" if overwrite else "false"}
+                async with session.get(f"{self.base_url}/resources/upload", params=params,
+                                       headers=self._auth) as resp:
+                    await self._check(resp, {200})
+                    href = (await resp.json())["href"]
+                # href ведёт на сервер загрузки (токен ему не нужен); тело — поток кусков файла
+                async with session.put(href, data=_file_chunks(src)) as resp:
+                    await self._check(resp, {201, 202})
+
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            await self._with_retries("upload", attempt)
+            METRICS.observe("yadisk_upload_seconds", loop.time() - started)
+            METRICS.inc("yadisk_uploaded_bytes_total", os.path.getsize(src))
+        return remote
+
+
+async def _file_chunks(src: str) -> AsyncIterator[bytes]:
+    async with aiofiles.open(src, "rb") as f:
+        while chunk := await f.read(CHUNK_SIZE):
+            yield chunk
+
+
+class YandexDiskStorage(Storage):
+    def __init__(self, client: YandexDiskClient):
+        self.client = client
+
+    async def save_bytes(self, path: str, content: bytes) -> str:
+        fd, tmp = await asyncio.to_thread(tempfile.mkstemp, prefix="yadisk-")
+        try:
+            async with aiofiles.open(fd, "wb") as f:
+                await f.write(content)
+            await self.client.upload_file(path, tmp)
+        finally:
+            await asyncio.to_thread(os.unlink, tmp)
+        return f"yadisk://{path}"
+
+    async def save_file(self, path: str, src: str, sha256: Optional[str] = None) -> str:
+        # при ошибке src остаётся на месте — вызывающий может повторить
+        await self.client.upload_file(path, src)
+        await asyncio.to_thread(os.unlink, src)
+        return f"yadisk://{path}"
+
+    def open(self, path: str) -> BinaryIO:
+        # читается только то, что ещё лежит локально (spool); файлы на Диске не скачиваются
+        if path.startswith("yadisk://"):
+            raise FileNotFoundError(path)
+        return open_stored(None, path)
+
+    async def stop(self) -> None:
+        await self.client.close()
@@ -5,15 +5,29 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from app.config import load_config
+from app.config import Config, load_config
 from app.logger import setup_logging
+from app.utils.loop_monitor import LoopLagMonitor
+from app.bot.webhook import run_webhook
+from app.bot.update_scheduler import UpdateScheduler
+from app.bot.fsm_storage import SqliteStorage
+from app.bot.outbox import Outbox
+from app.bot.file_id_cache import FileIdCache
+from app.bot.media_group import MediaGroupCollector
 
 # Services
 from app.services.roster_service import RosterService
 from app.services.task_service import TaskService
 from app.services.storage_service import build_storage
+from app.integrations.storage.yandex_disk import YandexDiskStorage
 from app.services.submission_service import SubmissionService
+from app.services.archive_service import SubmissionArchiveService
+from app.services.storage_gc_service import StorageGC
+from app.services.pdf_compile_service import SubmissionPdfCompiler, available as pdf_compile_available
+from app.services.broadcast_service import BroadcastService
+from app.services.export_service import SubmissionExportService
 from app.services.grade_service import GradeService
+from app.services.grade_import_service import GradeImportService
 from app.services.slot_service import SlotService
 from app.services.feedback_service import FeedbackService
 from app.services.audit_service import AuditService
@@ -23,7 +37,10 @@ from app.services.ta_prefs_service import TaPrefsService
 from app.services.booking_service import BookingService
 from app.services.assignments_service import AssignmentsService
 from app.services.weeks_service import WeeksService
+from app.services.ta_digest_service import TaDigestService
+from app.services.event_bus import EventBus
 from app.services.roster_ta_service import RosterTaService
+from app.services.reminder_service import ReminderService
 
 # Middlewares
 from app.bot.middlewares.actor_middleware import ActorMiddleware
@@ -35,31 +52,87 @@ from app.bot.routers.students import router as students_router
 from app.bot.routers.teachers import router as teachers_router
 from app.bot.routers.owner import router as owner_router
 
-async def main() -> None:
-    cfg = load_config()
-    setup_logging(cfg.log_level)
-    log = logging.getLogger("main")
-    os.makedirs(cfg.data_dir, exist_ok=True)
+def build_dispatcher(cfg: Config) -> Dispatcher:
+    """Собрать Dispatcher со всеми сервисами, middlewares, DI и роутерами.
 
-    bot = Bot(token=cfg.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    dp = Dispatcher(storage=MemoryStorage())
+    Роутеры — модульные синглтоны, поэтому вызывать один раз на процесс.
+    """
+    log = logging.getLogger("main")
+    if cfg.fsm_storage == "memory":
+        dp = Dispatcher(storage=MemoryStorage())
+    else:
+        fsm = SqliteStorage(os.path.join(cfg.data_dir, "fsm.sqlite3"), ttl=cfg.fsm_state_ttl_h * 3600)
+        dp = Dispatcher(storage=fsm)
+        dp.startup.register(fsm.start)
+    # первым из наших middleware: до постановки в очередь пользователя апдейт ничего не ждёт,
+    # а при остановке очереди дообрабатываются раньше, чем останавливаются сервисы
+    scheduler = UpdateScheduler(workers=cfg.update_workers, user_queue_limit=cfg.update_user_queue_limit)
+    scheduler.setup(dp)
 
-    # Services
+    # Services (изменения slots/bookings/users/assignments/grades публикуются в общую шину)
+    events = EventBus()
     roster = RosterService(cfg.data_dir)
     tasks = TaskService(cfg.data_dir)
-    storage = build_storage(cfg.storage_kind, cfg.data_dir, cfg.yadisk_token)
-    submissions = SubmissionService(cfg.data_dir, storage)
-    grades = GradeService(cfg.data_dir)
-    slots = SlotService(cfg.data_dir)
+    storage = build_storage(cfg.storage_kind, cfg.data_dir, cfg.yadisk_token,
+                            yadisk_root=cfg.yadisk_root, yadisk_concurrency=cfg.yadisk_upload_concurrency)
+    submissions = SubmissionService(cfg.data_dir, storage, spool=cfg.storage_kind == "yadisk",
+                                    upload_workers=cfg.yadisk_upload_concurrency, tasks=tasks, events=events)
+    grades = GradeService(cfg.data_dir, events, tasks=tasks)
+    slots = SlotService(cfg.data_dir, events)
     feedback = FeedbackService(cfg.data_dir)
     audit = AuditService(cfg.data_dir)
     ta_requests = TaRequestsService(cfg.data_dir)
-    users = UsersService(cfg.data_dir)
+    users = UsersService(cfg.data_dir, events)
     ta_prefs = TaPrefsService(cfg.data_dir)
-    bookings = BookingService(cfg.data_dir)
-    assignments = AssignmentsService(cfg.data_dir)
+    bookings = BookingService(cfg.data_dir, events)
+    assignments = AssignmentsService(cfg.data_dir, events)
     weeks = WeeksService(cfg.data_dir)  # Новый сервис
     roster_ta = RosterTaService(cfg.data_dir)
+    outbox = Outbox(global_rate=cfg.outbox_global_per_s, chat_rate=cfg.outbox_chat_per_s)
+    reminders = ReminderService(cfg.data_dir, slots, bookings, users, weeks, poll_interval=cfg.reminders_poll_s, events=events,
+                                tasks=tasks)
+    ta_digest = TaDigestService(slots, users, events, window_s=cfg.ta_digest_window_s)
+    file_cache = FileIdCache(cfg.data_dir)
+    albums = MediaGroupCollector()
+    exports = SubmissionExportService(cfg.data_dir, submissions, assignments, tasks)
+    grade_import = GradeImportService(grades, roster, users, tasks, assignments)
+    broadcasts = BroadcastService(cfg.data_dir, users, roster, weeks, file_cache,
+                                  os.path.join(cfg.data_dir, "materials"))
+    # холодный архив — только для локальных хранилищ: с Яндекс.Диска файлы не паковать
+    local_storage = not isinstance(storage, YandexDiskStorage)
+    archives = (SubmissionArchiveService(submissions, tasks, weeks, after_days=cfg.archive_after_days)
+                if local_storage else None)
+    storage_gc = StorageGC(submissions) if local_storage else None
+    pdf_compiler = SubmissionPdfCompiler(submissions, storage, events) if pdf_compile_available() else None
+    if pdf_compiler is None:
+        log.warning("Pillow не установлен (poetry install) — сборка фото-сдач в PDF отключена")
+
+    # Фоновые задачи: запуск по порядку, остановка — сначала источники сообщений, потом outbox
+    dp.startup.register(outbox.start)
+    dp.startup.register(reminders.start)
+    dp.startup.register(ta_digest.start)
+    dp.startup.register(submissions.start)
+    dp.startup.register(broadcasts.start)
+    if pdf_compiler is not None:
+        dp.startup.register(pdf_compiler.start)
+    if archives is not None:
+        dp.startup.register(archives.start)
+    if storage_gc is not None:
+        dp.startup.register(storage_gc.start)
+    dp.shutdown.register(albums.stop)
+    dp.shutdown.register(broadcasts.stop)
+    dp.shutdown.register(reminders.stop)
+    if archives is not None:
+        dp.shutdown.register(archives.stop)
+    if storage_gc is not None:
+        dp.shutdown.register(storage_gc.stop)
+    dp.shutdown.register(ta_digest.stop)
+    dp.shutdown.register(outbox.stop)
+    if pdf_compiler is not None:  # PDF сохраняется через storage — до остановки очереди загрузок
+        dp.shutdown.register(pdf_compiler.stop)
+    dp.shutdown.register(submissions.stop)
+    if isinstance(storage, YandexDiskStorage):  # пул соединений закрывается после очереди загрузок
+        dp.shutdown.register(storage.stop)
 
     # Bootstrap owner (если в проекте есть ensure_owner)
     try:
@@ -92,18 +165,63 @@ async def main() -> None:
     dp["assignments"] = assignments
     dp["weeks"] = weeks  # Добавляем новый сервис
     dp["roster_ta"] = roster_ta
+    dp["outbox"] = outbox
+    dp["reminders"] = reminders
+    dp["events"] = events
+    dp["ta_digest"] = ta_digest
+    dp["file_cache"] = file_cache
+    dp["albums"] = albums
+    dp["materials_dir"] = broadcasts.materials_dir
+    dp["broadcasts"] = broadcasts
+    dp["exports"] = exports
+    dp["storage_gc"] = storage_gc
+    dp["grade_import"] = grade_import
+    dp["update_scheduler"] = scheduler
 
     # Routers
     dp.include_router(common_router)
     dp.include_router(students_router)
     dp.include_router(teachers_router)
     dp.include_router(owner_router)
+    return dp
+
+async def main() -> None:
+    cfg = load_config()
+    setup_logging(cfg.log_level)
+    log = logging.getLogger("main")
+    os.makedirs(cfg.data_dir, exist_ok=True)
+
+    bot = Bot(token=cfg.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    dp = build_dispatcher(cfg)
+
+    loop_monitor = LoopLagMonitor(
+        interval=cfg.loop_lag_interval_ms / 1000,
+        threshold=cfg.loop_lag_threshold_ms / 1000,
+    )
+    loop_monitor.start()
 
     me = await bot.get_me()
     log.info("Starting bot as @%s id=%s", me.username, me.id)
     try:
-        await dp.start_polling(bot, polling_timeout=60, allowed_updates=["message", "callback_query"])
+        if cfg.run_mode == "webhook":
+            await run_webhook(
+                dp, bot,
+                base_url=cfg.webhook_base_url,
+                path=cfg.webhook_path,
+                secret=cfg.webhook_secret,
+                host=cfg.webhook_host,
+                port=cfg.webhook_port,
+                max_concurrency=cfg.webhook_max_concurrency,
+                drain_timeout=cfg.webhook_drain_timeout_s,
+                metrics_token=cfg.webhook_metrics_token,
+            )
+        else:
+            # Задача на апдейт; порядок внутри пользователя и число одновременных обработчиков
+            # обеспечивает UpdateScheduler (задачи ставят апдейты в очередь в порядке получения)
+            await dp.start_polling(bot, polling_timeout=60, handle_as_tasks=True,
+                                   allowed_updates=["message", "callback_query"])
     finally:
+        await loop_monitor.stop()
         log.info("Bot stopped")
 
 if __name__ == "__main__":
@@ -38,6 +38,18 @@ class CsvTable:
         df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
         self.write(df)
 
+    def append_rows(self, rows: list[dict]) -> None:
+        """Добавить несколько строк одной записью файла."""
+        if not rows:
+            return
+        with self.lock:
+            df = self.read()
+            for c in self.columns:
+                if c not in df.columns:
+                    df[c] = None
+            df = pd.concat([df, pd.DataFrame(rows)], ignore_index=True) if len(df) else pd.DataFrame(rows)
+            self.write(df)
+
     def upsert(self, key_cols: Iterable[str], row: dict) -> None:
         df = self.read()
         if df.empty:
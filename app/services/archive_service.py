@@ -0,0 +1,240 @@
+"""
+Холодный слой: упаковка сдач прошедших недель в архивные бандлы.
+
+Сдачи хранятся бессрочно (L1), и по файлу на сдачу в data/storage/submissions/…
+набираются сотни тысяч мелких файлов. Раз в poll_interval фоновая задача ищет
+недели, у которых дедлайн (самый поздний из tasks.csv и календаря WeeksService)
+прошёл больше after_days назад, и пакует их локальные файлы (сами сдачи и недельные
+PDF из pdf_path) в один сжатый бандл archive/Wnn-<время>.bnd (формат — bundles.py).
+
+Порядок шагов рассчитан на падение в любой момент:
+1. бандл пишется во временный файл, fsync, атомарное переименование, индекс;
+2. под блокировкой submissions.csv file_path/pdf_path заменяются локаторами
+   bundle://…#offset+length — только в строках, где путь не изменился за это время,
+   а содержимое совпадает с упакованным (sha256 строки или файла PDF с sha256 записи
+   бандла): файл, перезалитый по тому же пути после упаковки, остаётся локальным;
+3. оригиналы, на которые больше не ссылается ни одна строка, удаляются
+   (в CAS — через delete логического пути, чтобы не сломать счётчики ссылок).
+Падение до шага 2 оставляет неиспользуемый бандл, после — лишние оригиналы; данные
+не теряются, мусор убирает следующий прогон или GC хранилища.
+
+Читать файлы дальше — через Storage.open(путь_или_локатор). Сдача, пришедшая после
+архивации недели, попадёт в следующий бандл этой недели.
+Метрики: archive_bundles_total, archive_files_total, archive_bytes_in_total, archive_bytes_out_total.
+"""
+
+from __future__ import annotations
+import asyncio, hashlib, logging, os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.integrations.storage.bundles import CHUNK_SIZE, BundleWriter, index_path, is_locator
+from app.integrations.storage.cas_storage import ContentAddressedStorage
+from app.services.pdf_compile_service import pdf_rel_path
+from app.services.submission_service import SUBMISSION_COLUMNS, SubmissionService
+from app.services.task_service import TaskService
+from app.services.weeks_service import WeeksService
+from app.utils.metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = 14
+
+
+def _tg(value) -> str:
+    s = str(value).strip()
+    return "" if s in ("", "nan", "None") else s.removesuffix(".0")
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                digest.update(chunk)
+    except OSError:
+        return ""
+    return digest.hexdigest()
+
+
+class SubmissionArchiveService:
+    def __init__(self, submissions: SubmissionService, tasks: TaskService, weeks: WeeksService,
+                 after_days: int = ARCHIVE_AFTER_DAYS, poll_interval: float = 86400.0):
+        self.submissions = submissions
+        self.storage = submissions.storage
+        self.root = os.path.abspath(self.storage.root)
+        self.tasks = tasks
+        self.weeks = weeks
+        self.after_days = after_days
+        self.poll_interval = poll_interval
+        self._watcher: Optional[asyncio.Task] = None
+
+    # ── отбор ────────────────────────────────────────────────────────────────
+    def week_deadline(self, week: int) -> date:
+        deadline = self.weeks.deadline_date(week)
+        df = self.tasks.table.read()
+        if len(df):
+            mine = df["task_id"].astype(str).map(self.tasks.week_of) == week
+            parsed = pd.to_datetime(df.loc[mine, "deadline_iso"], errors="coerce", utc=True).dropna()
+            if len(parsed):
+                deadline = max(deadline, parsed.max().date())
+        return deadline
+
+    def _archivable(self, path: str) -> bool:
+        if not path or is_locator(path) or not os.path.isfile(path):
+            return False
+        full = os.path.abspath(path)
+        return os.path.commonpath([full, self.root]) == self.root
+
+    def _read(self) -> pd.DataFrame:
+        df = self.submissions.table.read()
+        for col in SUBMISSION_COLUMNS:
+            if col not in df.columns:  # таблица старой схемы
+                df[col] = ""
+        return df.fillna("")
+
+    def _weeks_of(self, df: pd.DataFrame) -> pd.Series:
+        return df["task_id"].astype(str).map(self.tasks.week_of)
+
+    def due_weeks(self, today: Optional[date] = None) -> List[int]:
+        """Недели с неархивированными локальными файлами, чей дедлайн + after_days уже прошёл."""
+        today = today or date.today()
+        df = self._read()
+        if df.empty:
+            return []
+        local = df["file_path"].astype(str).map(self._archivable) | df["pdf_path"].astype(str).map(self._archivable)
+        weeks = {int(w) for w in self._weeks_of(df[local]).dropna()}
+        return sorted(w for w in weeks if self.week_deadline(w) + timedelta(days=self.after_days) < today)
+
+    def _logical(self, r) -> Tuple[str, str]:
+        """(логический путь файла сдачи, логический путь недельного PDF) строки submissions.csv."""
+        student, task = str(r.student_code), str(r.task_id)
+        file_name = str(r.file_name) or os.path.basename(str(r.file_path))
+        owner, week_key = self.submissions.student_week(r.tg_id, student, task)
+        return self.submissions.rel_path(_tg(r.tg_id), student, task, file_name), pdf_rel_path(owner, week_key)
+
+    def _sources(self, df: pd.DataFrame, week: int) -> Dict[str, Tuple[str, str]]:
+        """Исходный файл → (имя в бандле, логический путь в хранилище)."""
+        sources: Dict[str, Tuple[str, str]] = {}
+        for r in df[self._weeks_of(df) == week].itertuples():
+            if str(r.upload_status) == "pending":
+                continue  # ещё в spool — сначала должна отработать очередь загрузок
+            logical, pdf_logical = self._logical(r)
+            path, pdf = str(r.file_path), str(r.pdf_path)
+            if self._archivable(path) and path not in sources:
+                sources[path] = (f"{r.student_code or _tg(r.tg_id)}/{r.task_id}/{r.submission_id}_"
+                                 f"{os.path.basename(logical)}", logical)
+            if self._archivable(pdf) and pdf not in sources:
+                sources[pdf] = (pdf_logical.removeprefix("submissions/"), pdf_logical)
+        return sources
+
+    # ── архивация ────────────────────────────────────────────────────────────
+    def archive_week(self, week: int) -> Optional[str]:
+        """Упаковать локальные файлы недели в новый бандл; вернуть его путь (None — нечего паковать)."""
+        df = self._read()
+        if df.empty:
+            return None
+        sources = self._sources(df, int(week))
+        if not sources:
+            return None
+
+        writer = BundleWriter(self.root, f"W{int(week):02d}-{datetime.now():%Y%m%dT%H%M%S%f}")
+        try:
+            locators = {src: writer.add(name, src) for src, (name, _) in sources.items()}
+            digests = {src: entry["sha256"] for src, entry in zip(locators, writer.entries)}
+            bundle = writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+
+        rewritten = self._rewrite(int(week), locators, digests)
+        if not rewritten:
+            for path in (bundle, index_path(bundle)):
+                os.unlink(path)
+            return None
+        self._release(sources, digests)
+
+        size = os.path.getsize(bundle)
+        METRICS.inc("archive_bundles_total")
+        METRICS.inc("archive_files_total", len(locators))
+        METRICS.inc("archive_bytes_in_total", writer.bytes_in)
+        METRICS.inc("archive_bytes_out_total", size)
+        log.info("Archived %d file(s) of week %s into %s (%d refs, %d -> %d bytes)",
+                 len(locators), week, bundle, rewritten, writer.bytes_in, size)
+        return bundle
+
+    def _rewrite(self, week: int, locators: Dict[str, str], digests: Dict[str, str]) -> int:
+        """Заменить пути строк недели локаторами; вернуть число изменённых ячеек.
+
+        Строка меняется, только если её содержимое — то, что упаковано в бандл: sha256
+        строки (для PDF — текущего файла) совпадает с sha256 записи бандла.
+        """
+        table = self.submissions.table
+        with table.lock:
+            df = table.read()
+            in_week = self._weeks_of(df) == week
+            sha = df["sha256"].astype(str) if "sha256" in df.columns else pd.Series("", index=df.index)
+            pdf_fresh = {src for src in set(df["pdf_path"].astype(str)) & locators.keys()
+                         if _sha256_file(src) == digests[src]} if "pdf_path" in df.columns else set()
+            rewritten = 0
+            for col in ("file_path", "pdf_path"):
+                df[col] = df[col].astype(object) if col in df.columns else None
+                mapped = df[col].map(locators)
+                if col == "file_path":
+                    same = sha == df[col].map(digests)
+                else:
+                    same = df[col].isin(pdf_fresh)
+                mask = in_week & mapped.notna() & same
+                df.loc[mask, col] = mapped[mask]
+                rewritten += int(mask.sum())
+            if rewritten:
+                table.write(df)
+        return rewritten
+
+    def _release(self, sources: Dict[str, Tuple[str, str]], digests: Dict[str, str]) -> None:
+        """Удалить оригиналы, на которые после замены не ссылается ни одна строка
+        и чьё содержимое всё ещё совпадает с упакованным."""
+        df = self._read()
+        live = df[~df["file_path"].map(is_locator)]
+        if isinstance(self.storage, ContentAddressedStorage):
+            # путь CAS удаляется целиком (все версии), если ни одна живая строка не пришла через него;
+            # общий с другими путями блоб останется — его держат их ссылки
+            live_logical = {path for r in live.itertuples() for path in self._logical(r)}
+            for logical in sorted({logical for _, logical in sources.values()} - live_logical):
+                self.storage.delete(logical)
+            return
+        referenced = set(df["file_path"].astype(str)) | set(df["pdf_path"].astype(str))
+        for src in sources:
+            if src in referenced or _sha256_file(src) != digests[src]:
+                continue
+            try:
+                os.unlink(src)
+                os.rmdir(os.path.dirname(src))  # убрать опустевший каталог задания
+            except OSError:
+                pass
+
+    def run_due(self, today: Optional[date] = None) -> List[str]:
+        return [b for b in (self.archive_week(w) for w in self.due_weeks(today)) if b]
+
+    # ── фоновая задача ───────────────────────────────────────────────────────
+    async def start(self) -> None:
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch(), name="submission-archive")
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
+    async def _watch(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.run_due)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Submission archiving failed")
+            await asyncio.sleep(self.poll_interval)
@@ -2,15 +2,18 @@ from __future__ import annotations
 import os
 import pandas as pd
 from typing import Optional, List, Tuple
+from app.domain.events import AssignmentSet
 from app.repositories.csv_repo import CsvTable
+from app.services.event_bus import EventBus
 from app.utils.time import now_iso
 
 COLUMNS = ["student_code","week","ta_code","created_at"]
 
 class AssignmentsService:
-    def __init__(self, data_dir: str):
+    def __init__(self, data_dir: str, events: Optional[EventBus] = None):
         path = os.path.join(data_dir, "assignments.csv")
         self.table = CsvTable(path, COLUMNS)
+        self.events = events or EventBus()
 
     def set(self, student_code: str, week: int, ta_code: str) -> None:
         df = self.table.read()
@@ -31,6 +34,7 @@ class AssignmentsService:
         
         with self.table.lock:
             df.to_csv(self.table.path, index=False)
+        self.events.publish(AssignmentSet(sc, wk, tc))
 
     def get(self, student_code: str, week: int) -> Optional[str]:
         df = self.table.read()
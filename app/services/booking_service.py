@@ -1,7 +1,9 @@
 from __future__ import annotations
 import os
 from typing import Optional
+from app.domain.events import BookingCanceled, BookingCreated
 from app.repositories.csv_repo import CsvTable
+from app.services.event_bus import EventBus
 from app.utils.ids import new_id
 from app.utils.time import now_iso
 import pandas as pd
@@ -9,8 +11,9 @@ import pandas as pd
 BOOKING_COLUMNS = ["booking_id","slot_id","student_tg_id","created_at","status"]  # status: active|canceled
 
 class BookingService:
-    def __init__(self, data_dir: str):
+    def __init__(self, data_dir: str, events: Optional[EventBus] = None):
         self.table = CsvTable(os.path.join(data_dir, "bookings.csv"), BOOKING_COLUMNS)
+        self.events = events or EventBus()
 
     def read(self) -> pd.DataFrame:
         return self.table.read()
@@ -47,6 +50,7 @@ class BookingService:
             "status": "active",
         }
         self.table.append_row(row)
+        self.events.publish(BookingCreated(row))
         return row
 
     def cancel(self, booking_id: str):
@@ -55,5 +59,8 @@ class BookingService:
             return
         mask = df["booking_id"].astype(str) == str(booking_id)
         if mask.any():
+            was_active = (df.loc[mask, "status"] == "active").any()
             df.loc[mask, "status"] = "canceled"
             self.table.write(df)
+            if was_active:
+                self.events.publish(BookingCanceled(df.loc[mask].iloc[0].to_dict()))
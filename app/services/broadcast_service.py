@@ -0,0 +1,251 @@
+"""
+Рассылка материалов недели студентам и TA (L1 §6).
+
+create(week, roles) снимает аудиторию из users.csv и roster.csv (по ролям, без дублей по tg_id)
+и пишет по строке на получателя в broadcast_deliveries.csv со статусом pending — это и
+чекпоинт, и отчёт о доставке. Фоновая задача рассылает пачками по batch_size через Outbox
+с приоритетом BROADCAST (лимиты Telegram соблюдает он же); вложения идут через FileIdCache,
+так что каждый файл загружается в Telegram один раз. После каждой пачки статусы
+(sent | failed + текст ошибки) сохраняются одной записью CSV.
+
+После рестарта start() продолжает незавершённые рассылки с pending-строк. Гарантия —
+at-least-once: получатели пачки, прерванной посреди отправки, получат материалы ещё раз.
+
+С auto=True раз в poll_interval проверяется, не открылась ли сегодня неделя
+(WeeksService.week_start_date), и для неё запускается рассылка, если материалы
+лежат в materials_dir/Wnn и рассылки по этой неделе ещё не было.
+Если задача рассылки падает сама (ошибка CSV, пропавшая строка broadcasts.csv), это
+логируется с трассировкой и считается в broadcast_crashed_total; рассылка остаётся
+running и продолжится при следующем start().
+Метрики: broadcast_sent_total, broadcast_failed_total, broadcast_crashed_total, broadcast_pending.
+"""
+
+from __future__ import annotations
+import asyncio, logging, os
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+from app.bot.file_id_cache import FileIdCache
+from app.bot.outbox import Outbox, Priority
+from app.repositories.csv_repo import CsvTable
+from app.services.roster_service import RosterService
+from app.services.users_service import TA_ROLES, UsersService
+from app.services.weeks_service import WeeksService
+from app.utils.ids import new_id
+from app.utils.metrics import METRICS
+from app.utils.time import now_iso
+
+log = logging.getLogger(__name__)
+
+BROADCAST_COLUMNS = ["broadcast_id", "week", "roles", "status", "created_by", "created_at", "finished_at",
+                     "total", "sent", "failed"]
+# status: running | done
+DELIVERY_COLUMNS = ["broadcast_id", "tg_id", "role", "status", "error", "attempted_at"]
+# status: pending | sent | failed
+
+AUDIENCE_ROLES = {"student": ("student",), "ta": TA_ROLES}
+
+
+def _tg(value) -> str:
+    s = str(value).strip()
+    return "" if s in ("", "nan", "None") else s.removesuffix(".0")
+
+
+class BroadcastService:
+    def __init__(self, data_dir: str, users: UsersService, roster: RosterService, weeks: WeeksService,
+                 file_cache: FileIdCache, materials_dir: str, batch_size: int = 50,
+                 poll_interval: float = 3600.0, auto: bool = True):
+        self.broadcasts = CsvTable(os.path.join(data_dir, "broadcasts.csv"), BROADCAST_COLUMNS)
+        self.deliveries = CsvTable(os.path.join(data_dir, "broadcast_deliveries.csv"), DELIVERY_COLUMNS)
+        self.users = users
+        self.roster = roster
+        self.weeks = weeks
+        self.file_cache = file_cache
+        self.materials_dir = materials_dir
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.auto = auto
+        self._bot: Optional[Bot] = None
+        self._outbox: Optional[Outbox] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._watcher: Optional[asyncio.Task] = None
+
+    # ── аудитория и материалы ────────────────────────────────────────────────
+    def audience(self, roles: Iterable[str]) -> List[Tuple[str, str]]:
+        """[(tg_id, role)] по ролям student/ta; users.csv главнее roster.csv."""
+        wanted = {r for role in roles for r in AUDIENCE_ROLES.get(role, (role,))}
+        seen: Dict[str, str] = {}
+        for df in (self.users.table.read(), self.roster.table.read()):
+            if df.empty:
+                continue
+            for tg_id, role in zip(df["tg_id"], df["role"].astype(str).str.strip().str.lower()):
+                tg = _tg(tg_id)
+                if tg and role in wanted and tg not in seen:
+                    seen[tg] = role
+        return list(seen.items())
+
+    def materials(self, week: int) -> List[str]:
+        week_dir = os.path.join(self.materials_dir, f"W{int(week):02d}")
+        if not os.path.isdir(week_dir):
+            return []
+        return sorted(e.path for e in os.scandir(week_dir) if e.is_file())
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def create(self, week: int, roles: Iterable[str] = ("student", "ta"), created_by: str = "") -> dict:
+        """Зафиксировать аудиторию и запустить рассылку (если сервис запущен)."""
+        row = self._prepare(week, roles, created_by)
+        self._launch(row["broadcast_id"])
+        return row
+
+    def _prepare(self, week: int, roles: Iterable[str], created_by: str) -> dict:
+        if not self.materials(week):
+            raise ValueError(f"no materials for week {week} in {self.materials_dir}")
+        roles = list(roles)
+        broadcast_id = new_id("bc")
+        recipients = self.audience(roles)
+        rows = pd.DataFrame([{"broadcast_id": broadcast_id, "tg_id": tg, "role": role, "status": "pending",
+                              "error": "", "attempted_at": ""} for tg, role in recipients],
+                            columns=DELIVERY_COLUMNS)
+        with self.deliveries.lock:
+            df = self.deliveries.read()
+            self.deliveries.write(rows if df.empty else pd.concat([df, rows], ignore_index=True))
+        row = {"broadcast_id": broadcast_id, "week": int(week), "roles": ",".join(roles), "status": "running",
+               "created_by": created_by, "created_at": now_iso(), "finished_at": "",
+               "total": len(recipients), "sent": 0, "failed": 0}
+        self.broadcasts.append_row(row)
+        log.info("Broadcast %s created: week %s, %d recipients", broadcast_id, week, len(recipients))
+        return row
+
+    def get(self, broadcast_id: str) -> Optional[dict]:
+        df = self.broadcasts.find(broadcast_id=broadcast_id)
+        return df.iloc[0].to_dict() if len(df) else None
+
+    def report(self, broadcast_id: str) -> pd.DataFrame:
+        """Отчёт о доставке: строка на получателя (tg_id, role, status, error, attempted_at)."""
+        return self.deliveries.find(broadcast_id=broadcast_id)
+
+    def summary(self, broadcast_id: str) -> Dict[str, int]:
+        counts = self.report(broadcast_id)["status"].value_counts()
+        return {s: int(counts.get(s, 0)) for s in ("pending", "sent", "failed")}
+
+    # ── lifecycle ────────────────────────────────────────────────────────────
+    async def start(self, bot: Bot, outbox: Outbox) -> None:
+        """dp.startup: продолжить незавершённые рассылки и запустить проверку открытия недель."""
+        self._bot, self._outbox = bot, outbox
+        df = await asyncio.to_thread(self.broadcasts.read)
+        for broadcast_id in df[df["status"] == "running"]["broadcast_id"].astype(str) if len(df) else []:
+            log.info("Resuming broadcast %s", broadcast_id)
+            self._launch(broadcast_id)
+        if self.auto and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch(), name="broadcast-watch")
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values()) + ([self._watcher] if self._watcher else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._watcher = None
+
+    def _launch(self, broadcast_id: str) -> None:
+        if self._outbox is None or broadcast_id in self._tasks:
+            return  # сервис ещё не запущен — рассылку подхватит start()
+        task = asyncio.get_running_loop().create_task(self._run(broadcast_id), name=f"broadcast-{broadcast_id}")
+        self._tasks[broadcast_id] = task
+        task.add_done_callback(lambda t: self._on_done(broadcast_id, t))
+
+    def _on_done(self, broadcast_id: str, task: asyncio.Task) -> None:
+        self._tasks.pop(broadcast_id, None)
+        if task.cancelled() or task.exception() is None:
+            return
+        METRICS.inc("broadcast_crashed_total")
+        log.error("Broadcast %s crashed, will resume on next start", broadcast_id, exc_info=task.exception())
+
+    # ── рассылка ─────────────────────────────────────────────────────────────
+    async def _run(self, broadcast_id: str) -> None:
+        info = await asyncio.to_thread(self.get, broadcast_id)
+        week = int(info["week"])
+        files = await asyncio.to_thread(self.materials, week)
+        week_info = await asyncio.to_thread(self.weeks.get_week, week) or {}
+        text = f"📚 <b>Неделя {week}"
+        text += f": {week_info['title']}</b>" if week_info.get("title") else "</b>"
+        text += "\n\nМатериалы недели — ниже."
+        report = await asyncio.to_thread(self.report, broadcast_id)
+        pending = [_tg(t) for t in report[report["status"] == "pending"]["tg_id"]]
+        METRICS.set("broadcast_pending", len(pending), broadcast=broadcast_id)
+        for i in range(0, len(pending), self.batch_size):
+            batch = pending[i:i + self.batch_size]
+            errors = await asyncio.gather(*[self._deliver(tg, text, files) for tg in batch])
+            await asyncio.to_thread(self._checkpoint, broadcast_id, dict(zip(batch, errors)))
+            METRICS.set("broadcast_pending", len(pending) - i - len(batch), broadcast=broadcast_id)
+        await asyncio.to_thread(self._finish, broadcast_id)
+
+    async def _deliver(self, tg_id: str, text: str, files: List[str]) -> str:
+        """Отправить получателю заголовок и файлы; вернуть текст ошибки ("" — доставлено)."""
+        chat_id = int(tg_id)
+        try:
+            await self._outbox.send_message(chat_id, text, Priority.BROADCAST, parse_mode="HTML")
+            for path in files:
+                await self.file_cache.send_document(self._bot, chat_id, path, outbox=self._outbox,
+                                                    priority=Priority.BROADCAST)
+        except (TelegramAPIError, asyncio.TimeoutError, OSError) as e:
+            METRICS.inc("broadcast_failed_total", error=type(e).__name__)
+            return f"{type(e).__name__}: {e}"[:200]
+        METRICS.inc("broadcast_sent_total")
+        return ""
+
+    def _checkpoint(self, broadcast_id: str, results: Dict[str, str]) -> None:
+        with self.deliveries.lock:
+            df = self.deliveries.read()
+            df["status"] = df["status"].astype(object)
+            df["error"] = df["error"].astype(object)
+            df["attempted_at"] = df["attempted_at"].astype(object)
+            mine = df["broadcast_id"].astype(str) == broadcast_id
+            tg = df["tg_id"].map(_tg)
+            ts = now_iso()
+            for status, keys in (("sent", [k for k, e in results.items() if not e]),
+                                 ("failed", [k for k, e in results.items() if e])):
+                mask = mine & tg.isin(keys)
+                df.loc[mask, "status"] = status
+                df.loc[mask, "attempted_at"] = ts
+            for key, error in results.items():
+                if error:
+                    df.loc[mine & (tg == key), "error"] = error
+            self.deliveries.write(df)
+
+    def _finish(self, broadcast_id: str) -> None:
+        counts = self.summary(broadcast_id)
+        with self.broadcasts.lock:
+            df = self.broadcasts.read().astype({"status": object, "finished_at": object})
+            mask = df["broadcast_id"].astype(str) == broadcast_id
+            df.loc[mask, ["status", "finished_at", "sent", "failed"]] = ["done", now_iso(), counts["sent"], counts["failed"]]
+            self.broadcasts.write(df)
+        log.info("Broadcast %s done: %d sent, %d failed", broadcast_id, counts["sent"], counts["failed"])
+
+    # ── автозапуск при открытии недели ───────────────────────────────────────
+    def opened_today(self, today: Optional[date] = None) -> List[int]:
+        """Недели, которые открываются сегодня, есть материалы и ещё не было рассылки."""
+        today = today or datetime.now(timezone.utc).date()
+        weeks = self.weeks.list_all_weeks()
+        if weeks.empty:
+            return []
+        broadcasts = self.broadcasts.read()
+        done = set(broadcasts["week"].astype(int)) if len(broadcasts) else set()
+        return [int(w) for w in weeks["week"]
+                if self.weeks.week_start_date(int(w)) == today and int(w) not in done and self.materials(int(w))]
+
+    async def _watch(self) -> None:
+        while True:
+            try:
+                for week in await asyncio.to_thread(self.opened_today):
+                    row = await asyncio.to_thread(self._prepare, week, ("student", "ta"), "auto")
+                    self._launch(row["broadcast_id"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Week broadcast check failed")
+            await asyncio.sleep(self.poll_interval)
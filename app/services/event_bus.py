@@ -0,0 +1,58 @@
+"""
+Внутрипроцессная шина событий (publish/subscribe).
+
+Сервисы публикуют доменные события (app/domain/events.py) после успешной записи,
+кэши, производные представления и уведомления подписываются на нужные типы и
+обновляются инкрементально, без полного перечитывания таблиц.
+
+- Доставка синхронная, в порядке подписки: publish() возвращается, когда все
+  обработчики отработали. Обработчики должны быть быстрыми (обновить dict,
+  поставить в очередь); тяжёлую работу — в свои фоновые задачи.
+- Подписка на базовый класс получает и все производные (subscribe(DomainEvent) — всё).
+- Ошибка обработчика логируется и не мешает ни остальным, ни публикующему сервису.
+"""
+
+from __future__ import annotations
+import logging
+from typing import Callable, Dict, List, Type, TypeVar
+
+from app.domain.events import DomainEvent
+from app.utils.metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+E = TypeVar("E", bound=DomainEvent)
+Handler = Callable[[E], None]
+
+
+class EventBus:
+    def __init__(self):
+        self._handlers: Dict[type, List[Handler]] = {}
+        self._resolved: Dict[type, List[Handler]] = {}  # тип события → обработчики по MRO
+
+    def subscribe(self, event_type: Type[E], handler: Handler) -> None:
+        self._handlers.setdefault(event_type, []).append(handler)
+        self._resolved.clear()
+
+    def unsubscribe(self, event_type: Type[E], handler: Handler) -> None:
+        handlers = self._handlers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+            self._resolved.clear()
+
+    def _handlers_for(self, event_type: type) -> List[Handler]:
+        handlers = self._resolved.get(event_type)
+        if handlers is None:
+            handlers = [h for cls in reversed(event_type.__mro__) for h in self._handlers.get(cls, ())]
+            self._resolved[event_type] = handlers
+        return handlers
+
+    def publish(self, event: DomainEvent) -> None:
+        name = type(event).__name__
+        METRICS.inc("events_published_total", event=name)
+        for handler in self._handlers_for(type(event)):
+            try:
+                handler(event)
+            except Exception:
+                METRICS.inc("event_handler_errors_total", event=name)
+                log.exception("Event handler %r failed on %s", handler, name)
@@ -0,0 +1,143 @@
+"""
+Выгрузка сдач преподавателю: ZIP по TA и неделе.
+
+Отбор: submissions.csv × tasks.csv (неделя задания; task_id вида W03 тоже понимается)
+× assignments.csv (студенты, назначенные TA на эту неделю). От каждого студента по
+каждому заданию берётся последняя версия каждого файла (по file_name), а из альбомов —
+все файлы последнего альбома (group_id): отдельные PDF и ноутбук к одному заданию
+выгружаются оба, старый альбом заменяется новым целиком.
+
+Архив пишется во временный файл по кускам (zipfile + copyfileobj): в памяти не больше
+одного куска, сколько бы ни весили сдачи. Если всё не помещается в лимит Telegram на
+документ от бота (50 МБ), сдачи раскладываются по нескольким частям. Файлы читаются
+через Storage.open, так что сдачи из архивных бандлов попадают в выгрузку как обычные.
+Файлы, которых нет на локальном диске (например, уже уехавшие на Яндекс.Диск) или
+которые больше лимита сами по себе, перечисляются в MISSING.txt первой части.
+"""
+
+from __future__ import annotations
+import logging, os, shutil, tempfile, time, zipfile
+from typing import BinaryIO, Callable, List, Optional, Tuple
+
+import pandas as pd
+
+from app.integrations.storage.bundles import is_locator
+from app.services.assignments_service import AssignmentsService
+from app.services.submission_service import SubmissionService
+from app.services.task_service import TaskService
+from app.utils.metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+TELEGRAM_DOCUMENT_LIMIT = 49 * 1024 * 1024  # 50 МБ у Bot API, с запасом на заголовки ZIP
+CHUNK_SIZE = 1024 * 1024
+ENTRY_OVERHEAD = 1024  # локальный заголовок + запись центрального каталога, с запасом
+
+
+class SubmissionExportService:
+    def __init__(self, data_dir: str, submissions: SubmissionService, assignments: AssignmentsService,
+                 tasks: TaskService, max_archive_bytes: int = TELEGRAM_DOCUMENT_LIMIT):
+        self.submissions = submissions
+        self.assignments = assignments
+        self.tasks = tasks
+        self.max_archive_bytes = max_archive_bytes
+        self.tmp_dir = os.path.join(data_dir, "tmp", "exports")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    # ── отбор ────────────────────────────────────────────────────────────────
+    def select(self, ta_code: str, week: int) -> pd.DataFrame:
+        """Актуальные файлы сдач студентов, назначенных ta_code на неделю week."""
+        subs = self.submissions.table.read()
+        assigned = self.assignments.table.read()
+        if subs.empty or assigned.empty:
+            return subs.iloc[0:0]
+        assigned = assigned[(assigned["ta_code"].astype(str) == str(ta_code)) &
+                            (pd.to_numeric(assigned["week"], errors="coerce") == int(week))]
+        students = set(assigned["student_code"].astype(str))
+
+        subs = subs[subs["student_code"].astype(str).isin(students)]
+        subs = subs[subs["task_id"].astype(str).map(self.tasks.week_of) == int(week)]
+        if subs.empty:
+            return subs
+        subs = subs.sort_values("submitted_at", kind="stable")
+        name = subs["file_name"].fillna("").astype(str)
+        subs = subs.assign(_name=name.where(name != "", subs["file_path"].astype(str)),
+                           _group=subs["group_id"].fillna("").astype(str))
+        subs = subs.drop_duplicates(["student_code", "task_id", "_name"], keep="last")
+        albums = subs[subs["_group"] != ""]
+        latest = albums.groupby(["student_code", "task_id"])["_group"].last()
+        keep = [g == "" or latest.get((sc, t)) == g
+                for sc, t, g in zip(subs["student_code"], subs["task_id"], subs["_group"])]
+        subs = subs[pd.Series(keep, index=subs.index, dtype=bool)]
+        return (subs.drop(columns=["_name", "_group"])
+                    .sort_values(["student_code", "task_id", "submitted_at"], kind="stable"))
+
+    # ── архивы ───────────────────────────────────────────────────────────────
+    def build_archives(self, ta_code: str, week: int, rows: Optional[pd.DataFrame] = None) -> List[str]:
+        """
+        Собрать ZIP-архивы (один или несколько частей); вызывающий удаляет их после отправки.
+        rows — уже отобранные select() сдачи (чтобы не читать таблицы второй раз).
+        """
+        if rows is None:
+            rows = self.select(ta_code, week)
+        items: List[Tuple[str, str, int]] = []  # (локальный файл, имя в архиве, размер)
+        missing: List[str] = []
+        for r in rows.itertuples():
+            path = str(r.file_path)
+            name = r.file_name if isinstance(getattr(r, "file_name", None), str) and r.file_name else path
+            arcname = f"{r.student_code}/{r.task_id}/{os.path.basename(name)}"
+            if is_locator(path):
+                size = int(r.size_bytes)  # исходный размер файла в бандле
+            elif os.path.isfile(path):
+                size = os.path.getsize(path)
+            else:
+                missing.append(f"{arcname}: нет на локальном диске ({path})")
+                continue
+            if size + ENTRY_OVERHEAD > self.max_archive_bytes:
+                missing.append(f"{arcname}: {size} байт — больше лимита архива")
+                continue
+            items.append((path, arcname, size))
+
+        parts: List[List[Tuple[str, str, int]]] = [[]]
+        used = 0
+        for item in items:
+            cost = item[2] + ENTRY_OVERHEAD + len(item[1])
+            if parts[-1] and used + cost > self.max_archive_bytes:
+                parts.append([])
+                used = 0
+            parts[-1].append(item)
+            used += cost
+
+        prefix = f"W{int(week):02d}_{ta_code}"
+        out_dir = tempfile.mkdtemp(dir=self.tmp_dir)
+        archives = []
+        try:
+            for n, part in enumerate(parts, 1):
+                name = f"{prefix}.zip" if len(parts) == 1 else f"{prefix}_part{n}of{len(parts)}.zip"
+                archives.append(os.path.join(out_dir, name))
+                self._write_zip(archives[-1], part, missing if n == 1 else [], self.submissions.storage.open)
+        except BaseException:
+            shutil.rmtree(out_dir, ignore_errors=True)
+            raise
+        METRICS.inc("submission_exports_total")
+        METRICS.inc("submission_export_files_total", len(items))
+        log.info("Exported %d submissions of %s/W%s into %d archive(s)", len(items), ta_code, week, len(archives))
+        return archives
+
+    @staticmethod
+    def _write_zip(target: str, items: List[Tuple[str, str, int]], missing: List[str],
+                   open_stored: Callable[[str], BinaryIO]) -> None:
+        # ZIP_STORED: pdf/ipynb/изображения почти не сжимаются, а размер части остаётся предсказуемым
+        with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for path, arcname, size in items:
+                info = (zipfile.ZipInfo(arcname, time.localtime()[:6]) if is_locator(path)
+                        else zipfile.ZipInfo.from_file(path, arcname))
+                with open_stored(path) as src, zf.open(info, "w", force_zip64=size > 0xFFFF0000) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            if missing:
+                zf.writestr("MISSING.txt", "\n".join(missing) + "\n")
+
+    def cleanup(self, archives: List[str]) -> None:
+        """Удалить архивы одной выгрузки вместе с их временной папкой."""
+        for out_dir in {os.path.dirname(path) for path in archives}:
+            shutil.rmtree(out_dir, ignore_errors=True)
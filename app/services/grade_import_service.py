@@ -0,0 +1,186 @@
+"""
+Пакетный импорт оценок из CSV/XLSX (TA и владелец).
+
+Файл: колонки student_code, task_id или week, points, comment (comment необязателен).
+Если указана только неделя — оценка ставится за единственное задание этой недели из
+tasks.csv; неделя без заданий или с несколькими заданиями без task_id — ошибка строки.
+Файл проверяется целиком до записи: студент есть в ростере (roster.csv или зарегистрирован
+в users.csv), задание есть в tasks.csv, баллы — число от 0 до max_points задания, пара
+(студент, задание) не повторяется в файле, а TA назначен этому студенту на неделю задания
+(assignments.csv; владелец оценивает всех). Принятые строки пишутся в grades.csv одним
+пакетом (GradeService.set_grades — одна перезапись файла вместо перезаписи на каждую
+оценку), отклонённые возвращаются в отчёте с номером строки файла и причиной.
+
+Разбор и проверка (check_file) читают файл и таблицы — их бот запускает в потоке;
+запись (commit) меняет индекс оценок GradeService и идёт в event loop, как и
+остальные оценки.
+"""
+
+from __future__ import annotations
+import io, math, os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from app.services.assignments_service import AssignmentsService
+from app.services.grade_service import GradeService
+from app.services.roster_service import RosterService
+from app.services.task_service import TaskService
+from app.services.users_service import UsersService
+from app.utils.metrics import METRICS
+
+MAX_IMPORT_BYTES = 5 * 1024 * 1024
+_FIRST_DATA_LINE = 2  # строка 1 — заголовок
+
+
+class GradeImportError(ValueError):
+    """Файл нельзя разобрать целиком (формат, нет обязательных колонок)."""
+
+
+@dataclass
+class GradeImportReport:
+    accepted: List[dict] = field(default_factory=list)
+    rejected: List[Tuple[int, str]] = field(default_factory=list)  # (строка файла, причина)
+
+
+def read_table(file_name: str, content: bytes) -> pd.DataFrame:
+    """CSV (разделитель , или ;) или XLSX → DataFrame строк, заголовки в нижнем регистре."""
+    ext = os.path.splitext(file_name or "")[1].lower()
+    if ext not in (".csv", ".xlsx", ".xlsm"):
+        raise GradeImportError("нужен файл .csv или .xlsx")
+    try:
+        if ext == ".csv":
+            df = pd.read_csv(io.BytesIO(content), dtype=str, sep=None, engine="python", encoding="utf-8-sig")
+        else:
+            df = pd.read_excel(io.BytesIO(content), dtype=str)  # openpyxl
+    except ImportError as e:
+        raise GradeImportError(f"не установлен модуль для чтения {ext}: {e.name}") from e
+    except (ValueError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        raise GradeImportError(f"не удалось прочитать файл: {e}") from e
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    missing = [c for c in ("student_code", "points") if c not in df.columns]
+    if "task_id" not in df.columns and "week" not in df.columns:
+        missing.append("task_id или week")
+    if missing:
+        raise GradeImportError("нет колонок: " + ", ".join(missing))
+    return df.fillna("")
+
+
+class GradeImportService:
+    def __init__(self, grades: GradeService, roster: RosterService, users: UsersService,
+                 tasks: TaskService, assignments: AssignmentsService):
+        self.grades = grades
+        self.roster = roster
+        self.users = users
+        self.tasks = tasks
+        self.assignments = assignments
+
+    # ── справочники (по одному чтению таблицы на импорт) ──────────────────────
+    def _students(self) -> Set[str]:
+        codes = set(self.roster.table.read()["student_code"].dropna().astype(str).str.strip())
+        users = self.users.table.read()
+        students = users[users["role"].astype(str).str.lower() == "student"]
+        codes.update(students["id"].dropna().astype(str).str.strip())
+        codes.discard("")
+        return codes
+
+    def _tasks(self) -> Tuple[Dict[str, Optional[float]], Dict[int, List[str]]]:
+        """(task_id → max_points, неделя → задания недели) по tasks.csv."""
+        df = self.tasks.table.read()
+        points = pd.to_numeric(df["max_points"], errors="coerce")
+        max_points = {str(t): (float(p) if pd.notna(p) else None) for t, p in zip(df["task_id"], points)}
+        week_tasks: Dict[int, List[str]] = {}
+        for task_id, week in zip(df["task_id"], pd.to_numeric(df["week"], errors="coerce")):
+            if pd.notna(week):
+                week_tasks.setdefault(int(week), []).append(str(task_id))
+        return max_points, week_tasks
+
+    def _assigned(self) -> Dict[Tuple[str, int], str]:
+        df = self.assignments.table.read()
+        weeks = pd.to_numeric(df["week"], errors="coerce")
+        return {(str(s).strip(), int(w)): str(ta).strip()
+                for s, w, ta in zip(df["student_code"], weeks, df["ta_code"]) if pd.notna(w)}
+
+    # ── проверка ─────────────────────────────────────────────────────────────
+    def validate(self, df: pd.DataFrame, ta_id: Optional[str]) -> GradeImportReport:
+        """Проверить все строки; ta_id=None — импорт владельца (без проверки назначений)."""
+        students, assigned = self._students(), self._assigned()
+        max_points, week_tasks = self._tasks()
+        report = GradeImportReport()
+        seen: Dict[Tuple[str, str], int] = {}
+        for i, row in enumerate(df.to_dict("records")):
+            line = i + _FIRST_DATA_LINE
+            student = str(row.get("student_code", "")).strip()
+            task_id = str(row.get("task_id", "")).strip()
+            week_cell = str(row.get("week", "")).strip()
+
+            if not student:
+                report.rejected.append((line, "пустой student_code"))
+                continue
+            if student not in students:
+                report.rejected.append((line, f"студента {student} нет в ростере"))
+                continue
+            if not task_id:
+                if not week_cell.isdigit():
+                    report.rejected.append((line, "не указано задание (task_id или week)"))
+                    continue
+                candidates = week_tasks.get(int(week_cell), [])
+                if not candidates:
+                    report.rejected.append((line, f"в неделе {week_cell} нет заданий"))
+                    continue
+                if len(candidates) > 1:
+                    report.rejected.append((line, f"в неделе {week_cell} несколько заданий — укажите task_id"))
+                    continue
+                task_id = candidates[0]
+            if task_id not in max_points:
+                report.rejected.append((line, f"задания {task_id} нет"))
+                continue
+            week = self.tasks.week_of(task_id)
+            if week_cell and (not week_cell.isdigit() or int(week_cell) != week):
+                report.rejected.append((line, f"задание {task_id} не из недели {week_cell}"))
+                continue
+            try:
+                points = float(str(row.get("points", "")).replace(",", "."))
+            except ValueError:
+                points = float("nan")
+            if not math.isfinite(points) or points < 0:
+                report.rejected.append((line, f"баллы «{row.get('points', '')}» — не неотрицательное число"))
+                continue
+            limit = max_points.get(task_id)
+            if limit is not None and points > limit:
+                report.rejected.append((line, f"{points:g} б. больше максимума {limit:g}"))
+                continue
+            if ta_id is not None and week is None:
+                report.rejected.append((line, f"неделя задания {task_id} неизвестна — только владелец"))
+                continue
+            if ta_id is not None and assigned.get((student, week)) != ta_id:
+                report.rejected.append((line, f"студент {student} не назначен вам на неделю {week}"))
+                continue
+            if (student, task_id) in seen:
+                report.rejected.append((line, f"повтор строки {seen[(student, task_id)]}"))
+                continue
+            seen[(student, task_id)] = line
+            report.accepted.append({"task_id": task_id, "student_code": student, "points": points,
+                                    "comment": str(row.get("comment", "")).strip()})
+        return report
+
+    # ── импорт ───────────────────────────────────────────────────────────────
+    def check_file(self, file_name: str, content: bytes, ta_id: Optional[str]) -> GradeImportReport:
+        """Разобрать и проверить файл, ничего не записывая (можно звать из потока)."""
+        if len(content) > MAX_IMPORT_BYTES:
+            raise GradeImportError(f"файл больше {MAX_IMPORT_BYTES // (1024 * 1024)} МБ")
+        return self.validate(read_table(file_name, content), ta_id)
+
+    def commit(self, report: GradeImportReport, graded_by: int) -> GradeImportReport:
+        """Записать принятые строки одним пакетом (в event loop — обновляет индекс оценок)."""
+        report.accepted = self.grades.set_grades(
+            [(r["task_id"], r["student_code"], r["points"], r["comment"]) for r in report.accepted], graded_by)
+        METRICS.inc("grade_import_accepted_total", len(report.accepted))
+        METRICS.inc("grade_import_rejected_total", len(report.rejected))
+        return report
+
+    def import_file(self, file_name: str, content: bytes, graded_by: int,
+                    ta_id: Optional[str]) -> GradeImportReport:
+        """Разобрать, проверить и записать принятые строки одним пакетом."""
+        return self.commit(self.check_file(file_name, content, ta_id), graded_by)
@@ -1,17 +1,99 @@
 from __future__ import annotations
 import os
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from app.domain.events import GradeSet
 from app.repositories.csv_repo import CsvTable
+from app.services.event_bus import EventBus
+from app.services.task_service import TaskService, week_from_task_id
 from app.utils.ids import new_id
 from app.utils.time import now_iso
 
 GRADE_COLUMNS = ["grade_id","task_id","student_code","points","comment","graded_by","graded_at"]
 
+OVERRIDE_PREFIX = "[override] "
+
+
+class GradeIndex:
+    """
+    (студент, задание) → последняя оценка, плюс суммы по студенту и по его неделям.
+    grades.csv — журнал: каждая (пере)оценка дописывает строку, действует последняя по
+    graded_at. Индекс строится одним проходом по таблице и дальше обновляется на каждой
+    оценке (новая заменяет старую в суммах) — текущие оценки и итоги студента за O(1).
+    """
+
+    def __init__(self):
+        self._latest: Dict[str, Dict[str, dict]] = {}   # студент → task_id → строка
+        self._weeks: Dict[str, Dict[Optional[int], float]] = {}
+        self._totals: Dict[str, float] = {}
+
+    def add(self, row: dict, week: Optional[int]) -> bool:
+        """Учесть оценку; False — в индексе уже есть более поздняя по этому заданию."""
+        student, task_id = str(row["student_code"]), str(row["task_id"])
+        tasks = self._latest.setdefault(student, {})
+        old = tasks.get(task_id)
+        if old is not None and str(old["graded_at"]) > str(row["graded_at"]):
+            return False
+        weeks = self._weeks.setdefault(student, {})
+        delta = float(row["points"])
+        if old is not None:
+            weeks[old["week"]] -= float(old["points"])
+            delta -= float(old["points"])
+        tasks[task_id] = {**row, "week": week}
+        weeks[week] = weeks.get(week, 0.0) + float(row["points"])
+        self._totals[student] = self._totals.get(student, 0.0) + delta
+        return True
+
+    def latest(self, student_code: str, task_id: str) -> Optional[dict]:
+        return self._latest.get(str(student_code), {}).get(str(task_id))
+
+    def for_student(self, student_code: str) -> Dict[str, dict]:
+        return self._latest.get(str(student_code), {})
+
+    def total(self, student_code: str) -> float:
+        return self._totals.get(str(student_code), 0.0)
+
+    def week_scores(self, student_code: str) -> Dict[Optional[int], float]:
+        return self._weeks.get(str(student_code), {})
+
+
 class GradeService:
-    def __init__(self, data_dir: str):
+    def __init__(self, data_dir: str, events: Optional[EventBus] = None, tasks: Optional[TaskService] = None):
         self.table = CsvTable(os.path.join(data_dir, "grades.csv"), GRADE_COLUMNS)
+        self.events = events or EventBus()
+        self.tasks = tasks
+        self.index = GradeIndex()
+        self._index_sig: Optional[Tuple[int, int]] = None
+        self._build_index()
 
-    def set_grade(self, task_id: str, student_code: str, points: float, comment: str, graded_by: int):
-        row = {
+    def _week(self, task_id: str) -> Optional[int]:
+        return self.tasks.week_of(task_id) if self.tasks is not None else week_from_task_id(task_id)
+
+    def _sig(self) -> Tuple[int, int]:
+        st = os.stat(self.table.path)
+        return st.st_mtime_ns, st.st_size
+
+    def _build_index(self) -> None:
+        with self.table.lock:
+            df = self.table.read()
+            self._index_sig = self._sig()
+        index = GradeIndex()
+        if len(df):
+            df = df.assign(points=pd.to_numeric(df["points"], errors="coerce").fillna(0.0),
+                           graded_at=df["graded_at"].fillna("").astype(str))
+            for row in df.sort_values("graded_at", kind="stable").to_dict("records"):
+                index.add(row, self._week(str(row["task_id"])))
+        self.index = index
+
+    def _fresh(self) -> GradeIndex:
+        # grades.csv правили в обход сервиса (вручную, импортом) — перестроить индекс
+        if self._sig() != self._index_sig:
+            self._build_index()
+        return self.index
+
+    @staticmethod
+    def _row(task_id: str, student_code: str, points: float, comment: str, graded_by: int) -> dict:
+        return {
             "grade_id": new_id("grd"),
             "task_id": task_id,
             "student_code": student_code,
@@ -20,9 +102,57 @@ class GradeService:
             "graded_by": graded_by,
             "graded_at": now_iso(),
         }
-        self.table.append_row(row)
+
+    def _commit(self, rows: List[dict]) -> None:
+        """Дописать строки в журнал одной записью файла, обновить индекс, опубликовать GradeSet."""
+        with self.table.lock:
+            stale = self._sig() != self._index_sig
+            self.table.append_rows(rows)
+            self._index_sig = self._sig()
+        if stale:
+            self._build_index()
+        else:
+            for row in rows:
+                self.index.add(row, self._week(row["task_id"]))
+        for row in rows:
+            self.events.publish(GradeSet(row))
+
+    def set_grade(self, task_id: str, student_code: str, points: float, comment: str, graded_by: int):
+        row = self._row(task_id, student_code, points, comment, graded_by)
+        self._commit([row])
         return row
 
+    def set_grades(self, grades: List[Tuple[str, str, float, str]], graded_by: int) -> List[dict]:
+        """Пакет оценок [(task_id, student_code, points, comment)] — одна перезапись grades.csv на весь пакет."""
+        rows = [self._row(t, s, p, c, graded_by) for t, s, p, c in grades]
+        if rows:
+            self._commit(rows)
+        return rows
+
+    def override_grade(self, task_id: str, student_code: str, points: float, comment: str, owner_tg_id: int):
+        """Исправление владельцем: обычная запись журнала с пометкой [override] в комментарии."""
+        return self.set_grade(task_id, student_code, points, OVERRIDE_PREFIX + (comment or ""), owner_tg_id)
+
     def list_grades_for_student(self, student_code: str):
+        """Вся история (пере)оценок студента, новые сверху."""
         df = self.table.find(student_code=student_code)
         return df.sort_values(by=["graded_at"], ascending=False)
+
+    # ── текущие оценки (индекс) ──────────────────────────────────────────────
+    def latest(self, student_code: str, task_id: str) -> Optional[dict]:
+        return self._fresh().latest(student_code, task_id)
+
+    def current_grades(self, student_code: str) -> List[dict]:
+        """Действующие оценки студента по заданиям (последняя по каждому), по task_id."""
+        grades = self._fresh().for_student(student_code)
+        return [grades[t] for t in sorted(grades)]
+
+    def week_grades(self, student_code: str, week: int) -> List[dict]:
+        return [g for g in self.current_grades(student_code) if g["week"] == week]
+
+    def week_score(self, student_code: str, week: int) -> Optional[float]:
+        """Сумма баллов за неделю; None — оценок за неделю нет."""
+        return self._fresh().week_scores(student_code).get(week)
+
+    def total(self, student_code: str) -> float:
+        return self._fresh().total(student_code)
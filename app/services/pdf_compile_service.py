@@ -0,0 +1,193 @@
+"""
+Сборка фото-сдач недели в один PDF.
+
+Студенты часто сдают решение фотографиями страниц. Подписчик SubmissionCreated
+собирает все PNG/JPG студента за неделю (в порядке загрузки, последняя версия
+каждого файла) в один сжатый PDF: страницы приводятся к RGB, уменьшаются до
+max_side по длинной стороне и пишутся JPEG-ом с quality. Декодирование и сжатие —
+CPU-работа, поэтому она идёт в ProcessPoolExecutor, а не в event loop и не в
+потоках (GIL). Сборка откладывается на debounce секунд после последней страницы,
+чтобы альбом и серия фото подряд давали одну пересборку.
+
+Готовый PDF сохраняется рядом с оригиналами через Storage:
+submissions/<студент>/Wnn/<студент>_Wnn.pdf, путь пишется в колонку pdf_path
+строк-страниц submissions.csv. Оригиналы, которых уже нет на локальном диске
+(уехали на Яндекс.Диск), в сборку не попадают.
+
+Pillow — зависимость проекта (pyproject.toml); если её всё же нет в окружении, сервис
+не создаётся (available()), а build_dispatcher пишет об этом предупреждение в лог.
+Метрики: pdf_compiled_total, pdf_compile_pages, pdf_compile_seconds, pdf_compile_errors_total.
+"""
+
+from __future__ import annotations
+import asyncio, logging, os, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from app.domain.events import SubmissionCreated
+from app.integrations.storage.base import Storage
+from app.services.event_bus import EventBus
+from app.services.submission_service import SubmissionService
+from app.utils.metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+MAX_SIDE = 2000   # ~A4 при 240 dpi — текст и формулы читаются, страница ~200–400 КБ
+QUALITY = 75
+
+
+def available() -> bool:
+    return find_spec("PIL") is not None
+
+
+def is_image(file_name: str) -> bool:
+    return os.path.splitext(str(file_name))[1].lower() in IMAGE_EXTS
+
+
+def pdf_rel_path(student: str, week: str) -> str:
+    """Путь недельного PDF в хранилище: submissions/<студент>/Wnn/<студент>_Wnn.pdf."""
+    label = f"W{int(week):02d}" if str(week).isdigit() else str(week).replace(":", "_")
+    return f"submissions/{student}/{label}/{student}_{label}.pdf"
+
+
+def images_to_pdf(paths: Sequence[str], out_path: str, max_side: int = MAX_SIDE, quality: int = QUALITY) -> int:
+    """Склеить изображения в PDF (выполняется в дочернем процессе); вернуть число страниц."""
+    from PIL import Image, ImageOps
+
+    pages = []
+    try:
+        for path in paths:
+            with Image.open(path) as src:
+                page = ImageOps.exif_transpose(src).convert("RGB")  # фото с телефона: учесть поворот из EXIF
+            page.thumbnail((max_side, max_side))
+            pages.append(page)
+        pages[0].save(out_path, "PDF", save_all=True, append_images=pages[1:],
+                      resolution=150.0, quality=quality, optimize=True)
+        return len(pages)
+    finally:
+        for page in pages:
+            page.close()
+
+
+class SubmissionPdfCompiler:
+    def __init__(self, submissions: SubmissionService, storage: Storage, events: EventBus,
+                 workers: int = 2, debounce: float = 2.0, max_side: int = MAX_SIDE, quality: int = QUALITY):
+        self.submissions = submissions
+        self.storage = storage
+        self.workers = workers
+        self.debounce = debounce
+        self.max_side = max_side
+        self.quality = quality
+        self.tmp_dir = os.path.join(os.path.dirname(submissions.table.path), "tmp", "pdf")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        events.subscribe(SubmissionCreated, self._on_submission)
+
+    # ── жизненный цикл ───────────────────────────────────────────────────────
+    async def start(self) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    async def stop(self) -> None:
+        """dp.shutdown: собрать отложенные недели сразу, дождаться сборок и закрыть пул."""
+        while self._timers or self._tasks:
+            for key, timer in list(self._timers.items()):
+                timer.cancel()
+                self._launch(key)
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            await asyncio.sleep(0)  # дать отработать пересборкам, запланированным по завершении
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    # ── планирование ─────────────────────────────────────────────────────────
+    def _on_submission(self, event: SubmissionCreated) -> None:
+        row = event.submission
+        if not is_image(row.get("file_name") or row.get("file_path", "")):
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:  # запись вне event loop (скрипты, импорт) — собирать некому
+            return
+        self._schedule(self.submissions.student_week(row["tg_id"], row["student_code"], row["task_id"]))
+
+    def _schedule(self, key: Tuple[str, str], delay: Optional[float] = None) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timers[key] = loop.call_later(self.debounce if delay is None else delay, self._launch, key)
+
+    def _launch(self, key: Tuple[str, str]) -> None:
+        self._timers.pop(key, None)
+        running = self._tasks.get(key)
+        if running is not None and not running.done():
+            # сборка этой недели уже идёт — пересобрать после неё, с новыми страницами
+            running.add_done_callback(lambda _: self._schedule(key, delay=0))
+            return
+        task = asyncio.get_running_loop().create_task(self.compile(*key), name=f"pdf-{key[0]}-{key[1]}")
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._tasks.pop(key, None) if self._tasks.get(key) is t else None)
+
+    # ── сборка ───────────────────────────────────────────────────────────────
+    def pages(self, student: str, week: str) -> Tuple[List[str], List[str]]:
+        """(submission_id, локальный путь) страниц недели в порядке загрузки."""
+        df = self.submissions.table.read()
+        if df.empty:
+            return [], []
+        df = df.fillna("")
+        names = df["file_name"].astype(str).where(df["file_name"].astype(str) != "",
+                                                   df["file_path"].astype(str).map(os.path.basename))
+        df = df.assign(file_name=names)
+        df = df[df["file_name"].map(is_image)]
+        mine = [self.submissions.student_week(r.tg_id, r.student_code, str(r.task_id)) == (student, week)
+                for r in df.itertuples()]
+        df = df[pd.Series(mine, index=df.index, dtype=bool)]
+        # CSV дописывается по мере приёма — порядок строк и есть порядок загрузки
+        df = df.drop_duplicates(["task_id", "file_name"], keep="last")
+        df = df[df["file_path"].astype(str).map(os.path.isfile)]
+        return df["submission_id"].astype(str).tolist(), df["file_path"].astype(str).tolist()
+
+    async def compile(self, student: str, week: str) -> Optional[str]:
+        """Собрать PDF недели и записать его путь в pdf_path; None — нечего собирать или ошибка."""
+        if self._pool is None:
+            await self.start()
+        ids, paths = await asyncio.to_thread(self.pages, student, week)
+        if not paths:
+            return None
+        fd, tmp_path = tempfile.mkstemp(suffix=".pdf", dir=self.tmp_dir)
+        os.close(fd)
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            pages = await loop.run_in_executor(self._pool, images_to_pdf, paths, tmp_path,
+                                               self.max_side, self.quality)
+            pdf_path = await self.storage.save_file(pdf_rel_path(student, week), tmp_path)
+        except Exception:
+            METRICS.inc("pdf_compile_errors_total")
+            log.exception("PDF compilation failed for %s/%s", student, week)
+            return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        await asyncio.to_thread(self._record, ids, pdf_path)
+        METRICS.inc("pdf_compiled_total")
+        METRICS.observe("pdf_compile_pages", pages)
+        METRICS.observe("pdf_compile_seconds", time.perf_counter() - started)
+        log.info("Compiled %d page(s) of %s/%s into %s", pages, student, week, pdf_path)
+        return pdf_path
+
+    def _record(self, submission_ids: List[str], pdf_path: str) -> None:
+        table = self.submissions.table
+        with table.lock:
+            df = table.read()
+            mask = df["submission_id"].astype(str).isin(submission_ids)
+            df["pdf_path"] = df["pdf_path"].astype(object) if "pdf_path" in df.columns else None
+            df.loc[mask, "pdf_path"] = pdf_path
+            table.write(df)
@@ -0,0 +1,335 @@
+"""
+Напоминания и уведомления (L1 §9) на персистентной куче таймеров.
+
+Задания выводятся из данных курса и живут в reminders.csv:
+- booking_24h / booking_1h — студенту перед записью на сдачу (slots.csv + bookings.csv);
+- deadline_24h            — студентам без загрузок за сутки до дедлайна недели (WeeksService).
+
+Уведомления преподавателям о записях собирает TaDigestService (сводка за окно).
+
+job_id детерминирован (kind:источник), поэтому повторный вывод — это diff:
+новые задания добавляются, исчезнувшие (отмена записи/слота) отменяются, сдвинутые
+по времени — переносятся. Отправленные не трогаются никогда.
+
+Таблицы-источники отслеживаются по (mtime, size): пересчитывается только затронутая
+группа заданий. События записей/слотов с шины (EventBus) будят цикл сразу, не дожидаясь
+очередного опроса; правки CSV в обход сервисов подхватываются опросом. Перед отправкой пачка помечается sent в CSV (at-most-once), поэтому
+рестарт в любой момент не приводит к повторной отправке.
+"""
+
+from __future__ import annotations
+import asyncio, heapq, logging, os
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from app.bot.outbox import Outbox, Priority
+from app.domain.events import BookingCanceled, BookingCreated, SlotCanceled, SlotCreated, SlotStatusChanged
+from app.repositories.csv_repo import CsvTable
+from app.services.booking_service import BookingService
+from app.services.event_bus import EventBus
+from app.services.slot_service import SlotService
+from app.services.submission_service import SUBMISSION_COLUMNS
+from app.services.task_service import TaskService, week_from_task_id
+from app.services.users_service import UsersService
+from app.services.weeks_service import WeeksService
+from app.utils.metrics import METRICS
+from app.utils.time import now_iso
+
+log = logging.getLogger(__name__)
+
+REMINDER_COLUMNS = ["job_id", "kind", "chat_id", "due_at", "text", "status", "created_at", "sent_at"]
+# status: pending | sent | canceled | skipped
+
+# группа → виды заданий; группа пересчитывается целиком при изменении её таблиц
+GROUPS = {
+    # ta_new_booking больше не выводится (см. TaDigestService), но остаётся в группе,
+    # чтобы оставшиеся от прежних версий pending-задания были отменены
+    "bookings": ("booking_24h", "booking_1h", "ta_new_booking"),
+    "deadlines": ("deadline_24h",),
+}
+
+MAX_LATENESS = timedelta(hours=1)   # опоздавшее сильнее задание не отправляется (простой после рестарта)
+
+# Желаемое задание: job_id → (kind, chat_id, due_at, text)
+_Desired = Dict[str, Tuple[str, str, datetime, str]]
+
+
+def _slot_start(slot: dict) -> Optional[datetime]:
+    try:
+        y, m, d = map(int, str(slot["date"]).split("-"))
+        hh, mm = map(int, str(slot["time_from"]).split(":"))
+        return datetime(y, m, d, hh, mm, tzinfo=timezone.utc)  # время слотов в проекте хранится как UTC
+    except (KeyError, ValueError):
+        return None
+
+
+def _as_dt(value: str) -> Optional[datetime]:
+    try:
+        dt = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _text(value) -> str:
+    return "" if value is None or (isinstance(value, float) and pd.isna(value)) else str(value)
+
+
+def _chat(value) -> str:
+    s = str(value).strip()
+    return s[:-2] if s.endswith(".0") else s  # tg_id после pandas может стать float
+
+
+class ReminderService:
+    def __init__(self, data_dir: str, slots: SlotService, bookings: BookingService,
+                 users: UsersService, weeks: WeeksService, batch_size: int = 200, poll_interval: float = 30.0,
+                 events: Optional[EventBus] = None, tasks: Optional[TaskService] = None):
+        self.table = CsvTable(os.path.join(data_dir, "reminders.csv"), REMINDER_COLUMNS)
+        self.submissions_path = os.path.join(data_dir, "submissions.csv")
+        self.slots = slots
+        self.bookings = bookings
+        self.users = users
+        self.weeks = weeks
+        self.tasks = tasks
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+        self._heap: List[Tuple[float, str]] = []
+        self._pending: Dict[str, float] = {}       # job_id → due (ts); записи кучи с другим due устарели
+        self._signatures: Dict[str, Tuple] = {}
+        self._runner: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stale: Set[str] = set()  # группы, о чьих изменениях сообщила шина
+        if events is not None:
+            for event_type in (BookingCreated, BookingCanceled, SlotCreated, SlotStatusChanged, SlotCanceled):
+                events.subscribe(event_type, self._on_change)
+        self._load_pending()
+
+    def _on_change(self, event) -> None:
+        self._stale.add("bookings")
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _read(self) -> pd.DataFrame:
+        return self.table.read().fillna("").astype(str)
+
+    # ── heap ─────────────────────────────────────────────────────────────────
+    def _load_pending(self) -> None:
+        df = self._read()
+        self._heap, self._pending = [], {}
+        if df.empty:
+            return
+        for r in df[df["status"] == "pending"].itertuples():
+            due = _as_dt(r.due_at)
+            if due is not None:
+                self._schedule(str(r.job_id), due.timestamp())
+
+    def _schedule(self, job_id: str, due_ts: float) -> None:
+        self._pending[job_id] = due_ts
+        heapq.heappush(self._heap, (due_ts, job_id))
+
+    def next_due(self) -> Optional[float]:
+        while self._heap and self._pending.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    # ── derivation ───────────────────────────────────────────────────────────
+    def _sources(self, group: str) -> Iterable[str]:
+        if group == "bookings":
+            return (self.bookings.table.path, self.slots.table.path)
+        return (self.weeks.table.path,)
+
+    def _signature(self, group: str) -> Tuple:
+        sig = []
+        for path in self._sources(group):
+            try:
+                st = os.stat(path)
+                sig.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def refresh(self, force: bool = False, now: Optional[datetime] = None) -> int:
+        """Пересчитать группы, чьи таблицы изменились; вернуть число изменённых заданий."""
+        changed = 0
+        for group in GROUPS:
+            sig = self._signature(group)
+            if not force and group not in self._stale and self._signatures.get(group) == sig:
+                continue
+            self._stale.discard(group)
+            desired = self._derive_bookings(now) if group == "bookings" else self._derive_deadlines(now)
+            changed += self._apply(group, desired)
+            self._signatures[group] = sig
+        return changed
+
+    def _derive_bookings(self, now: Optional[datetime]) -> _Desired:
+        now = now or datetime.now(timezone.utc)
+        desired: _Desired = {}
+        bookings = self.bookings.read()
+        slots = self.slots.table.read()
+        if bookings.empty or slots.empty:
+            return desired
+        slot_by_id = {str(r["slot_id"]): r for r in slots.to_dict("records")}
+
+        active = bookings[bookings["status"] == "active"]
+        for b in active.itertuples():
+            slot = slot_by_id.get(str(b.slot_id))
+            if not slot or str(slot.get("status")) == "canceled":
+                continue
+            start = _slot_start(slot)
+            if start is None or start <= now:
+                continue
+            created = _as_dt(b.created_at) or now
+            student = _chat(b.student_tg_id)
+            when = f"{start:%d.%m} {slot['time_from']}–{slot['time_to']}"
+            where = _text(slot.get("meeting_link") if slot.get("mode") == "online" else slot.get("location"))
+            for kind, before, label in (("booking_24h", timedelta(hours=24), "завтра"),
+                                        ("booking_1h", timedelta(hours=1), "через час")):
+                due = start - before
+                if due > created:  # запись сделана позже момента напоминания — не нужно
+                    desired[f"{kind}:{b.booking_id}"] = (
+                        kind, student, due, f"⏰ Напоминание: {label} сдача {when}. {where}".strip())
+        return desired
+
+    def _derive_deadlines(self, now: Optional[datetime]) -> _Desired:
+        now = now or datetime.now(timezone.utc)
+        desired: _Desired = {}
+        weeks = self.weeks.list_all_weeks()
+        if weeks.empty:
+            return desired
+        for r in weeks.itertuples():
+            deadline = datetime.combine(r.deadline_date, time(23, 59), timezone.utc)
+            if deadline <= now:
+                continue
+            week = int(r.week)
+            # одно задание на неделю; адресаты определяются в момент отправки
+            desired[f"deadline_24h:W{week:02d}"] = (
+                "deadline_24h", "*", deadline - timedelta(hours=24),
+                f"📤 Напоминание: дедлайн загрузки решения W{week:02d} — {r.deadline_date:%d.%m.%Y} 23:59.")
+        return desired
+
+    def _apply(self, group: str, desired: _Desired) -> int:
+        df = self._read()
+        kinds = GROUPS[group]
+        existing = df[df["kind"].isin(kinds)] if not df.empty else df
+        known = {str(r.job_id): r for r in existing.itertuples()}
+
+        changes = 0
+        new_rows = []
+        for job_id, (kind, chat_id, due, text) in desired.items():
+            row = known.get(job_id)
+            if row is None:
+                new_rows.append({"job_id": job_id, "kind": kind, "chat_id": chat_id, "due_at": due.isoformat(),
+                                 "text": text, "status": "pending", "created_at": now_iso(), "sent_at": ""})
+                self._schedule(job_id, due.timestamp())
+                changes += 1
+            elif row.status == "pending" and (_as_dt(row.due_at) != due or row.text != text
+                                              or row.chat_id != chat_id):
+                mask = df["job_id"] == job_id
+                df.loc[mask, ["due_at", "text", "chat_id"]] = [due.isoformat(), text, chat_id]
+                self._schedule(job_id, due.timestamp())
+                changes += 1
+        for job_id, row in known.items():
+            if row.status == "pending" and job_id not in desired:
+                df.loc[df["job_id"] == job_id, "status"] = "canceled"
+                self._pending.pop(job_id, None)
+                changes += 1
+        if changes:
+            if new_rows:
+                df = pd.concat([df, pd.DataFrame(new_rows, columns=REMINDER_COLUMNS)], ignore_index=True)
+            self.table.write(df)
+            log.info("Reminders %s: %d jobs changed", group, changes)
+        METRICS.set("reminders_pending", len(self._pending))
+        return changes
+
+    # ── firing ───────────────────────────────────────────────────────────────
+    def claim_due(self, now: Optional[datetime] = None) -> List[dict]:
+        """Забрать пачку наступивших заданий и пометить их в CSV до отправки (at-most-once)."""
+        now = now or datetime.now(timezone.utc)
+        ts = now.timestamp()
+        batch: List[str] = []
+        while len(batch) < self.batch_size and self.next_due() is not None and self._heap[0][0] <= ts:
+            _, job_id = heapq.heappop(self._heap)
+            del self._pending[job_id]
+            batch.append(job_id)
+        if not batch:
+            return []
+        df = self._read()
+        rows = df[df["job_id"].isin(batch) & (df["status"] == "pending")]
+        jobs, late = [], []
+        for r in rows.to_dict("records"):
+            due = _as_dt(r["due_at"])
+            (late if due is None or now - due > MAX_LATENESS else jobs).append(r)
+        df.loc[df["job_id"].isin([r["job_id"] for r in jobs]), ["status", "sent_at"]] = ["sent", now_iso()]
+        df.loc[df["job_id"].isin([r["job_id"] for r in late]), "status"] = "skipped"
+        self.table.write(df)
+        METRICS.inc("reminders_skipped_total", len(late))
+        METRICS.set("reminders_pending", len(self._pending))
+        return jobs
+
+    def _deadline_recipients(self, job_id: str) -> List[str]:
+        week = week_from_task_id(job_id.split(":", 1)[1])  # deadline_24h:W05 → 5
+        week_of = self.tasks.week_of if self.tasks is not None else week_from_task_id
+        users = self.users.table.read()
+        students = users[users["role"] == "student"] if not users.empty else users
+        done: Set[str] = set()
+        if os.path.exists(self.submissions_path):
+            subs = pd.read_csv(self.submissions_path, usecols=lambda c: c in SUBMISSION_COLUMNS)
+            if not subs.empty:
+                # задания недели — по tasks.csv (task_id вида tsk_…), сдавшие — по tg_id
+                subs = subs[subs["task_id"].astype(str).map(week_of) == week]
+                done = {_chat(v) for v in subs["tg_id"].dropna()}
+        return [_chat(r.tg_id) for r in students.itertuples() if _chat(r.tg_id) not in done]
+
+    def due_messages(self, now: Optional[datetime] = None) -> List[Tuple[int, str, Priority]]:
+        """Наступившие задания → сообщения (chat_id, текст, приоритет). Читает CSV — вызывать вне loop."""
+        messages = []
+        for job in self.claim_due(now):
+            if job["kind"] == "deadline_24h":
+                chats, priority = self._deadline_recipients(job["job_id"]), Priority.BROADCAST
+            else:
+                chats, priority = [job["chat_id"]], Priority.NOTIFY
+            messages.extend((int(c), job["text"], priority) for c in chats if c.lstrip("-").isdigit())
+            METRICS.inc("reminders_fired_total", kind=job["kind"])
+        return messages
+
+    async def fire(self, outbox: Outbox, now: Optional[datetime] = None) -> int:
+        """Отправить наступившие задания через outbox; вернуть число поставленных сообщений."""
+        messages = await asyncio.to_thread(self.due_messages, now)
+        for chat_id, text, priority in messages:
+            outbox.send_message(chat_id, text, priority=priority)
+        return len(messages)
+
+    # ── background loop ──────────────────────────────────────────────────────
+    async def start(self, outbox: Outbox) -> None:
+        """dp.startup: запустить фоновый цикл (outbox приходит из DI)."""
+        if self._runner is None:
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.create_task(self._run(outbox), name="reminders")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+
+    async def _run(self, outbox: Outbox) -> None:
+        first = True
+        while True:
+            self._wakeup.clear()  # изменения во время тика разбудят следующее ожидание
+            try:
+                # чтение CSV — в отдельном потоке, чтобы не блокировать event loop
+                await asyncio.to_thread(self.refresh, first)
+                await self.fire(outbox)
+                first = False
+            except Exception:
+                log.exception("Reminder tick failed")
+            due = self.next_due()
+            now = datetime.now(timezone.utc).timestamp()
+            timeout = min(self.poll_interval, max(0.0, due - now)) if due else self.poll_interval
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -3,7 +3,9 @@ import os
 from typing import Optional, Dict, Any
 from datetime import datetime, timezone
 import pandas as pd
+from app.domain.events import SlotCanceled, SlotCreated, SlotStatusChanged
 from app.repositories.csv_repo import CsvTable
+from app.services.event_bus import EventBus
 from app.utils.ids import new_id
 from app.utils.time import now_iso
 
@@ -15,8 +17,9 @@ SLOTS_COLUMNS = [
 ]
 
 class SlotService:
-    def __init__(self, data_dir: str):
+    def __init__(self, data_dir: str, events: Optional[EventBus] = None):
         self.table = CsvTable(os.path.join(data_dir, "slots.csv"), SLOTS_COLUMNS)
+        self.events = events or EventBus()
 
     def _read_df(self) -> pd.DataFrame:
         return self.table.read()
@@ -42,6 +45,7 @@ class SlotService:
             "cancel_reason": ""
         }
         self.table.append_row(row)
+        self.events.publish(SlotCreated(row))
         return row
 
     def list_for_teacher(self, ta_id: str) -> pd.DataFrame:
@@ -140,6 +144,7 @@ class SlotService:
         new_status = "free" if is_open else "closed"
         df.loc[mask, "status"] = new_status
         self.table.write(df)
+        self.events.publish(SlotStatusChanged(slot_id, new_status))
         return True
 
     def cancel_slot(self, slot_id: str, canceled_by: str = "", reason: str = "") -> bool:
@@ -151,11 +156,14 @@ class SlotService:
         if not mask.any():
             return False
         
+        was_canceled = (df.loc[mask, "status"] == "canceled").all()
         df.loc[mask, "status"] = "canceled"
         df.loc[mask, "canceled_by"] = canceled_by
         df.loc[mask, "canceled_at"] = now_iso()
         df.loc[mask, "cancel_reason"] = reason
         self.table.write(df)
+        if not was_canceled:
+            self.events.publish(SlotCanceled(df.loc[mask].iloc[0].to_dict()))
         return True
 
     # =================== НОВЫЕ МЕТОДЫ ДЛЯ ВЫЧИСЛЯЕМЫХ СТАТУСОВ ===================
@@ -0,0 +1,213 @@
+"""
+Сборщик мусора локального хранилища (STORAGE_KIND=cas|local).
+
+Пересдачи в LocalDiskStorage, удалённые строки, упавшие записи и недописанные бандлы
+оставляют в data/storage файлы, на которые не ссылается ни одна строка submissions.csv
+(file_path, pdf_path, бандлы из локаторов bundle://). Проход GC:
+
+1. снимок множества ссылок;
+2. обход дерева os.scandir пачками по batch_size, без списка всех файлов в памяти;
+   между пачками — пауза (не больше files_per_s файлов в секунду), а пока идут сдачи
+   (SubmissionService.active_uploads) — ожидание: GC не конкурирует с приёмом файлов;
+3. сироты пачки (перед перемещением ссылки перечитываются) переезжают в карантин
+   storage/.quarantine/<тот же путь>; файлы моложе min_age не трогаются — сдача
+   могла лечь в хранилище, но ещё не попасть в таблицу;
+4. карантин разбирается: файл, на который снова сослались, возвращается на место,
+   пролежавший quarantine_days — удаляется (в CAS — вместе с записями индекса, forget).
+
+Итог прохода — GcReport; «можно освободить» = байты в карантине. Владелец запускает
+проход командой /storage_gc, иначе он идёт сам раз в poll_interval.
+Метрики: storage_gc_scanned_total, storage_gc_quarantined_total, storage_gc_purged_bytes_total,
+storage_gc_reclaimable_bytes.
+"""
+
+from __future__ import annotations
+import asyncio, logging, os, time
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import Iterator, List, Optional, Set, Tuple
+
+from app.integrations.storage.bundles import index_path, is_locator, parse_locator
+from app.integrations.storage.cas_storage import ContentAddressedStorage
+from app.services.submission_service import SubmissionService
+from app.utils.metrics import METRICS
+from app.utils.time import now_iso
+
+log = logging.getLogger(__name__)
+
+QUARANTINE_DIR = ".quarantine"
+_SKIP_AT_ROOT = ("index.sqlite3",)  # индекс CAS (+ -wal/-shm)
+
+Entry = Tuple[str, int, float]  # (абсолютный путь, размер, mtime)
+
+
+@dataclass
+class GcReport:
+    started_at: str
+    finished_at: str = ""
+    scanned: int = 0
+    quarantined: int = 0
+    quarantined_bytes: int = 0
+    restored: int = 0
+    purged: int = 0
+    purged_bytes: int = 0
+    reclaimable: int = 0        # файлов в карантине после прохода
+    reclaimable_bytes: int = 0
+
+
+class StorageGC:
+    def __init__(self, submissions: SubmissionService, batch_size: int = 256, files_per_s: float = 1000.0,
+                 min_age: float = 3600.0, quarantine_days: float = 7.0, poll_interval: float = 6 * 3600.0):
+        self.submissions = submissions
+        self.storage = submissions.storage
+        self.root = os.path.abspath(self.storage.root)
+        self.quarantine_dir = os.path.join(self.root, QUARANTINE_DIR)
+        self.batch_size = batch_size
+        self.files_per_s = files_per_s
+        self.min_age = min_age
+        self.quarantine_days = quarantine_days
+        self.poll_interval = poll_interval
+        self.last_report: Optional[GcReport] = None
+        self._running = asyncio.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+        self._manual: Set[asyncio.Task] = set()
+
+    # ── ссылки и обход ───────────────────────────────────────────────────────
+    def referenced(self) -> Set[str]:
+        """Абсолютные пути файлов хранилища, на которые ссылается submissions.csv."""
+        df = self.submissions.table.read()
+        refs: Set[str] = set()
+        for col in ("file_path", "pdf_path"):
+            if col not in df.columns:
+                continue
+            for path in df[col].dropna().astype(str):
+                if is_locator(path):
+                    bundle = os.path.join(self.root, parse_locator(path)[0])
+                    refs.update((os.path.abspath(bundle), os.path.abspath(index_path(bundle))))
+                elif path:
+                    refs.add(os.path.abspath(path))
+        return refs
+
+    def _walk(self) -> Iterator[Entry]:
+        stack = [self.root]
+        while stack:
+            top = stack.pop()
+            with os.scandir(top) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path != self.quarantine_dir:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        if top == self.root and entry.name.startswith(_SKIP_AT_ROOT) or entry.name.endswith(".lock"):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                        yield os.path.abspath(entry.path), st.st_size, st.st_mtime
+
+    async def _idle(self) -> None:
+        """Дождаться, пока не идёт ни одной сдачи."""
+        while self.submissions.active_uploads:
+            await asyncio.sleep(0.5)
+
+    # ── карантин ─────────────────────────────────────────────────────────────
+    def _quarantine(self, orphans: List[Entry]) -> Tuple[int, int]:
+        moved = size = 0
+        now = time.time()
+        for path, bytes_, _ in orphans:
+            target = os.path.join(self.quarantine_dir, os.path.relpath(path, self.root))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                os.replace(path, target)
+            except FileNotFoundError:
+                continue
+            os.utime(target, (now, now))  # mtime в карантине = время помещения туда
+            moved += 1
+            size += bytes_
+        return moved, size
+
+    def _sweep_quarantine(self, refs: Set[str], report: GcReport) -> None:
+        if not os.path.isdir(self.quarantine_dir):
+            return
+        cutoff = time.time() - self.quarantine_days * 86400
+        for top, _, files in os.walk(self.quarantine_dir):
+            for name in files:
+                held = os.path.join(top, name)
+                rel = os.path.relpath(held, self.quarantine_dir)
+                original = os.path.join(self.root, rel)
+                st = os.stat(held)
+                if os.path.abspath(original) in refs:
+                    if os.path.exists(original):  # CAS уже записал блоб заново
+                        os.unlink(held)
+                    else:
+                        os.makedirs(os.path.dirname(original), exist_ok=True)
+                        os.replace(held, original)
+                    report.restored += 1
+                elif st.st_mtime < cutoff:
+                    os.unlink(held)
+                    if isinstance(self.storage, ContentAddressedStorage) and rel.startswith("blobs" + os.sep):
+                        self.storage.forget(os.path.splitext(name)[0])
+                    report.purged += 1
+                    report.purged_bytes += st.st_size
+                else:
+                    report.reclaimable += 1
+                    report.reclaimable_bytes += st.st_size
+
+    # ── проход ───────────────────────────────────────────────────────────────
+    async def run(self) -> GcReport:
+        """Один проход GC (параллельный вызов дождётся текущего и запустит свой)."""
+        async with self._running:
+            report = GcReport(started_at=now_iso())
+            refs = await asyncio.to_thread(self.referenced)
+            walker = self._walk()
+            while True:
+                await self._idle()
+                batch = await asyncio.to_thread(lambda: list(islice(walker, self.batch_size)))
+                if not batch:
+                    break
+                report.scanned += len(batch)
+                fresh = time.time() - self.min_age
+                orphans = [e for e in batch if e[0] not in refs and e[2] < fresh]
+                if orphans:
+                    refs = await asyncio.to_thread(self.referenced)  # ссылки могли появиться за время обхода
+                    moved, size = await asyncio.to_thread(self._quarantine, [e for e in orphans if e[0] not in refs])
+                    report.quarantined += moved
+                    report.quarantined_bytes += size
+                await asyncio.sleep(len(batch) / self.files_per_s)
+            await self._idle()
+            refs = await asyncio.to_thread(self.referenced)
+            await asyncio.to_thread(self._sweep_quarantine, refs, report)
+            report.finished_at = now_iso()
+
+        METRICS.inc("storage_gc_scanned_total", report.scanned)
+        METRICS.inc("storage_gc_quarantined_total", report.quarantined)
+        METRICS.inc("storage_gc_purged_bytes_total", report.purged_bytes)
+        METRICS.set("storage_gc_reclaimable_bytes", report.reclaimable_bytes)
+        log.info("Storage GC pass", extra=asdict(report))
+        self.last_report = report
+        return report
+
+    # ── фоновая задача ───────────────────────────────────────────────────────
+    def track(self, task: asyncio.Task) -> None:
+        """Держать ссылку на проход, запущенный командой, до его окончания (stop() его отменит)."""
+        self._manual.add(task)
+        task.add_done_callback(self._manual.discard)
+
+    async def start(self) -> None:
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch(), name="storage-gc")
+
+    async def stop(self) -> None:
+        tasks = list(self._manual) + ([self._watcher] if self._watcher else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._watcher = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Storage GC pass failed")
@@ -2,12 +2,18 @@ from __future__ import annotations
 import os
 from app.integrations.storage.base import Storage
 from app.integrations.storage.local_storage import LocalDiskStorage
-from app.integrations.storage.yandex_disk_stub import YandexDiskStorageStub
+from app.integrations.storage.cas_storage import ContentAddressedStorage
+from app.integrations.storage.yandex_disk import YandexDiskClient, YandexDiskStorage
 
-def build_storage(kind: str, data_dir: str, yadisk_token: str | None) -> Storage:
-    if kind == "local":
+def build_storage(kind: str, data_dir: str, yadisk_token: str | None,
+                  yadisk_root: str = "app:/", yadisk_concurrency: int = 4) -> Storage:
+    if kind == "cas":
+        return ContentAddressedStorage(os.path.join(data_dir, "storage"))
+    elif kind == "local":
         return LocalDiskStorage(os.path.join(data_dir, "storage"))
     elif kind == "yadisk":
-        return YandexDiskStorageStub(yadisk_token)
+        if not yadisk_token:
+            raise ValueError("STORAGE_KIND=yadisk requires YADISK_TOKEN")
+        return YandexDiskStorage(YandexDiskClient(yadisk_token, root=yadisk_root, concurrency=yadisk_concurrency))
     else:
         raise ValueError(f"Unknown storage kind: {kind}")
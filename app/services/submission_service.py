@@ -1,31 +1,331 @@
 from __future__ import annotations
-import os, logging
+import asyncio, hashlib, os, logging, shutil, time
+from datetime import datetime, timezone
+from typing import AsyncIterable, Dict, List, Optional, Sequence, Tuple
+import aiofiles
+import pandas as pd
 from app.repositories.csv_repo import CsvTable
 from app.utils.ids import new_id
+from app.utils.metrics import METRICS
 from app.utils.time import now_iso
 from app.integrations.storage.base import Storage
+from app.integrations.storage.upload_queue import UploadQueue
+from app.domain.events import SubmissionCreated
+from app.services.event_bus import EventBus
+from app.services.task_service import TaskService, week_from_task_id
 
-SUBMISSION_COLUMNS = ["submission_id","task_id","student_code","tg_id","submitted_at","file_path","comment"]
+SUBMISSION_COLUMNS = ["submission_id","task_id","student_code","tg_id","submitted_at","file_path","comment",
+                      "sha256","size_bytes","upload_status","file_name","group_id","pdf_path"]
+# upload_status: pending | uploaded; group_id — общий у файлов одного альбома;
+# pdf_path — недельный PDF из фото-страниц (pdf_compile_service)
+
+MAX_UPLOAD_BYTES = 30 * 1024 * 1024   # L1: не больше 30 МБ на решение
+MAX_WEEK_FILES = 5                     # L1 §5: не больше 5 файлов на неделю
+MAX_WEEK_BYTES = 30 * 1024 * 1024      # L1 §5: не больше 30 МБ суммарно на неделю
+STALE_TMP_S = 24 * 3600               # временные файлы старше суток — остатки прерванных загрузок
 
 log = logging.getLogger(__name__)
 
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class QuotaExceeded(ValueError):
+    pass
+
+
+class QuotaIndex:
+    """
+    (студент, неделя) → активные файлы {(task_id, имя): размер} с готовыми суммами.
+    Повторная загрузка того же файла в то же задание заменяет версию (L1 §5) и не
+    занимает новый слот. Строится одним проходом по submissions.csv, дальше только
+    обновляется на каждой сдаче — проверка квоты O(1).
+    """
+
+    def __init__(self):
+        self._files: Dict[Tuple[str, str], Dict[Tuple[str, str], int]] = {}
+        self._bytes: Dict[Tuple[str, str], int] = {}
+
+    def add(self, key: Tuple[str, str], task_id: str, file_name: str, size: int) -> None:
+        files = self._files.setdefault(key, {})
+        slot = (str(task_id), os.path.basename(file_name))
+        self._bytes[key] = self._bytes.get(key, 0) - files.get(slot, 0) + size
+        files[slot] = size
+
+    def usage(self, key: Tuple[str, str]) -> Tuple[int, int]:
+        return len(self._files.get(key, ())), self._bytes.get(key, 0)
+
+    def replaces(self, key: Tuple[str, str], task_id: str, file_name: str) -> int:
+        """Размер заменяемой версии (0 — файл новый)."""
+        return self._files.get(key, {}).get((str(task_id), os.path.basename(file_name)), 0)
+
+
 class SubmissionService:
-    def __init__(self, data_dir: str, storage: Storage):
+    """
+    Сдачи решений. С spool=True (удалённое хранилище) файл сначала ложится в локальный
+    spool (data/spool/submissions/<submission_id>/<файл>), строка пишется сразу с
+    upload_status=pending, а фоновая очередь загружает файл в storage и подменяет
+    file_path. Незагруженные сдачи переживают рестарт: start() ставит их снова.
+    Метрики: upload_queue_depth{queue="submissions"} (глубина spool), upload_queue_seconds
+    и submission_upload_seconds (от приёма сдачи до загрузки, с учётом рестартов).
+    """
+
+    def __init__(self, data_dir: str, storage: Storage, max_upload_bytes: int = MAX_UPLOAD_BYTES,
+                 spool: bool = False, upload_workers: int = 4, tasks: Optional[TaskService] = None,
+                 max_week_files: int = MAX_WEEK_FILES, max_week_bytes: int = MAX_WEEK_BYTES,
+                 events: Optional[EventBus] = None):
         self.table = CsvTable(os.path.join(data_dir, "submissions.csv"), SUBMISSION_COLUMNS)
         self.storage = storage
+        self.max_upload_bytes = max_upload_bytes
+        self.tasks = tasks
+        self.max_week_files = max_week_files
+        self.max_week_bytes = max_week_bytes
+        self.events = events or EventBus()
+        self.quotas = QuotaIndex()
+        self.active_uploads = 0  # сдачи между приёмом и записью в таблицу (GC хранилища ждёт нуля)
+        self._build_quotas()
+        self.tmp_dir = os.path.join(data_dir, "tmp", "uploads")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._cleanup_tmp()
+        self.spool = spool
+        self.spool_dir = os.path.join(data_dir, "spool", "submissions")
+        self.uploads = UploadQueue(self._upload_spooled, name="submissions", workers=upload_workers)
+
+    def _cleanup_tmp(self) -> None:
+        cutoff = time.time() - STALE_TMP_S
+        for entry in os.scandir(self.tmp_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+
+    @staticmethod
+    def rel_path(tg_id: int, student_code: str, task_id: str, file_name: str) -> str:
+        """Путь сдачи в хранилище (логический путь для CAS)."""
+        return os.path.join("submissions", student_code or str(tg_id), task_id,
+                            os.path.basename(file_name) or "submission.bin")
 
     async def save_submission(self, tg_id: int, student_code: str, task_id: str, file_name: str, file_bytes: bytes, comment: str = ""):
-        rel_path = os.path.join("submissions", student_code or str(tg_id), task_id, file_name)
+        self.check_quota(tg_id, student_code, task_id, file_name, len(file_bytes))
+        rel_path = self.rel_path(tg_id, student_code, task_id, file_name)
         saved_path = await self.storage.save_bytes(rel_path, file_bytes)
-        row = {
-            "submission_id": new_id("sub"),
+        return await self._record(new_id("sub"), tg_id, student_code, task_id, saved_path, comment,
+                            hashlib.sha256(file_bytes).hexdigest(), len(file_bytes), file_name=file_name)
+
+    async def save_upload(self, tg_id: int, student_code: str, task_id: str, file_name: str,
+                          chunks: AsyncIterable[bytes], comment: str = ""):
+        """
+        Потоковая сдача: куски пишутся во временный файл (aiofiles, вне event loop)
+        с подсчётом sha256 на лету, затем файл атомарно передаётся в хранилище
+        (или в spool — см. описание класса). Больше max_upload_bytes — UploadTooLarge,
+        сверх недельной квоты — QuotaExceeded; временный файл удаляется.
+        """
+        rows = await self.save_uploads(tg_id, student_code, task_id, [(file_name, chunks)], comment)
+        return rows[0]
+
+    async def save_uploads(self, tg_id: int, student_code: str, task_id: str,
+                           files: Sequence[Tuple[str, AsyncIterable[bytes]]], comment: str = "",
+                           concurrency: int = 4) -> List[dict]:
+        """
+        Несколько файлов одной сдачей (альбом): скачиваются параллельно (не больше concurrency),
+        и только если все дошли и укладываются в квоту, переносятся в хранилище и пишутся
+        в submissions.csv одной записью с общим group_id. Любая ошибка — ни одного файла:
+        загрузки остальных частей отменяются.
+        """
+        limit = self.check_quota_many(tg_id, student_code, task_id, [(name, None) for name, _ in files])
+        budget = {"left": limit}
+        sem = asyncio.Semaphore(concurrency)
+        tmp_paths = [os.path.join(self.tmp_dir, new_id("upl")) for _ in files]
+
+        async def receive(tmp_path: str, chunks: AsyncIterable[bytes]) -> Tuple[str, int]:
+            digest, size = hashlib.sha256(), 0
+            async with sem:
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    async for chunk in chunks:
+                        size += len(chunk)
+                        budget["left"] -= len(chunk)
+                        if size > self.max_upload_bytes:
+                            raise UploadTooLarge(f"file exceeds {self.max_upload_bytes} bytes")
+                        if budget["left"] < 0:  # file_size от Telegram не пришёл или неверен
+                            raise QuotaExceeded(f"на неделю осталось {max(limit, 0) // 1024} КБ")
+                        digest.update(chunk)
+                        await f.write(chunk)
+            return digest.hexdigest(), size
+
+        group_id = new_id("grp") if len(files) > 1 else ""
+        rows = []
+        self.active_uploads += 1
+        try:
+            receives = [asyncio.create_task(receive(tmp, chunks)) for tmp, (_, chunks) in zip(tmp_paths, files)]
+            try:
+                received = await asyncio.gather(*receives)
+            except BaseException:
+                # одна часть альбома упала — остальные не докачиваем, и временные файлы
+                # удаляются только после того, как их загрузки действительно остановились
+                for task in receives:
+                    task.cancel()
+                await asyncio.gather(*receives, return_exceptions=True)
+                raise
+            for tmp_path, (file_name, _), (sha256, size) in zip(tmp_paths, files, received):
+                submission_id = new_id("sub")
+                if self.spool:
+                    saved_path = os.path.join(self.spool_dir, submission_id, os.path.basename(file_name) or "submission.bin")
+                    await asyncio.to_thread(_move, tmp_path, saved_path)
+                else:
+                    rel_path = self.rel_path(tg_id, student_code, task_id, file_name)
+                    saved_path = await self.storage.save_file(rel_path, tmp_path, sha256=sha256)
+                rows.append(self._row(submission_id, tg_id, student_code, task_id, saved_path, comment, sha256, size,
+                                      upload_status="pending" if self.spool else "uploaded",
+                                      file_name=file_name, group_id=group_id))
+            await self._commit(rows)
+        finally:
+            for tmp_path in tmp_paths:
+                if os.path.exists(tmp_path):
+                    await asyncio.to_thread(os.unlink, tmp_path)
+            self.active_uploads -= 1
+        if self.spool:
+            for row in rows:
+                self.uploads.enqueue(row["submission_id"], row["file_path"])
+        return rows
+
+    async def _record(self, submission_id: str, tg_id: int, student_code: str, task_id: str, saved_path: str,
+                comment: str, sha256: str, size: int, upload_status: str = "uploaded",
+                file_name: str = "") -> dict:
+        row = self._row(submission_id, tg_id, student_code, task_id, saved_path, comment, sha256, size,
+                        upload_status, file_name)
+        await self._commit([row])
+        return row
+
+    @staticmethod
+    def _row(submission_id: str, tg_id: int, student_code: str, task_id: str, saved_path: str,
+             comment: str, sha256: str, size: int, upload_status: str = "uploaded",
+             file_name: str = "", group_id: str = "") -> dict:
+        return {
+            "submission_id": submission_id,
             "task_id": task_id,
             "student_code": student_code,
             "tg_id": tg_id,
             "submitted_at": now_iso(),
             "file_path": saved_path,
             "comment": comment,
+            "sha256": sha256,
+            "size_bytes": size,
+            "upload_status": upload_status,
+            "file_name": os.path.basename(file_name) or os.path.basename(saved_path),
+            "group_id": group_id,
         }
-        log.info("Submission saved", extra=row)
-        self.table.append_row(row)
-        return row
+
+    async def _commit(self, rows: List[dict]) -> None:
+        """Одна запись submissions.csv на всю сдачу (в потоке: FileLock и запись CSV),
+        затем — уже в event loop — обновление индекса квот и SubmissionCreated."""
+        for row in rows:
+            log.info("Submission saved", extra=row)
+        await asyncio.to_thread(self.table.append_rows, rows)
+        for row in rows:
+            self.quotas.add(self.student_week(row["tg_id"], row["student_code"], row["task_id"]),
+                            row["task_id"], row["file_name"], row["size_bytes"])
+        for row in rows:
+            self.events.publish(SubmissionCreated(dict(row)))
+
+    # ── spool ────────────────────────────────────────────────────────────────
+    async def start(self) -> None:
+        """dp.startup: поставить в очередь сдачи, не загруженные до рестарта, и запустить воркеры."""
+        if self.spool:
+            for submission_id, spooled in await asyncio.to_thread(self._pending_spool):
+                self.uploads.enqueue(submission_id, spooled)
+        await self.uploads.start()
+
+    async def stop(self) -> None:
+        await self.uploads.stop()
+
+    def _pending_spool(self) -> list:
+        df = self.table.read()
+        if df.empty or "upload_status" not in df.columns:
+            return []
+        pending = []
+        for r in df[df["upload_status"] == "pending"].itertuples():
+            if os.path.exists(str(r.file_path)):
+                pending.append((str(r.submission_id), str(r.file_path)))
+            else:
+                log.warning("Spooled file of %s is missing: %s", r.submission_id, r.file_path)
+        return pending
+
+    def _get_row(self, submission_id: str) -> Optional[dict]:
+        df = self.table.find(submission_id=submission_id)
+        return df.fillna("").iloc[0].to_dict() if len(df) else None
+
+    async def _upload_spooled(self, submission_id: str, spooled: str) -> None:
+        row = await asyncio.to_thread(self._get_row, submission_id)
+        if row is None:
+            return
+        tg_id = str(row["tg_id"]).removesuffix(".0")
+        rel_path = self.rel_path(tg_id, str(row["student_code"]), str(row["task_id"]), spooled)
+        saved_path = await self.storage.save_file(rel_path, spooled, sha256=str(row["sha256"]) or None)
+        await asyncio.to_thread(self._mark_uploaded, submission_id, saved_path)
+        await asyncio.to_thread(shutil.rmtree, os.path.dirname(spooled), True)
+        submitted = datetime.fromisoformat(str(row["submitted_at"]))
+        METRICS.observe("submission_upload_seconds", (datetime.now(timezone.utc) - submitted).total_seconds())
+
+    def _mark_uploaded(self, submission_id: str, saved_path: str) -> None:
+        with self.table.lock:
+            df = self.table.read()
+            mask = df["submission_id"].astype(str) == submission_id
+            df["file_path"] = df["file_path"].astype(object)
+            df["upload_status"] = df["upload_status"].astype(object)
+            df.loc[mask, "file_path"] = saved_path
+            df.loc[mask, "upload_status"] = "uploaded"
+            self.table.write(df)
+
+    # ── квоты (L1 §5) ────────────────────────────────────────────────────────
+    def _week(self, task_id: str) -> str:
+        week = self.tasks.week_of(task_id) if self.tasks is not None else week_from_task_id(task_id)
+        return str(week) if week is not None else f"task:{task_id}"  # неделя неизвестна — квота на задание
+
+    def student_week(self, tg_id, student_code: str, task_id: str) -> Tuple[str, str]:
+        """Ключ (студент, неделя) — для квот и недельных сборок."""
+        student = str(student_code or "").strip()
+        if not student or student == "nan":
+            student = str(tg_id).removesuffix(".0")
+        return student, self._week(task_id)
+
+    def _build_quotas(self) -> None:
+        df = self.table.read()
+        if df.empty:
+            return
+        sizes = pd.to_numeric(df["size_bytes"], errors="coerce") if "size_bytes" in df.columns else None
+        names = df["file_name"].fillna("").astype(str) if "file_name" in df.columns else None
+        for i, r in enumerate(df.itertuples()):
+            path = str(r.file_path)
+            size = sizes.iloc[i] if sizes is not None else float("nan")
+            if pd.isna(size):  # строки до появления size_bytes
+                size = os.path.getsize(path) if os.path.isfile(path) else 0
+            name = (names.iloc[i] if names is not None else "") or os.path.basename(path)
+            self.quotas.add(self.student_week(r.tg_id, r.student_code, str(r.task_id)), str(r.task_id), name, int(size))
+
+    def check_quota(self, tg_id: int, student_code: str, task_id: str, file_name: str,
+                    file_size: Optional[int] = None) -> int:
+        """
+        Проверить недельную квоту до скачивания: QuotaExceeded, если файл не помещается.
+        Вернуть, сколько байт можно принять (с учётом заменяемой версии того же файла).
+        """
+        return self.check_quota_many(tg_id, student_code, task_id, [(file_name, file_size)])
+
+    def check_quota_many(self, tg_id: int, student_code: str, task_id: str,
+                         files: Sequence[Tuple[str, Optional[int]]]) -> int:
+        """То же для нескольких файлов одной сдачи (альбом): [(имя, размер или None)]."""
+        key = self.student_week(tg_id, student_code, task_id)
+        count, used = self.quotas.usage(key)
+        sizes: Dict[str, Optional[int]] = {os.path.basename(name): size for name, size in files}
+        replaced = {name: self.quotas.replaces(key, task_id, name) for name in sizes}
+        new_files = sum(1 for r in replaced.values() if not r)
+        if new_files and count + new_files > self.max_week_files:
+            raise QuotaExceeded(f"не больше {self.max_week_files} файлов за неделю (уже {count})")
+        left = self.max_week_bytes - used + sum(replaced.values())
+        known = sum(size for size in sizes.values() if size)
+        if known > left:
+            raise QuotaExceeded(f"на неделю осталось {max(left, 0) // 1024} КБ из {self.max_week_bytes // (1024 * 1024)} МБ")
+        return left
+
+
+def _move(src: str, dst: str) -> None:
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    os.replace(src, dst)
@@ -0,0 +1,145 @@
+"""
+Дайджест для преподавателей: записи, отмены записей и отмены слотов за окно.
+
+События BookingCreated/BookingCanceled/SlotCanceled приходят по шине (EventBus),
+таблицы заново не сканируются. Первое событие открывает окно window_s; по его
+окончании каждому TA уходит одно сводное сообщение через outbox. Запись, созданная
+и отменённая внутри одного окна, в сводку не попадает.
+"""
+
+from __future__ import annotations
+import asyncio, logging
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from app.bot.outbox import Outbox, Priority
+from app.domain.events import BookingCanceled, BookingCreated, DomainEvent, SlotCanceled
+from app.services.event_bus import EventBus
+from app.services.slot_service import SlotService
+from app.services.users_service import UsersService
+from app.utils.metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+
+def _chat(value) -> str:
+    s = str(value).strip()
+    return s[:-2] if s.endswith(".0") else s
+
+
+def _when(slot: dict) -> str:
+    date = str(slot.get("date", ""))
+    try:
+        y, m, d = date.split("-")
+        date = f"{d}.{m}"
+    except ValueError:
+        pass
+    return f"{date} {slot.get('time_from', '')}–{slot.get('time_to', '')}"
+
+
+class TaDigestService:
+    def __init__(self, slots: SlotService, users: UsersService, events: EventBus, window_s: float = 600.0):
+        self.slots = slots
+        self.users = users
+        self.window_s = window_s
+        self._events: List[DomainEvent] = []
+        self._has_events = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+        self._outbox: Optional[Outbox] = None
+        for event_type in (BookingCreated, BookingCanceled, SlotCanceled):
+            events.subscribe(event_type, self.record)
+
+    # ── события ──────────────────────────────────────────────────────────────
+    def record(self, event: DomainEvent) -> None:
+        self._events.append(event)
+        self._has_events.set()
+        METRICS.set("ta_digest_pending_events", len(self._events))
+
+    def pending(self) -> int:
+        return len(self._events)
+
+    # ── сводка ───────────────────────────────────────────────────────────────
+    def build_digests(self, events: List[DomainEvent]) -> Dict[int, str]:
+        """Сгруппировать события по TA → {tg_id TA: текст}. Читает slots/users один раз на окно."""
+        created = {str(e.booking.get("booking_id")): e.booking for e in events if isinstance(e, BookingCreated)}
+        canceled = {str(e.booking.get("booking_id")): e.booking for e in events if isinstance(e, BookingCanceled)}
+        for booking_id in set(created) & set(canceled):  # туда-обратно внутри окна
+            del created[booking_id], canceled[booking_id]
+        slot_cancels = [e.slot for e in events if isinstance(e, SlotCanceled)]
+
+        slots_df = self.slots.table.read()
+        slot_by_id = {str(r["slot_id"]): r for r in slots_df.to_dict("records")} if not slots_df.empty else {}
+        users_df = self.users.table.read()
+        ta_chat, names = {}, {}
+        for r in users_df.to_dict("records"):
+            if str(r.get("role")) in ("ta", "owner"):
+                ta_chat[str(r.get("id"))] = _chat(r.get("tg_id"))
+            names[_chat(r.get("tg_id"))] = " ".join(
+                str(r.get(k)) for k in ("last_name", "first_name") if str(r.get(k) or "nan") != "nan")
+
+        lines: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+        for section, rows in (("booked", created.values()), ("unbooked", canceled.values())):
+            for r in rows:
+                slot = slot_by_id.get(str(r.get("slot_id")))
+                if not slot:
+                    continue
+                student = _chat(r.get("student_tg_id"))
+                lines[str(slot.get("ta_id"))][section].append(f"• {_when(slot)} — {names.get(student) or student}")
+        for slot in slot_cancels:
+            by = _chat(slot.get("canceled_by"))
+            if by and by == ta_chat.get(str(slot.get("ta_id"))):
+                continue  # TA сам отменил свой слот — сообщать ему же незачем
+            lines[str(slot.get("ta_id"))]["slot_canceled"].append(f"• {_when(slot)}")
+
+        titles = {"booked": "➕ Новые записи", "unbooked": "➖ Отменённые записи", "slot_canceled": "🚫 Отменённые слоты"}
+        digests: Dict[int, str] = {}
+        for ta_id, sections in lines.items():
+            chat = ta_chat.get(ta_id)
+            if not chat or not chat.lstrip("-").isdigit():
+                continue
+            parts = [f"📋 <b>Сводка по записям</b> (за {round(self.window_s / 60)} мин)"]
+            for key in ("booked", "unbooked", "slot_canceled"):
+                if sections.get(key):
+                    parts.append(f"\n{titles[key]} ({len(sections[key])}):")
+                    parts.extend(sorted(sections[key]))
+            digests[int(chat)] = "\n".join(parts)
+        return digests
+
+    async def flush(self, outbox: Outbox) -> int:
+        """Отправить накопленное; вернуть число отправленных сводок."""
+        events, self._events = self._events, []
+        self._has_events.clear()
+        METRICS.set("ta_digest_pending_events", 0)
+        if not events:
+            return 0
+        digests = await asyncio.to_thread(self.build_digests, events)
+        for chat_id, text in digests.items():
+            outbox.send_message(chat_id, text, priority=Priority.NOTIFY, parse_mode="HTML")
+        METRICS.inc("ta_digest_sent_total", len(digests))
+        METRICS.inc("ta_digest_events_total", len(events))
+        return len(digests)
+
+    # ── фоновый цикл ─────────────────────────────────────────────────────────
+    async def start(self, outbox: Outbox) -> None:
+        """dp.startup: запустить цикл окон (outbox приходит из DI)."""
+        self._outbox = outbox
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run(outbox), name="ta-digest")
+
+    async def stop(self) -> None:
+        """dp.shutdown: остановить цикл и отправить недособранную сводку."""
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+        if self._outbox is not None:
+            await self.flush(self._outbox)
+
+    async def _run(self, outbox: Outbox) -> None:
+        while True:
+            await self._has_events.wait()
+            await asyncio.sleep(self.window_s)
+            try:
+                await self.flush(outbox)
+            except Exception:
+                log.exception("TA digest flush failed")
@@ -1,13 +1,35 @@
 from __future__ import annotations
-import os
+import os, re
+from typing import Dict, Optional, Tuple
+import pandas as pd
 from app.repositories.csv_repo import CsvTable
 from app.utils.ids import new_id
 
 TASK_COLUMNS = ["task_id","week","title","deadline_iso","max_points","description"]
 
+_WEEK_TASK = re.compile(r"^W(\d+)$", re.IGNORECASE)
+
+def week_from_task_id(task_id: str) -> Optional[int]:
+    """Неделя из task_id вида W03 (так сдают через меню недели)."""
+    m = _WEEK_TASK.match(str(task_id).strip())
+    return int(m.group(1)) if m else None
+
 class TaskService:
     def __init__(self, data_dir: str):
         self.table = CsvTable(os.path.join(data_dir, "tasks.csv"), TASK_COLUMNS)
+        self._weeks: Dict[str, int] = {}
+        self._weeks_sig: Optional[Tuple[int, int]] = None
+
+    def week_of(self, task_id: str) -> Optional[int]:
+        """Неделя задания: по tasks.csv (карта перечитывается, только если файл изменился), иначе по task_id вида Wnn."""
+        st = os.stat(self.table.path)
+        if (st.st_mtime_ns, st.st_size) != self._weeks_sig:
+            df = self.table.read()
+            weeks = pd.to_numeric(df["week"], errors="coerce")
+            self._weeks = {str(t): int(w) for t, w in zip(df["task_id"], weeks) if pd.notna(w)}
+            self._weeks_sig = (st.st_mtime_ns, st.st_size)
+        week = self._weeks.get(str(task_id))
+        return week if week is not None else week_from_task_id(task_id)
 
     def list_tasks(self):
         return self.table.read().sort_values(by=["week","deadline_iso"], ascending=[True, True])
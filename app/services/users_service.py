@@ -2,7 +2,9 @@ from __future__ import annotations
 import os
 from typing import Optional
 import pandas as pd
+from app.domain.events import RoleChanged, UserDeleted, UserUpserted
 from app.repositories.csv_repo import CsvTable
+from app.services.event_bus import EventBus
 from app.utils.time import now_iso
 
 # Строгое соответствие колонкам users.csv (никаких лишних полей)
@@ -10,9 +12,21 @@ USERS_COLUMNS = ['tg_id', 'role', 'first_name', 'last_name', 'username', 'email'
 
 TA_ROLES = ("ta", "owner")  # owner трактуем как TA
 
+def student_code_of(user: Optional[dict]) -> Optional[str]:
+    """Код студента из строки users.csv: колонка id (у ранних записей — student_code)."""
+    for key in ("id", "student_code"):
+        value = (user or {}).get(key)
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            continue
+        code = str(value).strip()
+        if code:
+            return code
+    return None
+
 class UsersService:
-    def __init__(self, data_dir: str):
+    def __init__(self, data_dir: str, events: Optional[EventBus] = None):
         self.table = CsvTable(os.path.join(data_dir, "users.csv"), USERS_COLUMNS)
+        self.events = events or EventBus()
 
     # ── Queries ────────────────────────────────────────────────────────────────
     def get_by_tg(self, tg_id: int) -> Optional[dict]:
@@ -82,8 +96,24 @@ class UsersService:
             "created_at": existing.get("created_at", now_iso()),
         }
         self.table.upsert("tg_id", row)
+        self.events.publish(UserUpserted(row))
+        old_role = existing.get("role")
+        if str(old_role) != str(row["role"]):
+            self.events.publish(RoleChanged(int(tg_id), old_role, str(row["role"])))
         return row
 
+    def delete(self, tg_id: int) -> bool:
+        """Удалить пользователя из users.csv; False, если такого tg_id нет."""
+        df = self.table.read()
+        if df.empty:
+            return False
+        mask = df["tg_id"].astype(str) == str(tg_id)
+        if not mask.any():
+            return False
+        self.table.write(df.loc[~mask].reset_index(drop=True))
+        self.events.publish(UserDeleted(int(tg_id)))
+        return True
+
     def register_student(self, tg_id: int, email: str, id: str,
                          first_name: str = "", last_name: str = "", username: str = "") -> dict | None:
         # запрет на привязку одного и того же id к разным tg
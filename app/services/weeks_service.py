@@ -56,6 +56,13 @@ class WeeksService:
         days_offset = (week_number - 1) * 7
         return self.WEEK_1_DEADLINE + timedelta(days=days_offset)
     
+    def deadline_date(self, week_number: int) -> date:
+        return self._calculate_deadline(week_number)
+
+    def week_start_date(self, week_number: int) -> date:
+        """Дата открытия недели: 1 неделя = 27.08.2025, каждая следующая +7 дней"""
+        return self.WEEK_1_START + timedelta(days=(week_number - 1) * 7)
+    
     def _is_overdue(self, deadline_date: date) -> bool:
         """Проверяет, просрочена ли неделя"""
         today = date.today()
@@ -0,0 +1,97 @@
+"""
+Мониторинг лага event loop.
+
+CsvTable читает/пишет CSV синхронно прямо в event loop, поэтому тяжёлый вызов
+замораживает всех пользователей. LoopLagMonitor:
+  - корутина на loop'е спит `interval` и измеряет, насколько позже она проснулась
+    (это и есть лаг) → метрики loop_lag_seconds (gauge) и loop_lag_hist (histogram);
+  - watchdog-поток следит за «пульсом» корутины; если пульса нет дольше
+    interval + threshold, loop сейчас заблокирован — снимаем стек потока loop'а
+    и логируем его, чтобы было видно, какой сервис/репозиторий держит loop.
+"""
+
+from __future__ import annotations
+import asyncio, logging, sys, threading, time, traceback
+from typing import Optional
+
+from app.utils.metrics import METRICS, Metrics
+
+log = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.25, threshold: float = 0.2,
+                 metrics: Metrics = METRICS, max_stack_depth: int = 30):
+        self.interval = interval
+        self.threshold = threshold
+        self.metrics = metrics
+        self.max_stack_depth = max_stack_depth
+
+        self.last_stall_stack: Optional[str] = None
+
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ── lifecycle ─────────────────────────────────────────────────────────────
+    def start(self) -> None:
+        """Запустить монитор на текущем running loop (вызывать из корутины)."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe(), name="loop-lag-probe")
+        self._thread = threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        log.info("Loop lag monitor started: interval=%.3fs threshold=%.3fs", self.interval, self.threshold)
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    # ── loop side ─────────────────────────────────────────────────────────────
+    async def _probe(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self._heartbeat = now
+            self.metrics.set("loop_lag_seconds", lag)
+            self.metrics.observe("loop_lag_hist", lag)
+            if lag >= self.threshold:
+                self.metrics.inc("loop_lag_over_threshold_total")
+
+    # ── watchdog thread ──────────────────────────────────────────────────────
+    def _watchdog(self) -> None:
+        check_every = max(self.threshold / 2, 0.01)
+        reported_beat = None  # чтобы не логировать один и тот же затык многократно
+        while not self._stop.wait(check_every):
+            beat = self._heartbeat
+            stalled_for = time.monotonic() - beat - self.interval
+            if stalled_for < self.threshold or beat == reported_beat:
+                continue
+            reported_beat = beat
+            stack = self.capture_loop_stack()
+            self.last_stall_stack = stack
+            self.metrics.inc("loop_stalls_total")
+            log.warning("Event loop blocked for >%.0f ms, loop thread stack:\n%s",
+                        stalled_for * 1000, stack)
+
+    def capture_loop_stack(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread_id) if self._loop_thread_id else None
+        if frame is None:
+            return "<loop thread stack unavailable>"
+        return "".join(traceback.format_stack(frame, limit=self.max_stack_depth))
@@ -0,0 +1,130 @@
+"""
+In-process реестр метрик: счётчики, gauge и гистограммы.
+
+Один глобальный экземпляр METRICS на процесс (как _IMPERSONATE_MAP в actor_middleware).
+Снимок можно получить через snapshot() или выгрузить в формате Prometheus через render_text().
+"""
+
+from __future__ import annotations
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# Границы бакетов гистограмм в секундах (подходят и для лагов, и для латентностей)
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+
+class Metrics:
+    """Потокобезопасный реестр: пишут и event loop, и фоновые потоки (watchdog)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._hists: Dict[str, Dict[LabelKey, _Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            k = _key(labels)
+            series[k] = series.get(k, 0.0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[_key(labels)] = float(value)
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels) -> None:
+        with self._lock:
+            series = self._hists.setdefault(name, {})
+            k = _key(labels)
+            hist = series.get(k)
+            if hist is None:
+                hist = series[k] = _Histogram(buckets)
+            hist.observe(float(value))
+
+    def get(self, name: str, **labels) -> float | None:
+        """Текущее значение счётчика или gauge (None, если серии нет)."""
+        k = _key(labels)
+        with self._lock:
+            for store in (self._counters, self._gauges):
+                if name in store and k in store[name]:
+                    return store[name][k]
+        return None
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        """Плоский снимок: {name: {labels_str: value|{count,sum,max}}}"""
+        out: Dict[str, Dict[str, object]] = {}
+        with self._lock:
+            for store in (self._counters, self._gauges):
+                for name, series in store.items():
+                    out[name] = {_fmt_labels(k): v for k, v in series.items()}
+            for name, series in self._hists.items():
+                out[name] = {
+                    _fmt_labels(k): {"count": h.count, "sum": h.sum, "max": h.max}
+                    for k, h in series.items()
+                }
+        return out
+
+    def render_text(self) -> str:
+        """Выгрузка в Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for k, v in series.items():
+                    lines.append(f"{name}{_fmt_labels(k)} {v:g}")
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                for k, v in series.items():
+                    lines.append(f"{name}{_fmt_labels(k)} {v:g}")
+            for name, series in sorted(self._hists.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for k, h in series.items():
+                    acc = 0
+                    for bound, cnt in zip(h.buckets, h.counts):
+                        acc += cnt
+                        lines.append(f"{name}_bucket{_fmt_labels(k, (('le', f'{bound:g}'),))} {acc}")
+                    lines.append(f"{name}_bucket{_fmt_labels(k, (('le', '+Inf'),))} {h.count}")
+                    lines.append(f"{name}_sum{_fmt_labels(k)} {h.sum:g}")
+                    lines.append(f"{name}_count{_fmt_labels(k)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._hists.clear()
+
+
+METRICS = Metrics()
@@ -0,0 +1,249 @@
+"""
+Генератор синтетических data-каталогов для бенчмарков и нагрузочных прогонов.
+
+Схемы берутся прямо из сервисов (USERS_COLUMNS, ROSTER_COLUMNS, SLOTS_COLUMNS, ...),
+поэтому сгенерированные CSV читаются теми же CsvTable, что и в проде.
+
+Пример:
+    python -m bench.datagen --students 3000 --out ./data/bench_3000
+"""
+
+from __future__ import annotations
+import argparse, os, random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List
+
+import pandas as pd
+
+from app.services.users_service import USERS_COLUMNS
+from app.services.roster_service import ROSTER_COLUMNS
+from app.services.slot_service import SLOTS_COLUMNS
+from app.services.booking_service import BOOKING_COLUMNS
+from app.services.assignments_service import COLUMNS as ASSIGNMENT_COLUMNS
+from app.services.grade_service import GRADE_COLUMNS
+from app.services.submission_service import SUBMISSION_COLUMNS
+from app.services.task_service import TASK_COLUMNS
+from app.services.weeks_service import WEEKS_COLUMNS
+
+# Типовые масштабы курса
+SCALES = (300, 3_000, 30_000)
+
+OWNER_TG_ID = 1
+OWNER_TA_ID = "TA-00"
+TA_TG_BASE = 10_000
+STUDENT_TG_BASE = 1_000_000
+
+LAST_NAMES = ["Иванов", "Петров", "Сидоров", "Кузнецов", "Смирнов", "Попов", "Васильев", "Соколов", "Михайлов", "Новиков"]
+FIRST_NAMES = ["Иван", "Пётр", "Анна", "Мария", "Алексей", "Ольга", "Дмитрий", "Елена", "Сергей", "Наталья"]
+
+
+@dataclass
+class DatasetSpec:
+    students: int = 300
+    weeks: int = 12
+    students_per_ta: int = 25
+    slot_len_min: int = 15
+    registered_share: float = 0.9   # доля студентов, привязавших Telegram
+    booking_share: float = 0.8      # доля назначенных студентов, записавшихся на слот
+    graded_share: float = 0.9       # доля сдавших, получивших оценку
+    regrade_share: float = 0.1      # доля оценок с повторным выставлением
+    semester_start: date | None = None  # по умолчанию: сегодня − 6 недель (половина семестра в прошлом)
+    seed: int = 42
+
+    @property
+    def tas(self) -> int:
+        return max(3, self.students // self.students_per_ta)
+
+
+def student_code(i: int) -> str:
+    return f"S-{i:05d}"
+
+def student_tg(i: int) -> int:
+    return STUDENT_TG_BASE + i
+
+def student_email(i: int) -> str:
+    return f"s-{i:05d}@u.edu"
+
+def ta_code(j: int) -> str:
+    return f"TA-{j:02d}"
+
+def ta_tg(j: int) -> int:
+    return TA_TG_BASE + j
+
+def task_id(week: int) -> str:
+    return f"W{week:02d}"
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def _write(out_dir: str, name: str, rows: List[Dict], columns: List[str]) -> None:
+    df = pd.DataFrame(rows, columns=columns)
+    df.to_csv(os.path.join(out_dir, name), index=False)
+
+
+def generate(out_dir: str, spec: DatasetSpec | None = None) -> Dict[str, int]:
+    """Сгенерировать каталог данных; вернуть число строк по таблицам."""
+    spec = spec or DatasetSpec()
+    rnd = random.Random(spec.seed)
+    os.makedirs(out_dir, exist_ok=True)
+    start = spec.semester_start or (date.today() - timedelta(weeks=6))
+    now = datetime.now(timezone.utc)
+    today = date.today()
+    n_ta = spec.tas
+
+    # ── users.csv / roster.csv ───────────────────────────────────────────────
+    users: List[Dict] = [{
+        "tg_id": OWNER_TG_ID, "role": "owner", "first_name": "Owner", "last_name": "Course",
+        "username": "owner", "email": "", "id": OWNER_TA_ID, "created_at": _iso(now),
+    }]
+    for j in range(1, n_ta + 1):
+        users.append({
+            "tg_id": ta_tg(j), "role": "ta", "first_name": rnd.choice(FIRST_NAMES),
+            "last_name": rnd.choice(LAST_NAMES), "username": f"ta{j}", "email": "",
+            "id": ta_code(j), "created_at": _iso(now),
+        })
+    roster: List[Dict] = []
+    registered: List[int] = []
+    for i in range(1, spec.students + 1):
+        ln, fn = rnd.choice(LAST_NAMES), rnd.choice(FIRST_NAMES)
+        is_reg = rnd.random() < spec.registered_share
+        roster.append({
+            "student_code": student_code(i), "external_email": student_email(i),
+            "last_name_ru": ln, "first_name_ru": fn, "middle_name_ru": "",
+            "last_name_en": "", "first_name_en": "", "middle_name_en": "",
+            "group": f"GR-{(i - 1) // 30 + 1:03d}",
+            "tg_id": student_tg(i) if is_reg else "", "role": "student" if is_reg else "",
+        })
+        if is_reg:
+            registered.append(i)
+            users.append({
+                "tg_id": student_tg(i), "role": "student", "first_name": fn, "last_name": ln,
+                "username": "", "email": student_email(i), "id": student_code(i), "created_at": _iso(now),
+            })
+
+    # ── weeks.csv / tasks.csv ────────────────────────────────────────────────
+    weeks = [{"week": w, "title": f"Неделя {w}", "description": f"Темы недели {w}"} for w in range(1, spec.weeks + 1)]
+    deadlines = {w: start + timedelta(weeks=w) for w in range(1, spec.weeks + 1)}
+    tasks = [{
+        "task_id": task_id(w), "week": w, "title": f"Задание недели {w}",
+        "deadline_iso": datetime.combine(deadlines[w], time(23, 59), timezone.utc).isoformat(),
+        "max_points": 10.0, "description": "",
+    } for w in range(1, spec.weeks + 1)]
+
+    # ── assignments.csv: круговое назначение со сдвигом недели (L1 §7) ────────
+    assignments: List[Dict] = []
+    assigned: Dict[int, Dict[int, List[int]]] = {w: {} for w in range(1, spec.weeks + 1)}
+    for w in range(1, spec.weeks + 1):
+        for i in range(1, spec.students + 1):
+            j = (i + w - 2) % n_ta + 1
+            assignments.append({"student_code": student_code(i), "week": w, "ta_code": ta_code(j), "created_at": _iso(now)})
+            assigned[w].setdefault(j, []).append(i)
+
+    # ── slots.csv / bookings.csv ─────────────────────────────────────────────
+    slots: List[Dict] = []
+    bookings: List[Dict] = []
+    registered_set = set(registered)
+    slot_seq = 0
+    booking_seq = 0
+    for w in range(1, spec.weeks + 1):
+        for j in range(1, n_ta + 1):
+            students = assigned[w].get(j, [])
+            n_slots = int(len(students) * 1.2) + 1
+            days = [deadlines[w] - timedelta(days=2), deadlines[w] - timedelta(days=1)]
+            per_day = (n_slots + 1) // 2
+            free_slots: List[Dict] = []
+            for d in days:
+                for k in range(per_day):
+                    minutes = 10 * 60 + k * spec.slot_len_min
+                    t_from = f"{minutes // 60:02d}:{minutes % 60:02d}"
+                    t_to = f"{(minutes + spec.slot_len_min) // 60:02d}:{(minutes + spec.slot_len_min) % 60:02d}"
+                    r = rnd.random()
+                    status = "canceled" if r < 0.03 else ("closed" if r < 0.08 else "free")
+                    slot_seq += 1
+                    slot = {
+                        "slot_id": f"slt_{slot_seq:08x}", "ta_id": ta_code(j), "date": d.isoformat(),
+                        "time_from": t_from, "time_to": t_to, "mode": "online",
+                        "location": "Аудитория по расписанию", "meeting_link": f"https://meet.example/{ta_code(j)}",
+                        "duration_min": spec.slot_len_min, "capacity": 1, "status": status,
+                        "created_at": _iso(now), "canceled_by": "", "canceled_at": "", "cancel_reason": "",
+                    }
+                    slots.append(slot)
+                    if status == "free":
+                        free_slots.append(slot)
+            rnd.shuffle(free_slots)
+            for i in students:
+                if i not in registered_set or not free_slots or rnd.random() >= spec.booking_share:
+                    continue
+                slot = free_slots.pop()
+                booking_seq += 1
+                canceled = rnd.random() < 0.05
+                bookings.append({
+                    "booking_id": f"bkg_{booking_seq:08x}", "slot_id": slot["slot_id"],
+                    "student_tg_id": student_tg(i), "created_at": _iso(now),
+                    "status": "canceled" if canceled else "active",
+                })
+
+    # ── submissions.csv / grades.csv (только прошедшие недели) ────────────────
+    submissions: List[Dict] = []
+    grades: List[Dict] = []
+    sub_seq = 0
+    grd_seq = 0
+    for w in range(1, spec.weeks + 1):
+        if deadlines[w] >= today:
+            continue
+        for i in registered:
+            if rnd.random() >= spec.booking_share:
+                continue
+            ta = ta_code((i + w - 2) % n_ta + 1)
+            for f in range(rnd.randint(1, 3)):
+                sub_seq += 1
+                submissions.append({
+                    "submission_id": f"sub_{sub_seq:08x}", "task_id": task_id(w),
+                    "student_code": student_code(i), "tg_id": student_tg(i),
+                    "submitted_at": _iso(datetime.combine(deadlines[w], time(12, 0), timezone.utc)),
+                    "file_path": f"submissions/{student_code(i)}/{task_id(w)}/page_{f + 1}.jpg", "comment": "",
+                })
+            if rnd.random() >= spec.graded_share:
+                continue
+            for _ in range(2 if rnd.random() < spec.regrade_share else 1):
+                grd_seq += 1
+                grades.append({
+                    "grade_id": f"grd_{grd_seq:08x}", "task_id": task_id(w), "student_code": student_code(i),
+                    "points": float(rnd.randint(2, 10)), "comment": "",
+                    "graded_by": ta, "graded_at": _iso(datetime.combine(deadlines[w], time(18, 0), timezone.utc)
+                                                       + timedelta(minutes=grd_seq % 1000)),
+                })
+
+    tables = {
+        "users.csv": (users, USERS_COLUMNS),
+        "roster.csv": (roster, ROSTER_COLUMNS),
+        "weeks.csv": (weeks, WEEKS_COLUMNS),
+        "tasks.csv": (tasks, TASK_COLUMNS),
+        "assignments.csv": (assignments, ASSIGNMENT_COLUMNS),
+        "slots.csv": (slots, SLOTS_COLUMNS),
+        "bookings.csv": (bookings, BOOKING_COLUMNS),
+        "submissions.csv": (submissions, SUBMISSION_COLUMNS),
+        "grades.csv": (grades, GRADE_COLUMNS),
+    }
+    for name, (rows, cols) in tables.items():
+        _write(out_dir, name, rows, cols)
+    return {name: len(rows) for name, (rows, _) in tables.items()}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Сгенерировать синтетический data-каталог")
+    ap.add_argument("--students", type=int, default=300, help=f"число студентов (типовые: {', '.join(map(str, SCALES))})")
+    ap.add_argument("--weeks", type=int, default=12)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", required=True, help="каталог назначения (DATA_DIR)")
+    args = ap.parse_args()
+    counts = generate(args.out, DatasetSpec(students=args.students, weeks=args.weeks, seed=args.seed))
+    for name, n in counts.items():
+        print(f"{name:18s} {n:>9d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Локальный поддельный Bot API на aiohttp — настоящий HTTP, настоящая AiohttpSession.
+
+В отличие от FakeTelegramSession проверяет весь путь запроса (сериализация,
+разбор ответов и ошибок aiogram) и умеет имитировать флуд-контроль Telegram:
+ответ 429 с parameters.retry_after для выбранных чатов. Файлы, добавленные через
+put_file(), отдаются getFile и файловым эндпоинтом /file/bot<token>/<path>.
+sendDocument принимает загрузку (выдаёт новый file_id) или известный file_id;
+revoke(file_id) заставляет «Telegram» отвергать ранее выданный id.
+
+    async with FakeBotApi() as api:
+        bot = api.bot()
+        api.flood(chat_id=5, times=1, retry_after=1)
+        ...
+        api.calls  # [(monotonic_time, method, params), ...]
+"""
+
+from __future__ import annotations
+import asyncio, itertools, time
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from bench.fake_session import FAKE_BOT_ID, FAKE_BOT_TOKEN
+
+
+class FakeBotApi:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: List[Tuple[float, str, Dict[str, Any]]] = []
+        self._floods: Dict[str, Tuple[int, int]] = {}  # chat_id → (сколько раз ответить 429, retry_after)
+        self._message_ids = itertools.count(1)
+        self.files: Dict[str, bytes] = {}  # file_path → содержимое
+        self.documents: Dict[str, bytes] = {}  # file_id → содержимое отправленного документа
+        self.uploads = 0
+        self._doc_ids = itertools.count(1)
+        self._server: Optional[TestServer] = None
+        self._bots: List[Bot] = []
+
+    async def __aenter__(self) -> "FakeBotApi":
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        app.router.add_get("/file/bot{token}/{path:.+}", self._file)
+        self._server = TestServer(app)
+        await self._server.start_server()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        for bot in self._bots:
+            await bot.session.close()
+        await self._server.close()
+
+    @property
+    def base_url(self) -> str:
+        return str(self._server.make_url("")).rstrip("/")
+
+    def bot(self, token: str = FAKE_BOT_TOKEN, **kwargs: Any) -> Bot:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(self.base_url))
+        bot = Bot(token=token, session=session, **kwargs)
+        self._bots.append(bot)
+        return bot
+
+    def flood(self, chat_id: int, times: int = 1, retry_after: int = 1) -> None:
+        """Следующие `times` запросов в chat_id получат 429 Too Many Requests."""
+        self._floods[str(chat_id)] = (times, retry_after)
+
+    def put_file(self, file_id: str, content: bytes) -> str:
+        """Зарегистрировать файл для getFile; вернуть его file_path."""
+        file_path = f"documents/{file_id}"
+        self.files[file_path] = content
+        return file_path
+
+    def revoke(self, file_id: str) -> None:
+        self.documents.pop(file_id, None)
+
+    def sent(self, method: str = "sendMessage") -> List[Dict[str, Any]]:
+        return [params for _, m, params in self.calls if m == method]
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        chat_id = str(params.get("chat_id", ""))
+        flood = self._floods.get(chat_id)
+        if flood and flood[0] > 0:
+            self._floods[chat_id] = (flood[0] - 1, flood[1])
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {flood[1]}",
+                "parameters": {"retry_after": flood[1]},
+            })
+        self.calls.append((time.monotonic(), method, params))
+        if method == "getMe":
+            result: Any = {"id": FAKE_BOT_ID, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+        elif method == "getFile":
+            file_path = f"documents/{params.get('file_id')}"
+            content = self.files.get(file_path, b"")
+            result = {"file_id": params.get("file_id"), "file_unique_id": params.get("file_id"),
+                      "file_size": len(content), "file_path": file_path}
+        elif method == "sendDocument":
+            document = self._document(params)
+            if document is None:
+                return web.json_response({"ok": False, "error_code": 400,
+                                          "description": "Bad Request: wrong file identifier/HTTP URL specified"},
+                                         status=400)
+            result = {
+                "message_id": next(self._message_ids), "date": int(time.time()),
+                "chat": {"id": int(chat_id or 0), "type": "private"},
+                "from": {"id": FAKE_BOT_ID, "is_bot": True, "first_name": "FakeBot"},
+                "document": document,
+            }
+        elif method.startswith("send"):
+            result = {
+                "message_id": next(self._message_ids), "date": int(time.time()),
+                "chat": {"id": int(chat_id or 0), "type": "private"},
+                "from": {"id": FAKE_BOT_ID, "is_bot": True, "first_name": "FakeBot"},
+                "text": params.get("text", ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    def _document(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        ref = str(params.get("document", ""))
+        if ref.startswith("attach://"):
+            upload = params.pop(ref[len("attach://"):])
+            content = upload.file.read()
+            file_id = f"DOC{next(self._doc_ids)}"
+            self.documents[file_id] = content
+            self.uploads += 1
+            params["document"] = f"<upload {upload.filename}>"
+            return {"file_id": file_id, "file_unique_id": file_id, "file_name": upload.filename,
+                    "file_size": len(content)}
+        if ref not in self.documents:
+            return None
+        return {"file_id": ref, "file_unique_id": ref, "file_size": len(self.documents[ref])}
+
+    async def _file(self, request: web.Request) -> web.StreamResponse:
+        content = self.files.get(request.match_info["path"])
+        if content is None:
+            raise web.HTTPNotFound()
+        self.calls.append((time.monotonic(), "file", {"path": request.match_info["path"]}))
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for i in range(0, len(content), 64 * 1024):
+            await response.write(content[i:i + 64 * 1024])
+        await response.write_eof()
+        return response
@@ -0,0 +1,66 @@
+"""
+Поддельная aiogram-сессия: отвечает на вызовы Bot API локально, без сети.
+
+Для нагрузочных прогонов и тестов: считает вызовы по методам и может добавлять
+искусственную задержку «сети» (api_latency).
+"""
+
+from __future__ import annotations
+import asyncio, itertools, time
+from collections import Counter
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import Chat, Message, User
+
+FAKE_BOT_ID = 42
+FAKE_BOT_TOKEN = f"{FAKE_BOT_ID}:LOADTEST"
+
+
+class FakeTelegramSession(BaseSession):
+    def __init__(self, api_latency: float = 0.0):
+        super().__init__()
+        self.api_latency = api_latency
+        self.calls: Counter[str] = Counter()
+        self._message_ids = itertools.count(1_000_000)
+
+    async def close(self) -> None:
+        pass
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[TelegramType],
+                           timeout: Optional[int] = None) -> TelegramType:
+        name = method.__api_method__
+        self.calls[name] += 1
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        return self._result_for(bot, method)
+
+    async def stream_content(self, url: str, headers: Optional[Dict[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    def _result_for(self, bot: Bot, method: TelegramMethod) -> Any:
+        name = method.__api_method__
+        if name == "getMe":
+            return User(id=FAKE_BOT_ID, is_bot=True, first_name="LoadBot", username="load_bot")
+        if name.startswith(("send", "edit", "copy", "forward")):
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message.model_validate({
+                "message_id": getattr(method, "message_id", None) or next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": FAKE_BOT_ID, "is_bot": True, "first_name": "LoadBot"},
+                "text": getattr(method, "text", None) or "",
+            }, context={"bot": bot})
+        return True
+
+
+def make_user(tg_id: int, first_name: str = "User") -> User:
+    return User(id=tg_id, is_bot=False, first_name=first_name)
+
+
+def make_chat(tg_id: int) -> Chat:
+    return Chat(id=tg_id, type="private")
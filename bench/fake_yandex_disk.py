@@ -0,0 +1,117 @@
+"""
+Локальный поддельный REST API Яндекс.Диска на aiohttp — для тестов YandexDiskClient.
+
+Поддерживает ровно то, что использует клиент: создание папок (PUT /v1/disk/resources),
+получение ссылки на загрузку (GET /v1/disk/resources/upload) и сам PUT файла по ссылке.
+Может отвечать ошибками на следующие запросы, чтобы проверить повторы:
+
+    async with FakeYandexDisk() as disk:
+        client = YandexDiskClient("token", base_url=disk.api_url, backoff=0.01)
+        disk.fail_next(2, status=503)
+        ...
+        disk.files  # {"app:/submissions/...": b"..."}
+"""
+
+from __future__ import annotations
+import asyncio, itertools, posixpath
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+def _json(status: int, payload: Dict[str, Any]) -> web.Response:
+    return web.json_response(payload, status=status)
+
+
+class FakeYandexDisk:
+    def __init__(self, token: str = "token", latency: float = 0.0):
+        self.token = token
+        self.latency = latency
+        self.files: Dict[str, bytes] = {}
+        self.dirs: Set[str] = set()
+        self.requests: List[Tuple[str, str]] = []   # (method, route)
+        self.max_parallel_uploads = 0
+        self._uploads_in_flight = 0
+        self._failures: List[int] = []
+        self._targets: Dict[str, str] = {}          # id ссылки загрузки → путь на Диске
+        self._ids = itertools.count(1)
+        self._server: Optional[TestServer] = None
+
+    async def __aenter__(self) -> "FakeYandexDisk":
+        app = web.Application(client_max_size=1024 ** 3)
+        app.router.add_put("/v1/disk/resources", self._mkdir)
+        app.router.add_get("/v1/disk/resources/upload", self._upload_link)
+        app.router.add_put("/upload/{id}", self._upload)
+        self._server = TestServer(app)
+        await self._server.start_server()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self._server.close()
+
+    @property
+    def api_url(self) -> str:
+        return str(self._server.make_url("/v1/disk"))
+
+    def fail_next(self, times: int = 1, status: int = 503) -> None:
+        """Следующие `times` запросов получат ответ `status`."""
+        self._failures.extend([status] * times)
+
+    # ── handlers ─────────────────────────────────────────────────────────────
+    async def _pre(self, request: web.Request, route: str, auth: bool = True) -> Optional[web.Response]:
+        self.requests.append((request.method, route))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._failures:
+            return _json(self._failures.pop(0), {"error": "Injected"})
+        if auth and request.headers.get("Authorization") != f"OAuth {self.token}":
+            return _json(401, {"error": "UnauthorizedError"})
+        return None
+
+    async def _mkdir(self, request: web.Request) -> web.Response:
+        error = await self._pre(request, "mkdir")
+        if error is not None:
+            return error
+        path = request.query["path"]
+        parent = posixpath.dirname(path)
+        if not parent.endswith(":") and parent not in self.dirs:
+            return _json(409, {"error": "DiskPathDoesntExistsError"})
+        if path in self.dirs:
+            return _json(409, {"error": "DiskPathPointsToExistentDirectoryError"})
+        self.dirs.add(path)
+        return _json(201, {"href": path})
+
+    async def _upload_link(self, request: web.Request) -> web.Response:
+        error = await self._pre(request, "upload_link")
+        if error is not None:
+            return error
+        path = request.query["path"]
+        parent = posixpath.dirname(path)
+        if not parent.endswith(":") and parent not in self.dirs:
+            return _json(409, {"error": "DiskPathDoesntExistsError"})
+        if path in self.files and request.query.get("overwrite") != "true":
+            return _json(409, {"error": "DiskResourceAlreadyExistsError"})
+        link_id = str(next(self._ids))
+        self._targets[link_id] = path
+        return _json(200, {"href": str(self._server.make_url(f"/upload/{link_id}")), "method": "PUT",
+                           "templated": False})
+
+    async def _upload(self, request: web.Request) -> web.Response:
+        self._uploads_in_flight += 1
+        self.max_parallel_uploads = max(self.max_parallel_uploads, self._uploads_in_flight)
+        try:
+            error = await self._pre(request, "upload", auth=False)
+            if error is not None:
+                await request.read()
+                return error
+            path = self._targets.pop(request.match_info["id"], None)
+            if path is None:
+                return _json(404, {"error": "UploadLinkExpired"})
+            chunks = []
+            async for chunk in request.content.iter_chunked(64 * 1024):
+                chunks.append(chunk)
+            self.files[path] = b"".join(chunks)
+            return web.Response(status=201)
+        finally:
+            self._uploads_in_flight -= 1
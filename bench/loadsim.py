@@ -0,0 +1,268 @@
+"""
+Нагрузочный симулятор: настоящий Dispatcher из app.main (те же middlewares, роутеры и DI)
++ поддельная сессия Bot API. Тысячи синтетических пользователей параллельно проходят сценарии:
+
+  start    — /start
+  student  — /student → WIC → неделя → слоты TA → запись
+  ta       — /myslots
+
+Отчёт: пропускная способность, p50/p95/p99 по сценариям и шагам, доля ошибок.
+
+Пример:
+    python -m bench.loadsim --students 3000 --users 5000 --concurrency 200 --json loadsim.json
+"""
+
+from __future__ import annotations
+import argparse, asyncio, itertools, json, logging, os, random, shutil, tempfile, time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.enums import ParseMode
+from aiogram.types import Update
+
+from app.config import Config
+from app.main import build_dispatcher
+from app.bot.routers.students.student_main import build_callback
+from bench.datagen import DatasetSpec, OWNER_TG_ID, generate
+from bench.fake_session import FAKE_BOT_ID, FAKE_BOT_TOKEN, FakeTelegramSession
+
+FLOW_MIX = {"student": 0.7, "start": 0.2, "ta": 0.1}
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = min(len(s) - 1, max(0, int(round(p / 100 * (len(s) - 1)))))
+    return s[k]
+
+
+@dataclass
+class LatencyStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    unhandled: int = 0
+
+    def summary(self) -> Dict[str, Any]:
+        n = len(self.latencies) + self.errors
+        return {
+            "count": n,
+            "errors": self.errors,
+            "error_rate": round(self.errors / n, 4) if n else 0.0,
+            "unhandled": self.unhandled,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 2),
+            "max_ms": round(max(self.latencies, default=0.0) * 1000, 2),
+        }
+
+
+@dataclass
+class Actor:
+    tg_id: int
+    first_name: str
+    ta_code: Optional[str] = None
+    week: Optional[int] = None
+    slot_id: Optional[str] = None
+
+
+class LoadSimulator:
+    def __init__(self, data_dir: str, concurrency: int = 100, api_latency: float = 0.0, seed: int = 1):
+        self.data_dir = data_dir
+        self.concurrency = concurrency
+        self.rnd = random.Random(seed)
+        self.session = FakeTelegramSession(api_latency=api_latency)
+        self.bot = Bot(token=FAKE_BOT_TOKEN, session=self.session,
+                       default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+        cfg = Config(bot_token=FAKE_BOT_TOKEN, owner_tg_id=OWNER_TG_ID, data_dir=data_dir,
+                     storage_kind="local", log_level="WARNING", yadisk_token=None, ta_invite_code=None)
+        self.dp: Dispatcher = build_dispatcher(cfg)
+        self.flows: Dict[str, LatencyStats] = {}
+        self.steps: Dict[str, LatencyStats] = {}
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self.students, self.tas = self._load_actors()
+
+    # ── dataset → actors ─────────────────────────────────────────────────────
+    def _load_actors(self) -> tuple[List[Actor], List[Actor]]:
+        users = pd.read_csv(os.path.join(self.data_dir, "users.csv"))
+        assignments = pd.read_csv(os.path.join(self.data_dir, "assignments.csv"))
+        slots = pd.read_csv(os.path.join(self.data_dir, "slots.csv"))
+        tasks = pd.read_csv(os.path.join(self.data_dir, "tasks.csv"))
+
+        # Текущая неделя: первая с дедлайном в будущем (у неё есть будущие слоты)
+        today = pd.Timestamp.today().strftime("%Y-%m-%d")
+        upcoming = tasks[tasks["deadline_iso"].astype(str) >= today]
+        week = int(upcoming["week"].min()) if not upcoming.empty else int(tasks["week"].max())
+
+        free = slots[(slots["status"] == "free") & (slots["date"].astype(str) > today)]
+        future_by_ta = {ta: grp["slot_id"].tolist() for ta, grp in free.groupby("ta_id")}
+        ta_of = {
+            str(r.student_code): str(r.ta_code)
+            for r in assignments[assignments["week"] == week].itertuples()
+        }
+        students_df = users[users["role"] == "student"]
+        students: List[Actor] = []
+        for r in students_df.itertuples():
+            ta = ta_of.get(str(r.id))
+            ta_slots = future_by_ta.get(ta) or [None]
+            students.append(Actor(tg_id=int(r.tg_id), first_name=str(r.first_name), ta_code=ta,
+                                  week=week, slot_id=self.rnd.choice(ta_slots)))
+        tas = [Actor(tg_id=int(r.tg_id), first_name=str(r.first_name), ta_code=str(r.id))
+               for r in users[users["role"] == "ta"].itertuples()]
+        return students, tas
+
+    # ── update builders ──────────────────────────────────────────────────────
+    def _user(self, actor: Actor) -> Dict[str, Any]:
+        return {"id": actor.tg_id, "is_bot": False, "first_name": actor.first_name}
+
+    def _message_update(self, actor: Actor, text: str) -> Update:
+        return Update.model_validate({
+            "update_id": next(self._update_ids),
+            "message": {
+                "message_id": next(self._message_ids), "date": int(time.time()),
+                "chat": {"id": actor.tg_id, "type": "private"},
+                "from": self._user(actor), "text": text,
+            },
+        }, context={"bot": self.bot})
+
+    def _callback_update(self, actor: Actor, data: str) -> Update:
+        return Update.model_validate({
+            "update_id": next(self._update_ids),
+            "callback_query": {
+                "id": str(next(self._update_ids)), "from": self._user(actor),
+                "chat_instance": str(actor.tg_id), "data": data,
+                "message": {
+                    "message_id": next(self._message_ids), "date": int(time.time()),
+                    "chat": {"id": actor.tg_id, "type": "private"},
+                    "from": {"id": FAKE_BOT_ID, "is_bot": True, "first_name": "LoadBot"},
+                    "text": "menu",
+                },
+            },
+        }, context={"bot": self.bot})
+
+    # ── flows ────────────────────────────────────────────────────────────────
+    def _flow_steps(self, flow: str, actor: Actor) -> List[tuple[str, Update]]:
+        if flow == "start":
+            return [("start", self._message_update(actor, "/start"))]
+        if flow == "ta":
+            return [("myslots", self._message_update(actor, "/myslots"))]
+        steps = [
+            ("student_menu", self._message_update(actor, "/student")),
+            ("wic_main", self._callback_update(actor, build_callback("wic_main"))),
+            ("week_menu", self._callback_update(actor, build_callback("week_menu", w=actor.week))),
+        ]
+        if actor.ta_code:
+            steps.append(("ta_slots", self._callback_update(actor, f"wk:slots:{actor.ta_code}:{actor.week}")))
+            if actor.slot_id:
+                steps.append(("book", self._callback_update(actor, f"wk:book:{actor.ta_code}:{actor.slot_id}")))
+        return steps
+
+    async def _run_flow(self, flow: str, actor: Actor, sem: asyncio.Semaphore) -> None:
+        async with sem:
+            flow_stats = self.flows.setdefault(flow, LatencyStats())
+            started = time.perf_counter()
+            for step, update in self._flow_steps(flow, actor):
+                step_stats = self.steps.setdefault(step, LatencyStats())
+                t0 = time.perf_counter()
+                try:
+                    result = await self.dp.feed_update(self.bot, update)
+                except Exception:
+                    step_stats.errors += 1
+                    flow_stats.errors += 1
+                    return
+                step_stats.latencies.append(time.perf_counter() - t0)
+                if result is UNHANDLED:
+                    step_stats.unhandled += 1
+                    flow_stats.unhandled += 1
+            flow_stats.latencies.append(time.perf_counter() - started)
+
+    def _pick_flow(self) -> str:
+        r, acc = self.rnd.random(), 0.0
+        for flow, share in FLOW_MIX.items():
+            acc += share
+            if r < acc:
+                return flow
+        return "start"
+
+    async def run(self, n_users: int) -> Dict[str, Any]:
+        sem = asyncio.Semaphore(self.concurrency)
+        jobs = []
+        for _ in range(n_users):
+            flow = self._pick_flow()
+            pool = self.tas if flow == "ta" else self.students
+            jobs.append(self._run_flow(flow, self.rnd.choice(pool), sem))
+        # апдейты идут через UpdateScheduler, как в боте (очереди пользователей, лимит воркеров)
+        scheduler = self.dp["update_scheduler"]
+        await scheduler.start()
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*jobs)
+        finally:
+            elapsed = time.perf_counter() - started
+            await scheduler.stop()
+        total_updates = sum(len(s.latencies) + s.errors for s in self.steps.values())
+        return {
+            "users": n_users,
+            "concurrency": self.concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "flows_per_s": round(n_users / elapsed, 2) if elapsed else 0.0,
+            "updates_per_s": round(total_updates / elapsed, 2) if elapsed else 0.0,
+            "flows": {k: v.summary() for k, v in sorted(self.flows.items())},
+            "steps": {k: v.summary() for k, v in sorted(self.steps.items())},
+            "api_calls": dict(self.session.calls),
+        }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"users={report['users']} concurrency={report['concurrency']} elapsed={report['elapsed_s']}s "
+          f"flows/s={report['flows_per_s']} updates/s={report['updates_per_s']}")
+    for section in ("flows", "steps"):
+        print(f"\n{section}:")
+        print(f"  {'name':14s} {'count':>7s} {'err%':>6s} {'p50ms':>9s} {'p95ms':>9s} {'p99ms':>9s}")
+        for name, s in report[section].items():
+            print(f"  {name:14s} {s['count']:>7d} {s['error_rate'] * 100:>5.1f}% "
+                  f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}")
+
+
+async def _amain(args: argparse.Namespace) -> Dict[str, Any]:
+    tmp = tempfile.mkdtemp(prefix="loadsim_")
+    try:
+        if args.data_dir:
+            # работаем на копии: сценарий записи меняет bookings.csv
+            shutil.copytree(args.data_dir, tmp, dirs_exist_ok=True)
+        else:
+            generate(tmp, DatasetSpec(students=args.students))
+        sim = LoadSimulator(tmp, concurrency=args.concurrency, api_latency=args.api_latency_ms / 1000)
+        try:
+            return await sim.run(args.users)
+        finally:
+            await sim.bot.session.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Нагрузочный прогон Dispatcher с поддельным Bot API")
+    ap.add_argument("--students", type=int, default=300, help="масштаб синтетического датасета")
+    ap.add_argument("--data-dir", help="готовый data-каталог (будет скопирован)")
+    ap.add_argument("--users", type=int, default=2000, help="число синтетических пользователей-сценариев")
+    ap.add_argument("--concurrency", type=int, default=100)
+    ap.add_argument("--api-latency-ms", type=float, default=0.0, help="искусственная задержка ответа Bot API")
+    ap.add_argument("--json", help="куда сохранить отчёт")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(_amain(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Фикстуры бенчмарков: синтетический data-каталог генерируется один раз на сессию.
+
+Масштаб задаётся BENCH_STUDENTS (по умолчанию маленький, чтобы обычный `pytest -q`
+оставался быстрым; для сравнения берите 300 / 3000 / 30000).
+"""
+
+from __future__ import annotations
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from bench.datagen import DatasetSpec, generate, student_code, student_email, student_tg, ta_code
+from app.services.users_service import UsersService
+from app.services.roster_service import RosterService
+from app.services.slot_service import SlotService
+from app.services.booking_service import BookingService
+from app.services.assignments_service import AssignmentsService
+
+BENCH_STUDENTS = int(os.getenv("BENCH_STUDENTS", "30"))
+# Для тяжёлых вызовов (полные сканы CSV) ограничиваем число раундов
+BENCH_SLOW_ROUNDS = int(os.getenv("BENCH_SLOW_ROUNDS", "3"))
+
+
+@pytest.fixture(scope="session")
+def bench_data_dir(tmp_path_factory) -> str:
+    out = str(tmp_path_factory.mktemp(f"bench_{BENCH_STUDENTS}"))
+    generate(out, DatasetSpec(students=BENCH_STUDENTS))
+    return out
+
+
+@pytest.fixture(scope="session")
+def services(bench_data_dir):
+    return SimpleNamespace(
+        users=UsersService(bench_data_dir),
+        roster=RosterService(bench_data_dir),
+        slots=SlotService(bench_data_dir),
+        bookings=BookingService(bench_data_dir),
+        assignments=AssignmentsService(bench_data_dir),
+    )
+
+
+@pytest.fixture(scope="session")
+def sample():
+    """Ключи «из середины» таблиц, чтобы поиск не заканчивался на первой строке."""
+    i = BENCH_STUDENTS // 2 or 1
+    return SimpleNamespace(
+        student_code=student_code(i),
+        student_tg=student_tg(i),
+        student_email=student_email(i),
+        ta_id=ta_code(1),
+        week=6,
+    )
+
+
+@pytest.fixture(autouse=True)
+def _bench_extra_info(request):
+    """Кладём масштаб в JSON-отчёт, чтобы сравнивать только сопоставимые прогоны."""
+    if "benchmark" in request.fixturenames:
+        request.getfixturevalue("benchmark").extra_info["students"] = BENCH_STUDENTS
@@ -0,0 +1,64 @@
+"""
+Бенчмарки горячих вызовов сервисов.
+
+Сравнимые JSON-результаты:
+    BENCH_STUDENTS=3000 pytest tests/benchmarks --benchmark-only --benchmark-json=bench_3000.json
+    pytest tests/benchmarks --benchmark-only --benchmark-autosave --benchmark-compare
+"""
+
+from __future__ import annotations
+import pytest
+
+from app.bot.routers.students.registration import _find_email_rows
+from tests.benchmarks.conftest import BENCH_SLOW_ROUNDS
+
+
+@pytest.mark.benchmark(group="users")
+def test_users_get_by_tg(benchmark, services, sample):
+    row = benchmark(services.users.get_by_tg, sample.student_tg)
+    assert row and row["id"] == sample.student_code
+
+
+@pytest.mark.benchmark(group="registration")
+def test_registration_email_lookup(benchmark, services, sample):
+    hits, col = benchmark(_find_email_rows, services.roster, sample.student_email)
+    assert col == "external_email" and len(hits) == 1
+
+
+@pytest.mark.benchmark(group="registration")
+def test_roster_get_by_email(benchmark, services, sample):
+    row = benchmark(services.roster.get_by_email, sample.student_email)
+    assert row and row["student_code"] == sample.student_code
+
+
+@pytest.mark.benchmark(group="assignments")
+def test_assignments_get(benchmark, services, sample):
+    ta = benchmark(services.assignments.get, sample.student_code, sample.week)
+    assert ta and ta.startswith("TA-")
+
+
+@pytest.mark.benchmark(group="slots")
+def test_slots_list_free_with_bookings(benchmark, services):
+    df = benchmark.pedantic(services.slots.list_free_with_bookings, args=(services.bookings,),
+                            rounds=BENCH_SLOW_ROUNDS, iterations=1)
+    assert "booked_count" in df.columns or df.empty
+
+
+@pytest.mark.benchmark(group="slots")
+def test_slots_enriched_for_teacher(benchmark, services, sample):
+    df = benchmark.pedantic(services.slots.get_enriched_slots_for_teacher, args=(sample.ta_id, services.bookings),
+                            rounds=BENCH_SLOW_ROUNDS, iterations=1)
+    assert not df.empty and "computed_status" in df.columns
+
+
+@pytest.mark.benchmark(group="bookings")
+def test_booking_create_cancel(benchmark, services, sample):
+    slot_id = str(services.slots.list_for_teacher(sample.ta_id).iloc[0]["slot_id"])
+    active_before = services.bookings.count_for_slot(slot_id)
+
+    def create_cancel():
+        row = services.bookings.create(slot_id, sample.student_tg)
+        services.bookings.cancel(row["booking_id"])
+
+    benchmark(create_cancel)
+    assert services.bookings.count_for_slot(slot_id) == active_before
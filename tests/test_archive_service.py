@@ -0,0 +1,96 @@
+import asyncio, os, zipfile
+from datetime import date
+
+from app.integrations.storage.bundles import is_locator, read_index
+from app.integrations.storage.cas_storage import ContentAddressedStorage
+from app.integrations.storage.local_storage import LocalDiskStorage
+from app.services.archive_service import SubmissionArchiveService
+from app.services.assignments_service import AssignmentsService
+from app.services.export_service import SubmissionExportService
+from app.services.submission_service import SubmissionService
+from app.services.task_service import TaskService
+from app.services.weeks_service import WeeksService
+
+AFTER_WEEK_1 = date(2025, 9, 25)  # дедлайн W01 — 06.09.2025, +14 дней прошло; W05 (04.10) — нет
+
+
+def _setup(tmp_path, storage):
+    data = str(tmp_path)
+    tasks = TaskService(data)
+    subs = SubmissionService(data, storage, tasks=tasks)
+    return subs, SubmissionArchiveService(subs, tasks, WeeksService(data))
+
+
+def _save(subs, code, task_id, name, content):
+    return asyncio.run(subs.save_submission(1, code, task_id, name, content))
+
+
+def test_past_week_is_packed_into_bundle_and_read_back(tmp_path):
+    subs, archive = _setup(tmp_path, LocalDiskStorage(str(tmp_path / "storage")))
+    code = b"print('hello')\n" * 500
+    photo = os.urandom(4096)
+    originals = [_save(subs, "S-1", "W01", "sol.py", code)["file_path"],
+                 _save(subs, "S-2", "W01", "page.jpg", photo)["file_path"]]
+    current = _save(subs, "S-1", "W05", "next.py", b"week 5")["file_path"]
+
+    assert archive.due_weeks(AFTER_WEEK_1) == [1]
+    bundles = archive.run_due(AFTER_WEEK_1)
+    assert len(bundles) == 1 and archive.due_weeks(AFTER_WEEK_1) == []
+
+    df = subs.table.read().set_index("file_name")
+    assert is_locator(df.loc["sol.py", "file_path"]) and is_locator(df.loc["page.jpg", "file_path"])
+    assert df.loc["next.py", "file_path"] == current and os.path.exists(current)
+    assert not any(os.path.exists(p) for p in originals)
+    with subs.storage.open(df.loc["sol.py", "file_path"]) as f:
+        assert f.read() == code
+    with subs.storage.open(df.loc["page.jpg", "file_path"]) as f:
+        assert f.read() == photo
+    index = {e["name"]: e for e in read_index(bundles[0])}
+    assert index["S-1/W01/" + df.loc["sol.py", "submission_id"] + "_sol.py"]["length"] < len(code) // 10
+
+    # выгрузка TA читает архивные сдачи через Storage.open
+    AssignmentsService(str(tmp_path)).set("S-1", 1, "TA-01")
+    exports = SubmissionExportService(str(tmp_path), subs, AssignmentsService(str(tmp_path)), archive.tasks)
+    archives = exports.build_archives("TA-01", 1)
+    with zipfile.ZipFile(archives[0]) as zf:
+        assert zf.read("S-1/W01/sol.py") == code
+
+
+def test_cas_blob_shared_with_live_week_survives_archiving(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path / "storage"))
+    subs, archive = _setup(tmp_path, storage)
+    old = _save(subs, "S-1", "W01", "a.py", b"shared")
+    _save(subs, "S-1", "W01", "a.py", b"resubmitted")  # вторая версия того же пути
+    live = _save(subs, "S-1", "W05", "b.py", b"shared")  # тот же блоб в неархивной неделе
+    assert live["file_path"] == old["file_path"]
+
+    archive.run_due(AFTER_WEEK_1)
+    df = subs.table.read()
+    week1 = df[df["task_id"] == "W01"]
+    assert week1["file_path"].map(is_locator).all() and not is_locator(df["file_path"].iloc[2])
+    assert storage.versions("submissions/S-1/W01/a.py") == []
+    # общий блоб остаётся: на него ссылается сдача W05 (и путь CAS, и строка submissions.csv)
+    assert os.path.exists(live["file_path"]) and storage.refcount(live["sha256"]) == 1
+    assert [storage.open(p).read() for p in week1["file_path"]] == [b"shared", b"resubmitted"]
+    assert archive.run_due(AFTER_WEEK_1) == []  # повторный прогон ничего не пакует
+
+
+def test_file_reuploaded_during_archiving_stays_local(tmp_path):
+    subs, archive = _setup(tmp_path, LocalDiskStorage(str(tmp_path / "storage")))
+    old = _save(subs, "S-1", "W01", "sol.py", b"first")
+    rewrite = archive._rewrite
+
+    def reupload_then_rewrite(*args):
+        # перезаливка по тому же пути между упаковкой в бандл и заменой путей
+        assert _save(subs, "S-1", "W01", "sol.py", b"second")["file_path"] == old["file_path"]
+        return rewrite(*args)
+
+    archive._rewrite = reupload_then_rewrite
+    assert len(archive.run_due(AFTER_WEEK_1)) == 1
+
+    first, second = subs.table.read()["file_path"]
+    assert is_locator(first) and second == old["file_path"]
+    with subs.storage.open(first) as f:
+        assert f.read() == b"first"
+    with open(second, "rb") as f:
+        assert f.read() == b"second"
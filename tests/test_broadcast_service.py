@@ -0,0 +1,104 @@
+import asyncio
+
+import pandas as pd
+
+from app.bot.file_id_cache import FileIdCache
+from app.bot.outbox import Outbox
+from app.services.broadcast_service import BroadcastService
+from app.services.roster_service import RosterService
+from app.services.users_service import USERS_COLUMNS, UsersService
+from app.services.weeks_service import WeeksService
+from app.utils.metrics import METRICS
+from bench.fake_bot_api import FakeBotApi
+
+
+def _service(tmp_path, **kwargs):
+    users = UsersService(str(tmp_path))
+    users.table.write(pd.DataFrame([
+        {"tg_id": 1, "role": "student"}, {"tg_id": 2, "role": "student"},
+        {"tg_id": 3, "role": "ta"}, {"tg_id": 4, "role": "owner"},
+    ], columns=USERS_COLUMNS))
+    roster = RosterService(str(tmp_path))
+    roster.table.write(pd.DataFrame([{"student_code": "S-2", "tg_id": 2, "role": "student"},
+                                     {"student_code": "S-5", "tg_id": 5, "role": "student"},
+                                     {"student_code": "S-6", "role": "student"}]))
+    weeks = WeeksService(str(tmp_path))
+    weeks.table.write(pd.DataFrame([{"week": 3, "title": "Графы", "description": ""}]))
+    materials = tmp_path / "materials" / "W03"
+    materials.mkdir(parents=True, exist_ok=True)
+    (materials / "tasks.pdf").write_bytes(b"%PDF W03")
+    return BroadcastService(str(tmp_path), users, roster, weeks, FileIdCache(str(tmp_path)),
+                            str(tmp_path / "materials"), auto=False, **kwargs)
+
+
+def _run(scenario):
+    async def main():
+        async with FakeBotApi() as api:
+            bot = api.bot()
+            outbox = Outbox(global_rate=200.0, chat_rate=50.0, max_retries=0)
+            await outbox.start(bot)
+            try:
+                return await scenario(api, bot, outbox)
+            finally:
+                await outbox.stop()
+    return asyncio.run(main())
+
+
+def test_broadcast_reaches_audience_once_and_reports_failures(tmp_path):
+    svc = _service(tmp_path, batch_size=2)
+
+    async def scenario(api, bot, outbox):
+        await svc.start(bot, outbox)
+        api.flood(chat_id=5, times=5, retry_after=1)
+        row = svc.create(3)
+        while svc._tasks:
+            await asyncio.sleep(0.05)
+        await svc.stop()
+        return api, row
+
+    api, row = _run(scenario)
+    assert row["total"] == 5  # 1, 2, 5 — студенты (2 без дубля), 3 и 4 — TA; без tg_id не считается
+    report = svc.report(row["broadcast_id"]).set_index("tg_id")
+    assert report.loc[5, "status"] == "failed" and "RetryAfter" in report.loc[5, "error"]
+    assert svc.summary(row["broadcast_id"]) == {"pending": 0, "sent": 4, "failed": 1}
+    assert svc.get(row["broadcast_id"])["status"] == "done"
+    assert api.uploads == 1 and len(api.sent("sendDocument")) == 4
+    assert "Графы" in api.sent()[0]["text"]
+
+
+def test_broadcast_resumes_from_checkpoint_after_restart(tmp_path):
+    svc = _service(tmp_path)
+    row = svc.create(3, roles=("student",))  # сервис не запущен — рассылка ждёт start()
+    svc._checkpoint(row["broadcast_id"], {"1": ""})  # до «падения» успели доставить одному
+
+    async def scenario(api, bot, outbox):
+        restarted = _service(tmp_path)
+        await restarted.start(bot, outbox)
+        while restarted._tasks:
+            await asyncio.sleep(0.05)
+        return api
+
+    api = _run(scenario)
+    assert sorted(p["chat_id"] for p in api.sent()) == ["2", "5"]
+    assert svc.summary(row["broadcast_id"]) == {"pending": 0, "sent": 3, "failed": 0}
+
+
+def test_crashed_broadcast_is_logged_and_counted(tmp_path, caplog):
+    svc = _service(tmp_path)
+    row = svc.create(3, roles=("student",))
+
+    def broken_checkpoint(*_):
+        raise OSError("disk full")
+
+    svc._checkpoint = broken_checkpoint
+    crashed = METRICS.get("broadcast_crashed_total") or 0
+
+    async def scenario(api, bot, outbox):
+        await svc.start(bot, outbox)
+        while svc._tasks:
+            await asyncio.sleep(0.05)
+
+    _run(scenario)
+    assert METRICS.get("broadcast_crashed_total") == crashed + 1
+    assert any(row["broadcast_id"] in r.getMessage() and r.exc_info for r in caplog.records)
+    assert svc.get(row["broadcast_id"])["status"] == "running"  # продолжится при следующем start()
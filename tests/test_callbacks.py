@@ -0,0 +1,74 @@
+import asyncio
+import time
+from datetime import date
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import CallbackQuery, Update
+
+from app.bot.callbacks import CallbackCodec, CallbackData, CallbackDispatcher
+from app.bot.routers.students.student_main import STUDENT_CB
+from app.bot.routers.teachers.professor_main import TEACHER_CB
+from bench.fake_session import FAKE_BOT_ID, FAKE_BOT_TOKEN, FakeTelegramSession
+
+
+def test_pack_is_compact_and_round_trips():
+    data = STUDENT_CB.pack("week_signup_pick_teacher", w=12, ta="TA-07")
+    assert data == "s|p|c|TA-07"
+    assert STUDENT_CB.unpack(data) == CallbackData("s", "week_signup_pick_teacher", {"w": 12, "ta": "TA-07"})
+
+    data = TEACHER_CB.pack("slot_list", d=date(2025, 9, 6))
+    assert len(data) < len("r=t;a=slot_list;d=20250906")
+    assert TEACHER_CB.unpack(data).params == {"d": date(2025, 9, 6)}
+
+
+def test_legacy_format_still_decodes():
+    assert STUDENT_CB.unpack("r=s;a=week_menu;w=5") == CallbackData("s", "week_menu", {"w": 5})
+    assert TEACHER_CB.unpack("r=t;a=slot_list;d=20250906").params == {"d": date(2025, 9, 6)}
+    assert TEACHER_CB.unpack("r=t;a=slot_card;s=slt_0000002a").params == {"s": "slt_0000002a"}
+
+
+def test_foreign_and_broken_data_is_ignored():
+    assert STUDENT_CB.unpack("week:select:3") is None
+    assert STUDENT_CB.unpack("r=t;a=back_to_main") is None
+    assert STUDENT_CB.unpack("s|w") is None          # не хватает поля
+    assert STUDENT_CB.unpack("s|w|zz|1") is None     # лишнее поле
+    assert STUDENT_CB.unpack("r=s;a=unknown") is None
+
+
+def test_dispatcher_routes_by_action_with_di():
+    codec = CallbackCodec("z")
+    codec.action("open", "o", n=int)
+    codec.action("close", "c")
+    router = Router()
+    callbacks = CallbackDispatcher(router, codec)
+    seen = []
+
+    @callbacks.on("open")
+    async def on_open(cb: CallbackQuery, cbd: CallbackData, marker: str):
+        seen.append((cbd.action, cbd.get("n"), marker))
+
+    dp = Dispatcher(marker="di")
+    dp.include_router(router)
+    bot = Bot(token=FAKE_BOT_TOKEN, session=FakeTelegramSession())
+
+    def update(data: str) -> Update:
+        return Update.model_validate({
+            "update_id": 1,
+            "callback_query": {
+                "id": "1", "chat_instance": "1", "data": data,
+                "from": {"id": 7, "is_bot": False, "first_name": "Test"},
+                "message": {
+                    "message_id": 1, "date": int(time.time()), "chat": {"id": 7, "type": "private"},
+                    "from": {"id": FAKE_BOT_ID, "is_bot": True, "first_name": "Bot"}, "text": "menu",
+                },
+            },
+        }, context={"bot": bot})
+
+    async def scenario():
+        assert await dp.feed_update(bot, update(codec.pack("open", n=40))) is not UNHANDLED
+        assert await dp.feed_update(bot, update("r=z;a=open;n=41")) is not UNHANDLED
+        assert await dp.feed_update(bot, update(codec.pack("close"))) is UNHANDLED
+
+    asyncio.run(scenario())
+    assert seen == [("open", 40, "di"), ("open", 41, "di")]
@@ -0,0 +1,45 @@
+import asyncio, os
+
+from app.integrations.storage.cas_storage import ContentAddressedStorage
+
+
+def _blobs(storage):
+    return sorted(f for _, _, files in os.walk(storage.blobs_dir) for f in files)
+
+
+def test_identical_uploads_share_one_blob_and_versions_are_kept(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path / "storage"))
+
+    async def scenario():
+        a = await storage.save_bytes("submissions/S-1/W01/sol.pdf", b"v1")
+        again = await storage.save_bytes("submissions/S-1/W01/sol.pdf", b"v1")  # повтор — no-op
+        shared = await storage.save_bytes("submissions/S-2/W01/copy.pdf", b"v1")
+        src = tmp_path / "upload.tmp"
+        src.write_bytes(b"v2")
+        b = await storage.save_file("submissions/S-1/W01/sol.pdf", str(src))
+        return a, again, shared, b, src
+
+    a, again, shared, b, src = asyncio.run(scenario())
+    assert a == again == shared and a != b
+    assert not src.exists()
+    assert len(_blobs(storage)) == 2
+
+    versions = storage.versions("submissions/S-1/W01/sol.pdf")
+    assert [v["version"] for v in versions] == [1, 2]
+    with open(versions[0]["blob_path"], "rb") as f:
+        assert f.read() == b"v1"
+    assert storage.refcount(versions[0]["sha256"]) == 2
+    assert list(storage.manifest("submissions/S-1/")) == ["submissions/S-1/W01/sol.pdf"]
+    assert storage.manifest("submissions/S-1/")["submissions/S-1/W01/sol.pdf"]["version"] == 2
+
+
+def test_blob_is_removed_with_last_reference(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path / "storage"))
+    asyncio.run(storage.save_bytes("materials/W01/slides.pdf", b"same"))
+    asyncio.run(storage.save_bytes("materials/W02/slides.pdf", b"same"))
+
+    assert storage.delete("materials/W01/slides.pdf") == 1
+    assert len(_blobs(storage)) == 1
+    assert storage.delete("materials/W02/slides.pdf") == 1
+    assert _blobs(storage) == []
+    assert storage.versions("materials/W02/slides.pdf") == []
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from app.domain.events import BookingCreated, DomainEvent, GradeSet, RoleChanged, UserDeleted
+from app.services.booking_service import BookingService
+from app.services.event_bus import EventBus
+from app.services.grade_service import GradeService
+from app.services.users_service import USERS_COLUMNS, UsersService
+
+
+def test_services_publish_events_after_write(tmp_path):
+    d = str(tmp_path)
+    pd.DataFrame([{"tg_id": 10, "role": "student", "id": "S-1"}], columns=USERS_COLUMNS).to_csv(
+        f"{d}/users.csv", index=False)
+    events = EventBus()
+    seen = []
+    events.subscribe(DomainEvent, seen.append)
+    users, bookings, grades = UsersService(d, events), BookingService(d, events), GradeService(d, events)
+
+    def on_booking(event):
+        # событие приходит после записи: таблица уже содержит строку
+        assert len(bookings.table.find(booking_id=event.booking["booking_id"])) == 1
+
+    events.subscribe(BookingCreated, on_booking)
+
+    users.upsert_basic(10, role="ta")
+    bookings.create("slt_1", 10)
+    grades.set_grade("W01", "S-1", 9, "", 10)
+    assert users.delete(10) and not users.delete(10)
+
+    kinds = [type(e).__name__ for e in seen]
+    assert kinds == ["UserUpserted", "RoleChanged", "BookingCreated", "GradeSet", "UserDeleted"]
+    role = next(e for e in seen if isinstance(e, RoleChanged))
+    assert (role.tg_id, role.old_role, role.new_role) == (10, "student", "ta")
+    assert isinstance(seen[3], GradeSet) and seen[3].grade["points"] == 9.0
+    assert isinstance(seen[4], UserDeleted) and users.get_by_tg(10) is None
+
+
+def test_failing_handler_does_not_break_others():
+    events = EventBus()
+    got = []
+
+    def broken(event):
+        raise RuntimeError("boom")
+
+    events.subscribe(GradeSet, broken)
+    events.subscribe(GradeSet, got.append)
+    events.publish(GradeSet({"grade_id": "g"}))
+    events.unsubscribe(GradeSet, got.append)
+    events.publish(GradeSet({"grade_id": "h"}))
+    assert [e.grade["grade_id"] for e in got] == ["g"]
@@ -0,0 +1,87 @@
+import asyncio, os, zipfile
+
+import pandas as pd
+
+from app.integrations.storage.local_storage import LocalDiskStorage
+from app.services.assignments_service import AssignmentsService
+from app.services.export_service import SubmissionExportService
+from app.services.submission_service import SubmissionService
+from app.services.task_service import TaskService
+
+
+def _setup(tmp_path, max_archive_bytes):
+    data = str(tmp_path)
+    subs = SubmissionService(data, LocalDiskStorage(str(tmp_path / "storage")), max_week_files=50)
+    assignments = AssignmentsService(data)
+    tasks = TaskService(data)
+    tasks.table.write(pd.DataFrame([{"task_id": "tsk_a", "week": 3, "title": "A"},
+                                    {"task_id": "tsk_b", "week": 4, "title": "B"}]))
+    for code in ("S-1", "S-2", "S-3"):
+        assignments.set(code, 3, "TA-01")
+    assignments.set("S-9", 3, "TA-02")
+    return subs, SubmissionExportService(data, subs, assignments, tasks, max_archive_bytes=max_archive_bytes)
+
+
+def _save(subs, code, task_id, name, content):
+    asyncio.run(subs.save_submission(1, code, task_id, name, content))
+
+
+def test_export_selects_latest_submissions_of_assigned_students(tmp_path):
+    subs, exports = _setup(tmp_path, 10 * 1024 * 1024)
+    _save(subs, "S-1", "tsk_a", "sol.py", b"old")
+    _save(subs, "S-1", "tsk_a", "sol.py", b"new")
+    _save(subs, "S-2", "W03", "sol.ipynb", b"{}")      # неделя по task_id вида Wnn
+    _save(subs, "S-2", "tsk_b", "other.py", b"W04")    # другая неделя
+    _save(subs, "S-9", "tsk_a", "alien.py", b"TA-02")  # чужой студент
+    subs.table.append_row({"submission_id": "sub_remote", "task_id": "tsk_a", "student_code": "S-3",
+                           "submitted_at": "2025-09-01T10:00:00+00:00", "file_path": "yadisk://submissions/x.pdf"})
+
+    archives = exports.build_archives("TA-01", 3)
+    assert [os.path.basename(a) for a in archives] == ["W03_TA-01.zip"]
+    with zipfile.ZipFile(archives[0]) as zf:
+        assert sorted(zf.namelist()) == ["MISSING.txt", "S-1/tsk_a/sol.py", "S-2/W03/sol.ipynb"]
+        assert zf.read("S-1/tsk_a/sol.py") == b"new"
+        assert "yadisk://" in zf.read("MISSING.txt").decode()
+    exports.cleanup(archives)
+    assert os.listdir(exports.tmp_dir) == []
+
+
+def test_export_splits_into_parts_under_size_limit(tmp_path):
+    subs, exports = _setup(tmp_path, 300 * 1024)
+    for code in ("S-1", "S-2", "S-3"):
+        _save(subs, code, "tsk_a", "scan.pdf", os.urandom(120 * 1024))
+
+    selected = exports.select("TA-01", 3)
+    reads = []
+    read = subs.table.read
+    subs.table.read = lambda: (reads.append(1), read())[1]
+    archives = exports.build_archives("TA-01", 3, selected)
+    assert reads == []  # отобранные строки не перечитываются
+    assert len(archives) == 2 and archives[0].endswith("_part1of2.zip")
+    names = []
+    for path in archives:
+        assert os.path.getsize(path) <= 300 * 1024
+        with zipfile.ZipFile(path) as zf:
+            assert zf.testzip() is None
+            names += zf.namelist()
+    assert sorted(names) == [f"S-{i}/tsk_a/scan.pdf" for i in (1, 2, 3)]
+
+
+def test_export_keeps_every_file_of_latest_album_and_each_named_file(tmp_path):
+    subs, exports = _setup(tmp_path, 10 * 1024 * 1024)
+
+    async def upload(names):
+        async def chunks(data):
+            yield data
+        return await subs.save_uploads(1, "S-1", "tsk_a", [(n, chunks(n.encode())) for n in names])
+
+    asyncio.run(upload(["old1.jpg", "old2.jpg"]))
+    asyncio.run(upload(["p1.jpg", "p2.jpg"]))    # новый альбом заменяет старый целиком
+    _save(subs, "S-1", "tsk_a", "report.pdf", b"pdf")
+    _save(subs, "S-1", "tsk_a", "nb.ipynb", b"{}")
+    _save(subs, "S-1", "tsk_a", "nb.ipynb", b"{ }")  # версия того же файла
+
+    archives = exports.build_archives("TA-01", 3)
+    with zipfile.ZipFile(archives[0]) as zf:
+        assert sorted(zf.namelist()) == [f"S-1/tsk_a/{n}" for n in ("nb.ipynb", "p1.jpg", "p2.jpg", "report.pdf")]
+        assert zf.read("S-1/tsk_a/nb.ipynb") == b"{ }"
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+
+from app.bot.file_id_cache import FileIdCache
+from app.bot.outbox import Outbox
+from bench.fake_bot_api import FakeBotApi
+
+
+def test_same_content_is_uploaded_once_and_cache_survives_restart(tmp_path):
+    src = tmp_path / "W01.pdf"
+    src.write_bytes(b"%PDF tasks")
+    copy = tmp_path / "W01-copy.pdf"
+    copy.write_bytes(b"%PDF tasks")
+
+    async def scenario():
+        async with FakeBotApi() as api:
+            bot = api.bot()
+            cache = FileIdCache(str(tmp_path))
+            outbox = Outbox(global_rate=100.0, chat_rate=100.0)
+            await outbox.start(bot)
+            try:
+                # параллельные первые отправки ждут одну загрузку
+                await asyncio.gather(*[cache.send_document(bot, chat, str(src), outbox=outbox) for chat in range(1, 21)])
+                await cache.send_document(bot, 99, str(copy))
+            finally:
+                await outbox.stop()
+            restarted = FileIdCache(str(tmp_path))
+            await restarted.send_document(bot, 100, str(src))
+            return api
+
+    api = asyncio.run(scenario())
+    assert api.uploads == 1
+    assert len(api.sent("sendDocument")) == 22
+    assert set(api.documents) == {"DOC1"}
+
+
+def test_rejected_file_id_is_reuploaded(tmp_path):
+    src = tmp_path / "template.ipynb"
+    src.write_bytes(b"{}")
+
+    async def scenario():
+        async with FakeBotApi() as api:
+            bot = api.bot()
+            cache = FileIdCache(str(tmp_path))
+            await cache.send_document(bot, 1, str(src))
+            api.revoke("DOC1")
+            message = await cache.send_document(bot, 2, str(src), caption="Шаблон")
+            await cache.send_document(bot, 3, str(src))
+            return api, message, FileIdCache(str(tmp_path))
+
+    api, message, reloaded = asyncio.run(scenario())
+    assert api.uploads == 2
+    assert message.document.file_id == "DOC2"
+    assert list(reloaded._ids.values()) == ["DOC2"]
+
+
+def test_other_bad_request_keeps_cached_file_id(tmp_path):
+    src = tmp_path / "W02.pdf"
+    src.write_bytes(b"%PDF week 2")
+    cache = FileIdCache(str(tmp_path))
+    cache.put(cache._digest(str(src)), "DOC1")
+    calls = []
+
+    async def bot(method):
+        calls.append(method.document)
+        raise TelegramBadRequest(method, "Bad Request: chat not found")
+
+    with pytest.raises(TelegramBadRequest, match="chat not found"):
+        asyncio.run(cache.send_document(bot, 1, str(src)))
+    assert calls == ["DOC1"]  # без повторной загрузки
+    assert list(FileIdCache(str(tmp_path))._ids.values()) == ["DOC1"]
@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+from aiogram.fsm.storage.base import StorageKey
+
+from app.bot.fsm_storage import SqliteStorage
+
+KEY = StorageKey(bot_id=42, chat_id=7, user_id=7)
+
+
+def test_state_and_data_survive_restart(tmp_path):
+    path = str(tmp_path / "fsm.sqlite3")
+
+    async def scenario():
+        first = SqliteStorage(path)
+        await first.set_state(KEY, "StudentRegFSM:waiting_email")
+        await first.update_data(KEY, {"email": "s@u.edu"})
+        await first.close()
+
+        second = SqliteStorage(path)
+        try:
+            return await second.get_state(KEY), await second.get_data(KEY)
+        finally:
+            await second.close()
+
+    assert asyncio.run(scenario()) == ("StudentRegFSM:waiting_email", {"email": "s@u.edu"})
+
+
+def test_other_process_writes_invalidate_cache(tmp_path):
+    path = str(tmp_path / "fsm.sqlite3")
+
+    async def scenario():
+        a, b = SqliteStorage(path), SqliteStorage(path)
+        await a.set_state(KEY, "one")
+        assert await b.get_state(KEY) == "one"
+        await a.set_state(KEY, "two")
+        assert await b.get_state(KEY) == "two"
+        await a.set_state(KEY, None)
+        assert await b.get_state(KEY) is None
+        await a.close()
+        await b.close()
+
+    asyncio.run(scenario())
+
+
+def test_expired_states_are_hidden_and_compacted(tmp_path):
+    async def scenario():
+        storage = SqliteStorage(str(tmp_path / "fsm.sqlite3"), ttl=0.05)
+        await storage.set_state(KEY, "ScheduleFSM:pick_date")
+        await storage.update_data(KEY, {"date": "2025-09-06"})
+        time.sleep(0.1)
+        assert await storage.get_state(KEY) is None
+        assert await storage.get_data(KEY) == {}
+        assert storage.compact() == 1
+        await storage.close()
+
+    asyncio.run(scenario())
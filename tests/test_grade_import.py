@@ -0,0 +1,70 @@
+import pytest
+
+from app.services.assignments_service import AssignmentsService
+from app.services.grade_import_service import GradeImportError, GradeImportService
+from app.services.grade_service import GradeService
+from app.services.roster_service import RosterService
+from app.services.task_service import TaskService
+from app.services.users_service import UsersService
+
+
+def _setup(tmp_path):
+    data = str(tmp_path)
+    roster, users, tasks, assignments = RosterService(data), UsersService(data), TaskService(data), AssignmentsService(data)
+    roster.table.append_rows([{"student_code": "S-1"}, {"student_code": "S-2"}, {"student_code": "S-3"}])
+    users.upsert_basic(500, role="ta", id="TA-01")
+    tasks.table.append_rows([{"task_id": "tsk_w1", "week": 1, "title": "Вводное", "max_points": 8},
+                             {"task_id": "tsk_hw", "week": 2, "title": "ДЗ", "max_points": 10},
+                             {"task_id": "tsk_a", "week": 4, "title": "Часть A", "max_points": 5},
+                             {"task_id": "tsk_b", "week": 4, "title": "Часть B", "max_points": 5}])
+    assignments.set("S-1", 1, "TA-01")
+    assignments.set("S-2", 1, "TA-01")
+    assignments.set("S-1", 2, "TA-01")
+    grades = GradeService(data, tasks=tasks)
+    return grades, GradeImportService(grades, roster, users, tasks, assignments)
+
+
+def test_ta_import_commits_valid_rows_in_one_batch_and_reports_rejected(tmp_path):
+    grades, importer = _setup(tmp_path)
+    csv = ("student_code;task_id;week;points;comment\n"
+           "S-1;;1;7,5;ок\n"          # 2: неделя → её единственное задание tsk_w1
+           "S-2;tsk_w1;;4;\n"         # 3
+           "S-3;tsk_w1;;5;\n"         # 4: не назначен этому TA
+           "S-9;tsk_w1;;5;\n"         # 5: нет в ростере
+           "S-1;tsk_hw;;11;\n"        # 6: больше max_points
+           "S-1;tsk_hw;3;5;\n"        # 7: задание не из недели 3
+           "S-1;tsk_hw;;abc;\n"       # 8: не число
+           "S-1;tsk_w1;;8;\n"         # 9: повтор строки 2
+           "S-1;tsk_hw;2;10;макс\n"   # 10
+           "S-1;;2;1000;\n"           # 11: неделя 2 → tsk_hw, 1000 больше максимума 10
+           "S-1;W02;;3;\n")           # 12: task_id, которого нет в tasks.csv
+    writes = []
+    write = grades.table.write
+    grades.table.write = lambda df: (writes.append(len(df)), write(df))
+
+    report = importer.import_file("marks.csv", csv.encode(), graded_by=500, ta_id="TA-01")
+    assert [(r["student_code"], r["task_id"], r["points"]) for r in report.accepted] == \
+        [("S-1", "tsk_w1", 7.5), ("S-2", "tsk_w1", 4.0), ("S-1", "tsk_hw", 10.0)]
+    assert [line for line, _ in report.rejected] == [4, 5, 6, 7, 8, 9, 11, 12]
+    assert "повтор строки 2" in report.rejected[5][1]
+    assert "максимума 10" in report.rejected[6][1] and "W02" in report.rejected[7][1]
+    assert writes == [3]  # один пакет — одна перезапись grades.csv
+    assert grades.total("S-1") == 17.5 and grades.week_score("S-1", 2) == 10 and grades.total("S-3") == 0
+
+
+def test_owner_grades_anyone_and_bad_file_is_rejected_whole(tmp_path):
+    grades, importer = _setup(tmp_path)
+    checked = importer.check_file("m.csv", b"student_code,week,points\nS-3,1,6\n", ta_id=None)
+    assert len(checked.accepted) == 1 and grades.table.read().empty  # проверка ничего не пишет
+
+    report = importer.import_file("m.csv", b"student_code,week,points\nS-3,1,6\nS-3,4,3\nS-3,5,2\n",
+                                  graded_by=1, ta_id=None)
+    assert [r["task_id"] for r in report.accepted] == ["tsk_w1"] and grades.week_score("S-3", 1) == 6
+    assert [reason for _, reason in report.rejected] == \
+        ["в неделе 4 несколько заданий — укажите task_id", "в неделе 5 нет заданий"]
+
+    with pytest.raises(GradeImportError, match="points"):
+        importer.import_file("m.csv", b"student_code,week\nS-1,1\n", graded_by=1, ta_id=None)
+    with pytest.raises(GradeImportError):
+        importer.import_file("m.txt", b"student_code,week,points\n", graded_by=1, ta_id=None)
+    assert len(grades.table.read()) == 1
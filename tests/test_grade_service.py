@@ -0,0 +1,57 @@
+from app.services.grade_service import OVERRIDE_PREFIX, GradeService
+from app.services.task_service import TaskService
+
+
+def test_regrade_replaces_previous_grade_in_totals(tmp_path):
+    grades = GradeService(str(tmp_path), tasks=TaskService(str(tmp_path)))
+    grades.set_grade("W01", "S-1", 3, "", 10)
+    grades.set_grade("W02", "S-1", 5, "", 10)
+    grades.set_grade("W01", "S-2", 4, "", 10)
+    assert grades.total("S-1") == 8 and grades.week_score("S-1", 1) == 3
+
+    grades.set_grade("W01", "S-1", 7, "пересдача", 10)
+    assert grades.total("S-1") == 12 and grades.week_score("S-1", 1) == 7
+    assert [g["points"] for g in grades.current_grades("S-1")] == [7, 5]
+    assert grades.week_score("S-1", 3) is None and grades.total("S-2") == 4
+    assert len(grades.list_grades_for_student("S-1")) == 3  # история сохраняется
+
+    row = grades.override_grade("W02", "S-1", 1, "списано", 99)
+    assert row["comment"] == OVERRIDE_PREFIX + "списано"
+    assert grades.latest("S-1", "W02")["graded_by"] == 99 and grades.total("S-1") == 8
+    # новый сервис (рестарт) строит такой же индекс из журнала
+    restarted = GradeService(str(tmp_path))
+    assert restarted.total("S-1") == 8 and restarted.week_grades("S-1", 2)[0]["points"] == 1
+
+
+def test_external_csv_edit_rebuilds_index(tmp_path):
+    grades = GradeService(str(tmp_path))
+    grades.set_grade("W01", "S-1", 3, "", 10)
+    other = GradeService(str(tmp_path))  # второй экземпляр пишет в тот же файл
+    other.set_grade("W01", "S-1", 9, "", 10)
+    assert grades.total("S-1") == 9
+
+    df = grades.table.read()
+    grades.table.write(df[df["points"].astype(float) != 9])
+    assert grades.total("S-1") == 3
+    grades.set_grade("W02", "S-1", 2, "", 10)
+    assert grades.total("S-1") == 5 and grades.week_score("S-1", 2) == 2
+
+
+def test_grades_command_finds_registered_student_by_users_id(tmp_path):
+    import asyncio
+    from types import SimpleNamespace
+    from app.bot.routers.students.grades import my_grades
+    from app.services.users_service import UsersService, student_code_of
+
+    users, grades = UsersService(str(tmp_path)), GradeService(str(tmp_path))
+    users.register_student(100, "a@uni.ru", "S-1")  # код студента хранится в users.id
+    grades.set_grade("W01", "S-1", 4, "", 10)
+    assert student_code_of(users.get_by_tg(100)) == "S-1" and student_code_of(None) is None
+
+    answers = []
+
+    async def answer(text, **kwargs):
+        answers.append(text)
+
+    asyncio.run(my_grades(SimpleNamespace(from_user=SimpleNamespace(id=100), answer=answer), users, grades))
+    assert answers == ["Мои оценки:\n- task W01: 4 б.\nИтого: 4 б."]
@@ -0,0 +1,28 @@
+import asyncio, time
+
+from app.utils.loop_monitor import LoopLagMonitor
+from app.utils.metrics import Metrics
+
+
+def _block_loop(seconds):
+    time.sleep(seconds)  # синхронный вызов прямо в loop'е, как тяжёлый CsvTable.read
+
+
+def test_blocked_loop_is_measured_and_its_stack_captured():
+    metrics = Metrics()
+    monitor = LoopLagMonitor(interval=0.02, threshold=0.05, metrics=metrics)
+
+    async def scenario():
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            _block_loop(0.3)
+            await asyncio.sleep(0.1)  # проба просыпается и записывает лаг
+        finally:
+            await monitor.stop()
+
+    asyncio.run(scenario())
+    assert metrics.snapshot()["loop_lag_hist"][""]["max"] >= 0.25
+    assert metrics.get("loop_lag_over_threshold_total") >= 1
+    assert metrics.get("loop_stalls_total") >= 1
+    assert "_block_loop" in monitor.last_stall_stack
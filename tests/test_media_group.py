@@ -0,0 +1,60 @@
+import asyncio, os
+from datetime import datetime
+
+import pytest
+from aiogram.types import Chat, Message
+
+from app.bot.media_group import MediaGroupCollector
+from app.integrations.storage.local_storage import LocalDiskStorage
+from app.services.submission_service import QuotaExceeded, SubmissionService
+
+
+def _msg(message_id, group):
+    return Message(message_id=message_id, date=datetime.now(), chat=Chat(id=1, type="private"), media_group_id=group)
+
+
+def test_album_parts_are_delivered_together_after_quiet_window():
+    albums = []
+
+    async def handler(parts):
+        albums.append([m.message_id for m in parts])
+
+    async def scenario():
+        collector = MediaGroupCollector(window=0.25)
+        for message_id, group in ((10, "b"), (3, "a"), (1, "a"), (2, "a")):
+            collector.add(_msg(message_id, group), handler)
+            await asyncio.sleep(0.1)  # части приходят чаще окна — группа «a» не закрывается
+        assert albums == [[10]]
+        await asyncio.sleep(0.3)
+        await collector.stop()
+        return collector
+
+    collector = asyncio.run(scenario())
+    assert albums == [[10], [1, 2, 3]]
+    assert collector.pending() == 0
+
+
+def test_album_is_committed_as_one_submission_or_not_at_all(tmp_path):
+    submissions = SubmissionService(str(tmp_path), LocalDiskStorage(str(tmp_path / "storage")), max_week_bytes=1000)
+    in_flight = {"now": 0, "max": 0}
+    writes = []
+    write = submissions.table.write
+    submissions.table.write = lambda df: (writes.append(len(df)), write(df))
+
+    async def chunks(data):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.02)
+        yield data
+        in_flight["now"] -= 1
+
+    files = [(f"p{i}.jpg", chunks(b"x" * 100)) for i in range(5)]
+    rows = asyncio.run(submissions.save_uploads(1, "S-1", "W01", files, concurrency=2))
+    assert len({r["group_id"] for r in rows}) == 1 and rows[0]["group_id"].startswith("grp")
+    assert writes == [5] and in_flight["max"] == 2
+    assert sorted(os.listdir(tmp_path / "storage" / "submissions" / "S-1" / "W01")) == [f"p{i}.jpg" for i in range(5)]
+
+    # квота 5 файлов исчерпана: следующий альбом отклоняется целиком ещё до скачивания
+    with pytest.raises(QuotaExceeded):
+        asyncio.run(submissions.save_uploads(1, "S-1", "W01", [("q.jpg", chunks(b"y"))]))
+    assert len(submissions.table.read()) == 5 and os.listdir(submissions.tmp_dir) == []
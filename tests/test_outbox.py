@@ -0,0 +1,94 @@
+import asyncio
+
+from app.bot.outbox import Outbox, Priority, TokenBucket
+from bench.fake_bot_api import FakeBotApi
+
+
+def test_token_bucket_spacing():
+    bucket = TokenBucket(rate=2.0, capacity=1.0)
+    bucket.updated = 0.0
+    assert bucket.delay(now=0.0) == 0.0
+    bucket.take(now=0.0)
+    assert bucket.delay(now=0.0) == 0.5
+    assert bucket.delay(now=0.5) == 0.0
+
+
+def _run(scenario, api_latency=0.0, **outbox_kwargs):
+    async def main():
+        async with FakeBotApi(latency=api_latency) as api:
+            outbox = Outbox(**outbox_kwargs)
+            await outbox.start(api.bot())
+            try:
+                return await scenario(api, outbox)
+            finally:
+                await outbox.stop()
+    return asyncio.run(main())
+
+
+def test_per_chat_and_global_limits_keep_order():
+    async def scenario(api, outbox):
+        futures = [outbox.send_message(chat, f"{chat}:{i}") for i in range(3) for chat in (1, 2, 3)]
+        await asyncio.gather(*futures)
+        return api.calls
+
+    calls = _run(scenario, global_rate=100.0, chat_rate=10.0)
+    for chat in ("1", "2", "3"):
+        times = [t for t, _, p in calls if p["chat_id"] == chat]
+        assert [p["text"] for _, _, p in calls if p["chat_id"] == chat] == [f"{chat}:{i}" for i in range(3)]
+        assert all(b - a >= 0.09 for a, b in zip(times, times[1:]))
+
+
+def test_interactive_lane_overtakes_broadcast():
+    async def scenario(api, outbox):
+        broadcast = [outbox.send_message(100 + i, "news", priority=Priority.BROADCAST) for i in range(20)]
+        reply = outbox.send_message(7, "reply", priority=Priority.INTERACTIVE)
+        await asyncio.gather(reply, *broadcast)
+        return [p["text"] for p in api.sent()]
+
+    texts = _run(scenario, global_rate=10.0, chat_rate=10.0)
+    # глобальный запас (10) уходит сразу, дальше интерактивный ответ идёт первым
+    assert texts.index("reply") <= 10
+
+
+def test_retry_after_is_honoured():
+    async def scenario(api, outbox):
+        api.flood(chat_id=5, times=1, retry_after=1)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = outbox.send_message(5, "a")
+        second = outbox.send_message(5, "b")
+        message = await first
+        await second
+        return message.text, loop.time() - started, [p["text"] for p in api.sent()]
+
+    # ответ API медленнее лимита чата: без «одного сообщения в полёте» b ушло бы, пока a ждёт ответа,
+    # и после RetryAfter порядок стал бы b, a
+    text, elapsed, texts = _run(scenario, api_latency=0.05, global_rate=1000.0, chat_rate=1000.0)
+    assert text == "a"
+    assert elapsed >= 1.0
+    assert texts == ["a", "b"]
+
+
+def test_unexpected_delivery_error_resolves_future():
+    async def scenario(api, outbox):
+        real_bot = outbox.bot
+
+        async def broken(method):
+            if method.text == "boom":
+                raise ValueError("unexpected")
+            return await real_bot(method)
+
+        outbox.bot = broken
+        failed = outbox.send_message(9, "boom")
+        after = outbox.send_message(9, "next")
+        try:
+            await asyncio.wait_for(failed, 1.0)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("future must carry the error")
+        await asyncio.wait_for(after, 1.0)  # чат не «завис» после ошибки
+        return outbox.depth(), [p["text"] for p in api.sent()]
+
+    depth, texts = _run(scenario, global_rate=100.0, chat_rate=100.0, drain_timeout=0.5)
+    assert depth == 0 and texts == ["next"]
@@ -0,0 +1,63 @@
+import asyncio, io
+
+from PIL import Image
+
+from app.integrations.storage.local_storage import LocalDiskStorage
+from app.services.event_bus import EventBus
+from app.services.pdf_compile_service import SubmissionPdfCompiler, images_to_pdf
+from app.services.submission_service import SubmissionService
+
+
+def _image(color, size=(300, 400), fmt="PNG"):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, fmt)
+    return buf.getvalue()
+
+
+def _page_colors(pdf_path):
+    """Цвета страниц PDF по порядку (Pillow пишет каждую страницу одним JPEG-потоком)."""
+    data = open(pdf_path, "rb").read()
+    colors, start = [], 0
+    while (start := data.find(b"\xff\xd8", start)) != -1:
+        end = data.index(b"\xff\xd9", start) + 2
+        colors.append(Image.open(io.BytesIO(data[start:end])).convert("RGB").getpixel((5, 5)))
+        start = end
+    return colors
+
+
+def test_images_to_pdf_downscales_pages(tmp_path):
+    src = tmp_path / "big.jpg"
+    src.write_bytes(_image("white", size=(4000, 3000), fmt="JPEG"))
+    out = tmp_path / "out.pdf"
+    assert images_to_pdf([str(src)], str(out), max_side=1000) == 1
+    assert out.read_bytes().startswith(b"%PDF") and out.stat().st_size < src.stat().st_size
+
+
+def test_week_photos_are_compiled_into_one_pdf_in_upload_order(tmp_path):
+    events = EventBus()
+    subs = SubmissionService(str(tmp_path), LocalDiskStorage(str(tmp_path / "storage")), events=events)
+    compiler = SubmissionPdfCompiler(subs, subs.storage, events, workers=1, debounce=0.2)
+
+    async def chunks(data):
+        yield data
+
+    async def scenario():
+        await compiler.start()
+        await subs.save_uploads(1, "S-1", "W02", [("p1.png", chunks(_image((255, 0, 0)))),
+                                                  ("p2.jpg", chunks(_image((0, 0, 255), fmt="JPEG")))])
+        await subs.save_submission(1, "S-1", "W02", "notes.txt", b"not a page")
+        await subs.save_submission(1, "S-1", "W02", "p1.png", _image((0, 255, 0)))  # новая версия p1
+        await subs.save_submission(1, "S-2", "W02", "alien.png", _image("black"))
+        await compiler.stop()
+
+    asyncio.run(scenario())
+    pdf = tmp_path / "storage" / "submissions" / "S-1" / "W02" / "S-1_W02.pdf"
+    assert pdf.exists()
+    colors = _page_colors(pdf)
+    assert len(colors) == 2
+    assert colors[0][2] > 200 and colors[1][1] > 200  # p2 (синий), затем новая версия p1 (зелёная)
+
+    df = subs.table.read().fillna("")
+    by_name = {(r.student_code, r.file_name): r.pdf_path for r in df.itertuples()}
+    assert by_name[("S-1", "p2.jpg")] == str(pdf) and by_name[("S-1", "notes.txt")] == ""
+    assert by_name[("S-2", "alien.png")].endswith("S-2_W02.pdf")
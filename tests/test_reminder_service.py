@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from app.services.booking_service import BookingService
+from app.services.reminder_service import ReminderService
+from app.services.slot_service import SlotService
+from app.services.submission_service import SUBMISSION_COLUMNS
+from app.services.task_service import TASK_COLUMNS, TaskService
+from app.services.users_service import USERS_COLUMNS, UsersService
+from app.services.weeks_service import WEEKS_COLUMNS, WeeksService
+
+# WeeksService: дедлайн W01 — 06.09.2025, W02 — 13.09.2025
+NOW = datetime(2025, 9, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _setup(tmp_path):
+    d = str(tmp_path)
+    pd.DataFrame([
+        {"tg_id": 10, "role": "ta", "first_name": "Ta", "last_name": "One", "id": "TA-01"},
+        {"tg_id": 100, "role": "student", "first_name": "Anna", "last_name": "A", "id": "S-1"},
+        {"tg_id": 200, "role": "student", "first_name": "Boris", "last_name": "B", "id": "S-2"},
+    ], columns=USERS_COLUMNS).to_csv(f"{d}/users.csv", index=False)
+    pd.DataFrame([{"week": 1, "title": "W1", "description": ""}, {"week": 2, "title": "W2", "description": ""}],
+                 columns=WEEKS_COLUMNS).to_csv(f"{d}/weeks.csv", index=False)
+    pd.DataFrame([{"submission_id": "sub_1", "task_id": "W01", "student_code": "S-1", "tg_id": 100}],
+                 columns=SUBMISSION_COLUMNS).to_csv(f"{d}/submissions.csv", index=False)
+    slots, bookings = SlotService(d), BookingService(d)
+    users, weeks = UsersService(d), WeeksService(d)
+    slot = slots.add_slot("TA-01", "2025-09-03", "10:00", "10:15")
+    bookings.table.append_row({"booking_id": "bkg_1", "slot_id": slot["slot_id"], "student_tg_id": 100,
+                               "created_at": (NOW - timedelta(minutes=5)).isoformat(), "status": "active"})
+    return d, slots, bookings, users, weeks
+
+
+def test_jobs_are_derived_and_follow_table_changes(tmp_path):
+    d, slots, bookings, users, weeks = _setup(tmp_path)
+    reminders = ReminderService(d, slots, bookings, users, weeks)
+    assert reminders.refresh(now=NOW) == 4
+    jobs = reminders.table.read().set_index("job_id")
+    assert set(jobs.index) == {"booking_24h:bkg_1", "booking_1h:bkg_1", "deadline_24h:W01", "deadline_24h:W02"}
+    assert reminders.refresh(now=NOW) == 0  # таблицы не менялись
+
+    bookings.cancel("bkg_1")
+    reminders.refresh(now=NOW)
+    jobs = reminders.table.read().set_index("job_id")
+    assert jobs.loc["booking_1h:bkg_1", "status"] == "canceled"
+
+
+def test_restart_does_not_resend(tmp_path):
+    d, slots, bookings, users, weeks = _setup(tmp_path)
+    ReminderService(d, slots, bookings, users, weeks).refresh(now=NOW)
+
+    at = datetime(2025, 9, 2, 10, 0, 30, tzinfo=timezone.utc)  # сутки до слота 03.09 10:00
+    first = ReminderService(d, slots, bookings, users, weeks)
+    assert [m[:2] for m in first.due_messages(at)] == [(100, "⏰ Напоминание: завтра сдача 03.09 10:00–10:15.")]
+
+    restarted = ReminderService(d, slots, bookings, users, weeks)
+    assert restarted.due_messages(at) == []
+
+
+def test_deadline_reminder_skips_students_who_submitted(tmp_path):
+    d, slots, bookings, users, weeks = _setup(tmp_path)
+    # сдача по заданию tsk_… (неделя — из tasks.csv), как пишет /submit: student_code пуст, есть tg_id
+    pd.DataFrame([{"task_id": "tsk_w1", "week": 1, "title": "ДЗ 1"}],
+                 columns=TASK_COLUMNS).to_csv(f"{d}/tasks.csv", index=False)
+    pd.DataFrame([{"submission_id": "sub_1", "task_id": "tsk_w1", "tg_id": 100}],
+                 columns=SUBMISSION_COLUMNS).to_csv(f"{d}/submissions.csv", index=False)
+    reminders = ReminderService(d, slots, bookings, users, weeks, tasks=TaskService(d))
+    reminders.refresh(now=NOW)
+    at = datetime(2025, 9, 5, 23, 59, 30, tzinfo=timezone.utc)
+    deadline = [m for m in reminders.due_messages(at) if "W01" in m[1]]
+    assert [chat for chat, _, _ in deadline] == [200]
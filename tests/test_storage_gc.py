@@ -0,0 +1,80 @@
+import asyncio, os, time
+
+from app.integrations.storage.cas_storage import ContentAddressedStorage
+from app.integrations.storage.local_storage import LocalDiskStorage
+from app.services.storage_gc_service import StorageGC
+from app.services.submission_service import SubmissionService
+
+HOUR_AGO = time.time() - 3600
+
+
+def _age(path, when=HOUR_AGO):
+    os.utime(path, (when, when))
+
+
+def _drop_rows(subs, submission_ids):
+    df = subs.table.read()
+    subs.table.write(df[~df["submission_id"].isin(submission_ids)])
+
+
+def test_orphans_are_quarantined_restored_and_purged(tmp_path):
+    storage = LocalDiskStorage(str(tmp_path / "storage"))
+    subs = SubmissionService(str(tmp_path), storage)
+    gc = StorageGC(subs, batch_size=2, files_per_s=10_000, min_age=60)
+    kept = asyncio.run(subs.save_submission(1, "S-1", "W01", "kept.py", b"kept"))
+    gone = asyncio.run(subs.save_submission(1, "S-2", "W01", "gone.py", b"x" * 100))
+    _drop_rows(subs, [gone["submission_id"]])  # строка удалена, файл остался
+    stray = tmp_path / "storage" / "submissions" / ".tmp-crashed"
+    stray.write_bytes(b"y" * 50)
+    fresh = tmp_path / "storage" / "submissions" / "just-written.bin"
+    fresh.write_bytes(b"z")
+    for path in (kept["file_path"], gone["file_path"], stray):
+        _age(path)
+
+    async def scenario():
+        subs.active_uploads = 1  # идёт сдача — GC ждёт
+        run = asyncio.create_task(gc.run())
+        await asyncio.sleep(0.2)
+        assert not run.done()
+        subs.active_uploads = 0
+        return await run
+
+    report = asyncio.run(scenario())
+    assert (report.scanned, report.quarantined, report.quarantined_bytes) == (4, 2, 150)
+    assert (report.reclaimable, report.reclaimable_bytes) == (2, 150)
+    assert os.path.exists(kept["file_path"]) and fresh.exists() and not os.path.exists(gone["file_path"])
+    assert gc.last_report is report
+
+    # на файл снова сослались — следующий проход возвращает его на место
+    subs.table.append_row(gone)
+    report = asyncio.run(gc.run())
+    assert report.restored == 1 and os.path.exists(gone["file_path"]) and report.reclaimable == 1
+
+    # срок карантина истёк — удаление
+    gc.quarantine_days = 0
+    report = asyncio.run(gc.run())
+    assert (report.purged, report.purged_bytes, report.reclaimable) == (1, 50, 0)
+
+
+def test_cas_blob_is_rewritten_after_quarantine_and_forgotten_on_purge(tmp_path):
+    storage = ContentAddressedStorage(str(tmp_path / "storage"))
+    subs = SubmissionService(str(tmp_path), storage)
+    gc = StorageGC(subs, files_per_s=10_000, min_age=60)
+    row = asyncio.run(subs.save_submission(1, "S-1", "W01", "a.py", b"blob"))
+    _drop_rows(subs, [row["submission_id"]])
+    _age(row["file_path"])
+
+    assert asyncio.run(gc.run()).quarantined == 1 and not os.path.exists(row["file_path"])
+
+    # та же сдача ещё раз: индекс помнит блоб, но файла нет — CAS записывает его заново
+    again = asyncio.run(subs.save_submission(1, "S-1", "W01", "a.py", b"blob"))
+    assert again["file_path"] == row["file_path"] and open(again["file_path"], "rb").read() == b"blob"
+    report = asyncio.run(gc.run())
+    assert report.restored == 1 and report.reclaimable == 0
+
+    _drop_rows(subs, [again["submission_id"]])
+    _age(again["file_path"])
+    asyncio.run(gc.run())
+    gc.quarantine_days = 0
+    assert asyncio.run(gc.run()).purged == 1
+    assert storage.versions("submissions/S-1/W01/a.py") == [] and storage.refcount(row["sha256"]) == 0
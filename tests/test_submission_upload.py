@@ -0,0 +1,144 @@
+import asyncio, hashlib, os, threading
+
+import pytest
+
+from app.bot.file_download import telegram_file_chunks
+from app.domain.events import SubmissionCreated
+from app.integrations.storage.local_storage import LocalDiskStorage
+from app.integrations.storage.upload_queue import UploadQueue
+from app.services.event_bus import EventBus
+from app.services.submission_service import QuotaExceeded, SubmissionService, UploadTooLarge
+from app.services.task_service import TaskService
+from bench.fake_bot_api import FakeBotApi
+
+
+def test_streamed_upload_is_hashed_and_moved_into_storage(tmp_path):
+    content = os.urandom(3 * 1024 * 1024 + 17)
+    submissions = SubmissionService(str(tmp_path), LocalDiskStorage(str(tmp_path / "storage")))
+
+    async def scenario():
+        async with FakeBotApi() as api:
+            bot = api.bot()
+            api.put_file("doc1", content)
+            file = await bot.get_file("doc1")
+            return await submissions.save_upload(100, "S-1", "W01", "../sol.pdf",
+                                                 telegram_file_chunks(bot, file.file_path, chunk_size=64 * 1024))
+
+    row = asyncio.run(scenario())
+    assert row["sha256"] == hashlib.sha256(content).hexdigest() and row["size_bytes"] == len(content)
+    assert row["file_path"] == str(tmp_path / "storage" / "submissions" / "S-1" / "W01" / "sol.pdf")
+    with open(row["file_path"], "rb") as f:
+        assert f.read() == content
+    assert os.listdir(submissions.tmp_dir) == []
+    assert submissions.table.find(submission_id=row["submission_id"]).iloc[0]["size_bytes"] == len(content)
+
+
+def test_oversized_upload_is_rejected_without_leftovers(tmp_path):
+    submissions = SubmissionService(str(tmp_path), LocalDiskStorage(str(tmp_path / "storage")), max_upload_bytes=100)
+
+    async def chunks():
+        for _ in range(5):
+            yield b"x" * 40
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(submissions.save_upload(100, "S-1", "W01", "big.bin", chunks()))
+    assert os.listdir(submissions.tmp_dir) == []
+    assert not (tmp_path / "storage" / "submissions").exists()
+    assert submissions.table.read().empty
+
+
+def test_week_quota_counts_files_and_bytes_incrementally(tmp_path):
+    tasks = TaskService(str(tmp_path))
+    tasks.add_task("2", "Графы", "2025-09-13T23:59:00+03:00", 10)
+    task_id = tasks.list_tasks().iloc[0]["task_id"]
+    storage = LocalDiskStorage(str(tmp_path / "storage"))
+    submissions = SubmissionService(str(tmp_path), storage, tasks=tasks, max_week_bytes=1000)
+
+    for i in range(4):
+        asyncio.run(submissions.save_submission(1, "S-1", "W02", f"p{i}.png", b"x" * 100))
+    asyncio.run(submissions.save_submission(1, "S-1", task_id, "report.pdf", b"x" * 100))  # та же неделя 2
+    assert submissions.quotas.usage(("S-1", "2")) == (5, 500)
+    with pytest.raises(QuotaExceeded):
+        submissions.check_quota(1, "S-1", "W02", "p5.png", 10)
+    # перезагрузка того же файла заменяет версию, а не занимает слот
+    assert submissions.check_quota(1, "S-1", "W02", "p0.png", 600) == 600
+    asyncio.run(submissions.save_submission(1, "S-1", "W02", "p0.png", b"y" * 600))
+    assert submissions.quotas.usage(("S-1", "2")) == (5, 1000)
+    assert submissions.check_quota(1, "S-2", "W02", "p0.png", 1000) == 1000  # другой студент
+
+    # после рестарта индекс восстанавливается из submissions.csv
+    restarted = SubmissionService(str(tmp_path), storage, tasks=tasks, max_week_bytes=1000)
+    assert restarted.quotas.usage(("S-1", "2")) == (5, 1000)
+
+
+def test_stream_stops_when_week_quota_runs_out(tmp_path):
+    submissions = SubmissionService(str(tmp_path), LocalDiskStorage(str(tmp_path / "storage")), max_week_bytes=150)
+    asyncio.run(submissions.save_submission(1, "S-1", "W01", "a.png", b"x" * 100))
+
+    async def chunks():  # file_size от Telegram неизвестен — лимит держит сам поток
+        for _ in range(3):
+            yield b"x" * 40
+
+    with pytest.raises(QuotaExceeded):
+        asyncio.run(submissions.save_upload(1, "S-1", "W01", "b.png", chunks()))
+    assert os.listdir(submissions.tmp_dir) == []
+    assert submissions.quotas.usage(("S-1", "1")) == (1, 100)
+
+
+def test_failed_album_part_cancels_the_other_downloads(tmp_path):
+    submissions = SubmissionService(str(tmp_path), LocalDiskStorage(str(tmp_path / "storage")), max_upload_bytes=100)
+    pulled = []
+
+    async def big():
+        for _ in range(3):
+            yield b"x" * 60
+
+    async def slow():
+        for i in range(50):
+            pulled.append(i)
+            await asyncio.sleep(0.01)
+            yield b"y"
+
+    async def scenario():
+        with pytest.raises(UploadTooLarge):
+            await submissions.save_uploads(1, "S-1", "W01", [("big.png", big()), ("slow.png", slow())])
+        left = len(pulled)
+        await asyncio.sleep(0.1)
+        return left
+
+    left = asyncio.run(scenario())
+    assert left < 5 and len(pulled) == left  # вторая часть остановлена, а не докачана в удалённый файл
+    assert os.listdir(submissions.tmp_dir) == []
+    assert submissions.table.read().empty
+
+
+def test_submissions_csv_is_written_off_the_event_loop(tmp_path):
+    events = EventBus()
+    submissions = SubmissionService(str(tmp_path), LocalDiskStorage(str(tmp_path / "storage")), events=events)
+    loop_thread, writers, published = threading.get_ident(), [], []
+    append_rows = submissions.table.append_rows
+    submissions.table.append_rows = lambda rows: (writers.append(threading.get_ident()), append_rows(rows))
+    events.subscribe(SubmissionCreated, lambda e: published.append(asyncio.get_running_loop() is not None))
+
+    asyncio.run(submissions.save_submission(1, "S-1", "W01", "a.py", b"print(1)"))
+    assert writers and loop_thread not in writers
+    assert published == [True]  # подписчики (компилятор PDF) вызываются в event loop
+    assert submissions.quotas.usage(("S-1", "1")) == (1, 8)
+
+
+def test_upload_queue_keeps_only_recent_done_statuses():
+    async def upload(key, src):
+        pass
+
+    async def scenario():
+        queue = UploadQueue(upload, workers=2, keep_done=3)
+        await queue.start()
+        for i in range(10):
+            queue.enqueue(f"k{i}", f"/spool/{i}")
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert sorted(queue._statuses) == ["k7", "k8", "k9"]
+    assert queue.status("k0") is None and queue.status("k9").state == "done"
+    assert queue.depth() == 0
@@ -0,0 +1,70 @@
+import asyncio
+
+import pandas as pd
+
+from app.services.booking_service import BookingService
+from app.services.event_bus import EventBus
+from app.services.slot_service import SlotService
+from app.services.ta_digest_service import TaDigestService
+from app.services.users_service import USERS_COLUMNS, UsersService
+
+
+class _RecordingOutbox:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text, priority=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+def _setup(tmp_path):
+    d = str(tmp_path)
+    pd.DataFrame([
+        {"tg_id": 10, "role": "ta", "first_name": "Ta", "last_name": "One", "id": "TA-01"},
+        {"tg_id": 20, "role": "ta", "first_name": "Ta", "last_name": "Two", "id": "TA-02"},
+        {"tg_id": 100, "role": "student", "first_name": "Anna", "last_name": "A", "id": "S-1"},
+        {"tg_id": 200, "role": "student", "first_name": "Boris", "last_name": "B", "id": "S-2"},
+    ], columns=USERS_COLUMNS).to_csv(f"{d}/users.csv", index=False)
+    events = EventBus()
+    slots, bookings, users = SlotService(d, events), BookingService(d, events), UsersService(d, events)
+    return slots, bookings, TaDigestService(slots, users, events, window_s=600)
+
+
+def test_one_digest_per_ta_and_round_trips_collapse(tmp_path):
+    slots, bookings, digest = _setup(tmp_path)
+    s1 = slots.add_slot("TA-01", "2025-09-03", "10:00", "10:15")
+    s2 = slots.add_slot("TA-01", "2025-09-03", "10:15", "10:30")
+    s3 = slots.add_slot("TA-02", "2025-09-04", "12:00", "12:15")
+    bookings.create(s1["slot_id"], 100)
+    bookings.create(s2["slot_id"], 200)
+    flaky = bookings.create(s3["slot_id"], 100)
+    bookings.cancel(flaky["booking_id"])  # создана и отменена в одном окне
+    slots.cancel_slot(s3["slot_id"], canceled_by=1)
+    assert digest.pending() == 5
+
+    outbox = _RecordingOutbox()
+    assert asyncio.run(digest.flush(outbox)) == 2
+    sent = dict(outbox.sent)
+    assert "Новые записи (2)" in sent[10] and "A Anna" in sent[10] and "B Boris" in sent[10]
+    assert "Отменённые записи" not in sent[20] and "Новые записи" not in sent[20]
+    assert "Отменённые слоты (1):\n• 04.09 12:00–12:15" in sent[20]
+    assert digest.pending() == 0
+
+
+def test_stop_flushes_pending_events(tmp_path):
+    slots, bookings, digest = _setup(tmp_path)
+    slot = slots.add_slot("TA-01", "2025-09-03", "10:00", "10:15")
+    outbox = _RecordingOutbox()
+
+    async def scenario():
+        await digest.start(outbox)
+        booking = bookings.create(slot["slot_id"], 100)
+        await asyncio.sleep(0)
+        assert outbox.sent == []  # окно ещё не закрылось
+        bookings.cancel(booking["booking_id"])
+        bookings.create(slot["slot_id"], 200)
+        await digest.stop()
+
+    asyncio.run(scenario())
+    assert [chat for chat, _ in outbox.sent] == [10]
+    assert "B Boris" in outbox.sent[0][1] and "A Anna" not in outbox.sent[0][1]
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+from aiogram import Bot, Dispatcher, Router, F
+from aiogram.types import Message
+
+from app.bot.update_scheduler import UpdateScheduler
+from bench.fake_session import FAKE_BOT_TOKEN, FakeTelegramSession
+
+
+def _update(update_id: int, user_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+def _setup(scheduler: UpdateScheduler, handler_delay: float):
+    seen, active, peak = {}, [0], [0]
+    router = Router()
+
+    @router.message(F.text)
+    async def on_text(message: Message):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        # у первых апдейтов задержка больше: без очереди они завершились бы позже следующих
+        await asyncio.sleep(handler_delay / int(message.text))
+        seen.setdefault(message.from_user.id, []).append(int(message.text))
+        active[0] -= 1
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    scheduler.setup(dp)
+    bot = Bot(token=FAKE_BOT_TOKEN, session=FakeTelegramSession())
+    return dp, bot, seen, peak
+
+
+def test_scheduler_keeps_per_user_order_and_bounds_workers():
+    scheduler = UpdateScheduler(workers=3, user_queue_limit=10)
+    dp, bot, seen, peak = _setup(scheduler, handler_delay=0.03)
+
+    async def scenario():
+        await dp.emit_startup(bot=bot)
+        update_id, feeds = 0, []
+        for n in range(1, 6):
+            for user in (1, 2, 3, 4):
+                update_id += 1
+                # как polling с handle_as_tasks=True: задача на апдейт, в порядке получения
+                feeds.append(asyncio.create_task(dp.feed_raw_update(bot, _update(update_id, user, str(n)))))
+        await asyncio.sleep(0.01)
+        assert scheduler.depth() > 0
+        await asyncio.gather(*feeds)  # feed завершается вместе с обработкой апдейта
+        assert scheduler.depth() == 0
+        await dp.emit_shutdown(bot=bot)
+
+    asyncio.run(scenario())
+    assert seen == {u: [1, 2, 3, 4, 5] for u in (1, 2, 3, 4)}
+    assert 1 < peak[0] <= 3
+    assert scheduler.depth() == 0
+
+
+def test_scheduler_waits_for_queue_space_instead_of_dropping():
+    scheduler = UpdateScheduler(workers=2, user_queue_limit=2)
+    dp, bot, seen, _ = _setup(scheduler, handler_delay=0.01)
+
+    async def scenario():
+        await dp.emit_startup(bot=bot)
+        feeds = [asyncio.create_task(dp.feed_raw_update(bot, _update(n, 7, str(n)))) for n in range(1, 7)]
+        await asyncio.sleep(0)
+        depths = []
+        while not all(f.done() for f in feeds):
+            depths.append(scheduler.depth(("user", 7)))
+            await asyncio.sleep(0.001)
+        await dp.emit_shutdown(bot=bot)
+        return depths
+
+    depths = asyncio.run(scenario())
+    assert seen == {7: [1, 2, 3, 4, 5, 6]}  # ничего не потеряно, порядок сохранён
+    assert max(depths) <= 2
@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from aiogram import Bot, Dispatcher, Router, F
+from aiogram.types import Message
+
+from app.bot.webhook import SECRET_HEADER, WebhookRuntime
+from app.config import load_config
+from bench.fake_session import FAKE_BOT_TOKEN, FakeTelegramSession
+
+
+def _update(update_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()),
+            "chat": {"id": 500, "type": "private"},
+            "from": {"id": 500, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+def _runtime(handler_delay: float = 0.0, **kwargs):
+    seen, active, peak = [], [0], [0]
+    router = Router()
+
+    @router.message(F.text)
+    async def on_text(message: Message):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(handler_delay)
+        seen.append(message.text)
+        active[0] -= 1
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    bot = Bot(token=FAKE_BOT_TOKEN, session=FakeTelegramSession())
+    return WebhookRuntime(dp, bot, **kwargs), seen, peak
+
+
+async def _with_client(runtime, scenario):
+    client = TestClient(TestServer(runtime.build_app()))
+    await client.start_server()
+    try:
+        return await scenario(client)
+    finally:
+        await client.close()
+
+
+def test_webhook_processes_posted_update():
+    runtime, seen, _ = _runtime(path="/tg", secret="s3cret")
+
+    async def scenario(client):
+        resp = await client.post("/tg", json=_update(1, "/start"), headers={SECRET_HEADER: "s3cret"})
+        assert resp.status == 200
+        await runtime.drain()
+
+    asyncio.run(_with_client(runtime, scenario))
+    assert seen == ["/start"]
+
+
+def test_webhook_rejects_wrong_secret_and_bad_payload():
+    runtime, seen, _ = _runtime(path="/tg", secret="s3cret")
+
+    async def scenario(client):
+        bad_secret = await client.post("/tg", json=_update(1, "x"), headers={SECRET_HEADER: "nope"})
+        bad_payload = await client.post("/tg", data=b"not json", headers={SECRET_HEADER: "s3cret"})
+        return bad_secret.status, bad_payload.status
+
+    assert asyncio.run(_with_client(runtime, scenario)) == (401, 400)
+    assert seen == []
+
+
+def test_webhook_bounds_concurrency_and_drains_on_shutdown():
+    runtime, seen, peak = _runtime(handler_delay=0.05, max_concurrency=3)
+
+    async def scenario(client):
+        posts = [client.post("/webhook", json=_update(i, f"m{i}")) for i in range(10)]
+        statuses = [r.status for r in await asyncio.gather(*posts)]
+        await runtime.drain()
+        late = await client.post("/webhook", json=_update(99, "late"))
+        return statuses, late.status
+
+    statuses, late_status = asyncio.run(_with_client(runtime, scenario))
+    assert statuses == [200] * 10
+    assert late_status == 503
+    assert sorted(seen) == sorted(f"m{i}" for i in range(10))
+    assert peak[0] <= 3
+
+
+def test_metrics_endpoint_needs_token():
+    closed, _, _ = _runtime()
+    guarded, _, _ = _runtime(metrics_token="m-token")
+
+    async def get(runtime, headers=None):
+        async def scenario(client):
+            return (await client.get("/metrics", headers=headers or {})).status
+        return await _with_client(runtime, scenario)
+
+    assert asyncio.run(get(closed)) == 404
+    assert asyncio.run(get(guarded)) == 401
+    assert asyncio.run(get(guarded, {"Authorization": "Bearer m-token"})) == 200
+
+
+def test_webhook_mode_requires_secret(monkeypatch, tmp_path):
+    for key, value in {"BOT_TOKEN": FAKE_BOT_TOKEN, "DATA_DIR": str(tmp_path), "RUN_MODE": "webhook",
+                       "WEBHOOK_BASE_URL": "https://bot.example.org", "WEBHOOK_SECRET": ""}.items():
+        monkeypatch.setenv(key, value)
+    with pytest.raises(RuntimeError, match="WEBHOOK_SECRET"):
+        load_config()
+    monkeypatch.setenv("WEBHOOK_SECRET", "bad secret!")
+    with pytest.raises(RuntimeError, match="WEBHOOK_SECRET"):
+        load_config()
+    monkeypatch.setenv("WEBHOOK_SECRET", "s3cret_Token-1")
+    assert load_config().webhook_secret == "s3cret_Token-1"
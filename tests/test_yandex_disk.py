@@ -0,0 +1,96 @@
+import asyncio, os
+
+import pytest
+
+from app.integrations.storage.yandex_disk import YandexDiskClient, YandexDiskError, YandexDiskStorage
+from app.services.submission_service import SubmissionService
+from bench.fake_yandex_disk import FakeYandexDisk
+
+
+def test_upload_creates_folders_and_retries_transient_errors(tmp_path):
+    src = tmp_path / "sol.pdf"
+    src.write_bytes(os.urandom(600 * 1024))
+
+    async def scenario():
+        async with FakeYandexDisk(token="t") as disk:
+            client = YandexDiskClient("t", base_url=disk.api_url, root="app:/course", backoff=0.01)
+            try:
+                disk.fail_next(2, status=503)
+                remote = await client.upload_file("submissions/S-1/W01/sol.pdf", str(src))
+                await client.upload_file("submissions/S-1/W02/sol.pdf", str(src))
+            finally:
+                await client.close()
+            return disk, remote
+
+    disk, remote = asyncio.run(scenario())
+    assert remote == "app:/course/submissions/S-1/W01/sol.pdf"
+    assert disk.files[remote] == src.read_bytes()
+    assert {"app:/course", "app:/course/submissions", "app:/course/submissions/S-1"} <= disk.dirs
+    # 2 ответа 503 + 4 папки первой загрузки; для второй создаётся только W02
+    assert disk.requests.count(("PUT", "mkdir")) == 7
+
+
+def test_client_gives_up_on_permanent_errors(tmp_path):
+    src = tmp_path / "a.txt"
+    src.write_bytes(b"x")
+
+    async def scenario():
+        async with FakeYandexDisk(token="right") as disk:
+            client = YandexDiskClient("wrong", base_url=disk.api_url, backoff=0.01)
+            try:
+                with pytest.raises(YandexDiskError) as exc:
+                    await client.upload_file("a.txt", str(src))
+            finally:
+                await client.close()
+            return exc.value, disk
+
+    error, disk = asyncio.run(scenario())
+    assert error.status == 401 and len(disk.requests) == 1
+
+
+def test_submissions_are_spooled_and_uploaded_in_background(tmp_path):
+    async def chunks(data):
+        yield data
+
+    async def scenario():
+        async with FakeYandexDisk(latency=0.05) as disk:
+            client = YandexDiskClient("token", base_url=disk.api_url, concurrency=2, backoff=0.01)
+            storage = YandexDiskStorage(client)
+            svc = SubmissionService(str(tmp_path), storage, spool=True, upload_workers=4)
+            rows = [await svc.save_upload(1, f"S-{i}", "W01", "sol.py", chunks(b"%d" % i)) for i in range(5)]
+            # хендлер не ждёт сети: строка уже есть, файл лежит в spool
+            assert {r["upload_status"] for r in rows} == {"pending"}
+            assert all(os.path.exists(r["file_path"]) for r in rows)
+            await svc.start()
+            await svc.stop()
+            await storage.stop()
+            return disk, svc
+
+    disk, svc = asyncio.run(scenario())
+    df = svc.table.read()
+    assert set(df["upload_status"]) == {"uploaded"}
+    assert set(df["file_path"]) == {f"yadisk://submissions/S-{i}/W01/sol.py" for i in range(5)}
+    assert disk.files["app:/submissions/S-4/W01/sol.py"] == b"4"
+    assert disk.max_parallel_uploads <= 2
+    assert os.listdir(svc.spool_dir) == []
+
+
+def test_pending_spool_survives_restart(tmp_path):
+    async def chunks():
+        yield b"late"
+
+    async def scenario():
+        async with FakeYandexDisk() as disk:
+            storage = YandexDiskStorage(YandexDiskClient("token", base_url=disk.api_url, backoff=0.01))
+            first = SubmissionService(str(tmp_path), storage, spool=True)
+            row = await first.save_upload(1, "S-1", "W02", "hw.ipynb", chunks())  # упали до start()
+            second = SubmissionService(str(tmp_path), storage, spool=True)
+            await second.start()
+            await second.stop()
+            await storage.stop()
+            return disk, second, row
+
+    disk, svc, row = asyncio.run(scenario())
+    saved = svc.table.find(submission_id=row["submission_id"]).iloc[0]
+    assert saved["upload_status"] == "uploaded"
+    assert disk.files["app:/submissions/S-1/W02/hw.ipynb"] == b"late"